@@ -10,23 +10,55 @@ from Automated_Design.assign_staples_wChoices import assign_staples_wChoices
 from Automated_Design.constants import M13_SCAF_SEQ
 from Automated_Design.csv_staples import csv_staples
 from Automated_Design.dna_info import DnaInfo
-from Automated_Design.enum_scaf_bases_DX import enum_scaf_bases_DX
-from Automated_Design.enum_scaf_bases_Hybrid import enum_scaf_bases_Hybrid
-from Automated_Design.enum_scaf_bases_Twisted import enum_scaf_bases_Twisted
+from Automated_Design.enum_scaf_bases import enum_scaf_bases
 from Automated_Design.gen_stap_seq import gen_stap_seq
 from Automated_Design.seq_to_text import seqtoText
 from Automated_Design.set_routing_direction import set_routing_direction
 from Automated_Design.split_edge import split_edge
 from Automated_Design.split_vert import split_vert
+from Automated_Design.stage_timer import StageTimer
 from Automated_Design.util import generate_graph
 from Automated_Design.designate_edge_type import designate_edge_type
 from gen_schlegel import gen_schlegel
 from gen_vert_to_face import gen_vert_to_face
 
+# Output files DX_cage_design can save into the results folder, to be picked
+# with its `artifacts` option.  The route info pickle is needed to resequence
+# a design later, see resequence.py.
+artifact_names = ('schlegel', 'model_plot', 'dna_info_pickle',
+                  'route_info_pickle', 'cndo', 'staples_csv', 'seq_text')
+
+
+def design_file_name(shape_name, scaf_name, singleXOs):
+    """
+    Name shared by the output files of a design, e.g.
+    01_tetrahedron_44_scaf_full_M13_singleXOVs_2019-08-03
+    """
+    if singleXOs > 0:
+        staple_description = '_singleXOVs_'
+    else:
+        staple_description = '_doubleXOVs_'
+    return shape_name + '_scaf_' + scaf_name + staple_description + \
+        _today()
+
+
+def redate_file_name(full_file_name):
+    """
+    The name from `design_file_name` of a design made on another day, with
+    today's date in place of the day it was made.
+    """
+    return full_file_name.rsplit('_', 1)[0] + '_' + _today()
+
+
+def _today():
+    return datetime.now().strftime("%Y-%m-%d")
+
 
 def DX_cage_design(coordinates, edges, faces, edge_length_vec, file_name,
                    staple_name, singleXOs, scaf_seq, scaf_name, Aform,
-                   results_foldername, twist, print_to_console=True):
+                   results_foldername, twist, print_to_console=True,
+                   return_dna_info=False, timer=None, artifacts=None,
+                   spanning_tree=None):
     """
     Creates scaffold routing and staple placement of a DX-based DNA origami
     nano cage.
@@ -61,6 +93,20 @@ def DX_cage_design(coordinates, edges, faces, edge_length_vec, file_name,
         input [].
     scaf_name :
         string containing the name of the scaffold. If using default, input [].
+    return_dna_info :
+        If True, also return the DnaInfo object, e.g. to pass it on to
+        pdbgen without re-reading the .cndo file.
+    timer :
+        StageTimer to record the time taken by each of the 11 steps, and the
+        sizes they worked on, into.  Nothing is recorded if None.
+    artifacts :
+        Names of the output files to save, out of `artifact_names`, e.g.
+        ('cndo', 'staples_csv') to skip the plots when screening designs.
+        All of them are saved if None.
+    spanning_tree :
+        Keyword arguments for designate_edge_type, picking how the spanning
+        tree is chosen, e.g. {'strategy': 'random', 'seed': 3}.  The tree
+        networkx's prim_mst finds is used if None.
 
     Returns
     -------
@@ -68,8 +114,21 @@ def DX_cage_design(coordinates, edges, faces, edge_length_vec, file_name,
         The name used to identify all files (distributions, shape
         visualizations, raw data output) saved into resutls folder as belonging
         to this particular combination of input shape and selected parameters.
+    dnaInfo
+        Only if return_dna_info is True.  The DnaInfo object saved above.
     """
 
+    if timer is None:
+        timer = StageTimer(enabled=False)
+    if artifacts is None:
+        artifacts = artifact_names
+    for artifact in artifacts:
+        if artifact not in artifact_names:
+            raise Exception("Unknown artifact '{}', expected one of "
+                            "{}".format(artifact, list(artifact_names)))
+    # Picking the scaffold sequence is counted towards step 1
+    timer.start('1_graph')
+
     # Determine the minimum length scaffold fragment to use.
     len_scaf_used = 2 * sum(edge_length_vec)  # length of scaffold used
 
@@ -108,69 +167,80 @@ def DX_cage_design(coordinates, edges, faces, edge_length_vec, file_name,
 
     # Identify presence of every vertex in every face
     vert_to_face = gen_vert_to_face(num_vert, faces)
+    timer.record(vertices=num_vert, edges=num_edges, faces=len(faces))
 
     # 2. Generate spanning tree ##############################################
+    timer.start('2_spanning_tree')
     # Designate edges as type 1 or 2:
     # Type 1: Non-spanning tree, i.e. 1 scaffold crossover in DX cage
     # Type 2: Spanning tree edges, i.e. 0 scaffold crossovers in DX cage
-    edge_type_mat = designate_edge_type(full_graph)
+    edge_type_mat = designate_edge_type(full_graph, **(spanning_tree or {}))
     # graph_with_spanning_tree_marked = edge_type_mat   # TODO: this rename
 
     schlegel_filename = file_name_without_containing_folder + '_schlegel.png'
     full_schlegel_filename = path.join(results_foldername, schlegel_filename)
 
-    gen_schlegel(edges, coordinates, faces,
-                 schlegel_filename=full_schlegel_filename,
-                 edge_type_graph=edge_type_mat)
+    if 'schlegel' in artifacts:
+        gen_schlegel(edges, coordinates, faces,
+                     schlegel_filename=full_schlegel_filename,
+                     edge_type_graph=edge_type_mat)
+        timer.add_bytes(full_schlegel_filename)
 
     edge_type_mat = edge_type_mat.to_directed()
     # MST in networkx requires an undirected graph?
     # Later code requires directed?
 
     # 3. Add nodes to edges ##################################################
+    timer.start('3_split_edge')
     # Add two nodes to each nontree edge to implement scaffold crossovers
     edge_type_mat_wHalfs, pseudo_vert = split_edge(edge_type_mat)
     # graph_with_edges_split = edge_type_mat_wHalfs  # TODO: this rename
+    timer.record(nodes=edge_type_mat_wHalfs.number_of_nodes())
 
     # 4. Add nodes to vertices ###############################################
+    timer.start('4_split_vert')
     # # Split each vertex into N nodes, where N is degree of vertex
     edge_type_mat_allNodes, pseudo_vert = split_vert(
         edge_type_mat_wHalfs, pseudo_vert, num_vert, vert_to_face)
+    timer.record(nodes=edge_type_mat_allNodes.number_of_nodes())
 
     # 5. Set direction of routing ############################################
+    timer.start('5_routing')
     [route_real, route_vals] = set_routing_direction(
         edge_type_mat_allNodes, num_vert, pseudo_vert, faces, vert_to_face)
 
     # 6. Enumerate scaffold bases ############################################
+    timer.start('6_enum_scaf_bases')
     edge_length_mat_full = full_graph
     # TODO: Did I save the edge lengths onto this one, too?  If not, need to
     # propogate edge lengths to this point
-    #[edge_bgn_vec, edge_fin_vec, edge_type_vec] = enum_scaf_bases_DX(
-    #    route_real, route_vals, edge_length_mat_full)
     if (twist==2):
-        [edge_bgn_vec, edge_fin_vec, edge_type_vec] = enum_scaf_bases_Hybrid(
-            route_real, route_vals, edge_length_mat_full, Aform)
+        form = 'Hybrid'
     elif (twist==3):
-        [edge_bgn_vec, edge_fin_vec, edge_type_vec] = enum_scaf_bases_Twisted(
-            route_real, route_vals, edge_length_mat_full, Aform)
+        form = 'Twisted'
     else:
-        [edge_bgn_vec, edge_fin_vec, edge_type_vec] = enum_scaf_bases_DX(
-            route_real, route_vals, edge_length_mat_full, Aform)
+        form = 'DX'
+    [edge_bgn_vec, edge_fin_vec, edge_type_vec] = enum_scaf_bases(
+        route_real, route_vals, edge_length_mat_full, Aform, form)
 
     num_bases = len(edge_type_vec)
+    timer.record(bases=num_bases)
 
     # 7. Assign enumerated scaffold bases to edges ###########################
+    timer.start('7_assign_scaf_to_edge')
     scaf_to_edge = assign_scaf_to_edge(edges, num_edges, edge_type_mat,
                                        edge_bgn_vec, edge_fin_vec,
                                        edge_type_vec)
 
     # 8. Adjust scaffold nick position #######################################
+    timer.start('8_scaf_nick_pos')
     scaf_nick_pos = get_scaf_nick_pos(edges, route_real, edge_length_vec)
     scaf_to_edge_adj = adj_scaf_nick_pos(scaf_to_edge, scaf_nick_pos,
                                          num_bases)
     scaf_to_edge = scaf_to_edge_adj
 
     # 9. Add staples #########################################################
+    timer.start('9_staples')
     #staples = assign_staples_wChoices(edges, num_edges, edge_type_mat,
     #                                  scaf_to_edge, num_bases, num_vert,
     #                                  singleXOs)
@@ -179,6 +249,7 @@ def DX_cage_design(coordinates, edges, faces, edge_length_vec, file_name,
                                       singleXOs, Aform)
 
     # 10. Assign sequence to staples #########################################
+    timer.start('10_staple_seq')
     if not scaf_seq:  # if a scaffold sequence has been input
         raise Exception("How's that possible?")
         # TODO: Right?, since even if scaf_seq started as `[]`, it would have
@@ -188,6 +259,7 @@ def DX_cage_design(coordinates, edges, faces, edge_length_vec, file_name,
      named_stap_seq_list] = gen_stap_seq(staples, scaf_seq,
                                          staple_name, scaf_name,
                                          len_scaf_used)
+    timer.record(staples=len(stap_list))
 
     # Display named stap_seq_list
     def display_named_stap_seq_list(stap_seq):
@@ -203,29 +275,29 @@ def DX_cage_design(coordinates, edges, faces, edge_length_vec, file_name,
 
     # Leaving this within above scaf_seq, since it relies on 10's output
     # 11. Port to CanDo, save information ####################################
+    timer.start('11_output')
     dnaInfo = DnaInfo(scaf_to_edge, scaf_seq, stap_list, stap_seq_list,
                       coordinates, edges, edge_length_vec, faces, vert_to_face,
                       Aform)
 
     # 11.5 Save DnaInfo
-    if singleXOs > 0:
-        staple_description = '_singleXOVs_'
-    else:
-        staple_description = '_doubleXOVs_'
-    date = datetime.now().strftime("%Y-%m-%d")
-    full_file_name = shape_name + '_scaf_' + scaf_name + \
-        staple_description + date
+    full_file_name = design_file_name(shape_name, scaf_name, singleXOs)
 
     # ... as a 3d plot
     plot_filename = full_file_name + '.png'
     full_plot_filename = path.join(results_foldername, plot_filename)
-    dnaInfo.plot_3d_model(full_plot_filename)
+    if 'model_plot' in artifacts:
+        dnaInfo.plot_3d_model(full_plot_filename)
+        timer.add_bytes(full_plot_filename)
 
     # as pickle dumps.
     pickled_dna_info_filename = 'dnaInfo_' + full_file_name + '.pickle'
     full_pickled_dna_info_filename = path.join(results_foldername,
                                                pickled_dna_info_filename)
-    pickle.dump(dnaInfo, open(full_pickled_dna_info_filename, 'wb'))
+    if 'dna_info_pickle' in artifacts:
+        with open(full_pickled_dna_info_filename, 'wb') as f:
+            pickle.dump(dnaInfo, f)
+        timer.add_bytes(full_pickled_dna_info_filename)
 
     route_info_dump = {'scaf_to_edge': scaf_to_edge,
                        'scaf_seq': scaf_seq,
@@ -235,29 +307,51 @@ def DX_cage_design(coordinates, edges, faces, edge_length_vec, file_name,
                        'coordinates': coordinates,
                        'edges': edges,
                        'faces': faces,
-                       'edge_length_vec': edge_length_vec}
+                       'edge_length_vec': edge_length_vec,
+                       # Enough to resequence the design with another
+                       # scaffold, see resequence.py
+                       'staples': staples,
+                       'file_name': file_name,
+                       'staple_name': staple_name,
+                       'scaf_name': scaf_name,
+                       'singleXOs': singleXOs,
+                       'Aform': Aform,
+                       'len_scaf_used': len_scaf_used}
     route_info_dump_filename = 'routeInfo_' + full_file_name + '.pickle'
     full_route_info_filename = path.join(results_foldername,
                                          route_info_dump_filename)
-    pickle.dump(route_info_dump, open(full_route_info_filename, 'wb'))
+    if 'route_info_pickle' in artifacts:
+        with open(full_route_info_filename, 'wb') as f:
+            pickle.dump(route_info_dump, f)
+        timer.add_bytes(full_route_info_filename)
 
     # as cando file
     cando_filename = full_file_name + '.cndo'
     full_cando_filename = path.join(results_foldername, cando_filename)
-    dnaInfo.save_dna_info_to_cando_file(full_cando_filename)
+    if 'cndo' in artifacts:
+        dnaInfo.save_dna_info_to_cando_file(full_cando_filename)
+        timer.add_bytes(full_cando_filename)
 
     # And also save staple sequences
     if scaf_name == 'fake_scaf':  # if fake scaffold,
         if print_to_console:
             print('No real staples\n')  # do not save staple sequences
-    else:
+    elif 'staples_csv' in artifacts:
         if print_to_console:
             print('Real staples\n')
         csv_staples(full_file_name, named_stap_seq_list, results_foldername)
+        timer.add_bytes(path.join(results_foldername,
+                                  'staples_' + full_file_name + '.csv'))
 
     seq_filename = path.join(results_foldername,
                              'seq_{}.txt'.format(full_file_name))
-    seqtoText(scaf_to_edge, edges, dnaInfo, file_name, scaf_name,
-              singleXOs, seq_filename, Aform)
-
+    if 'seq_text' in artifacts:
+        seqtoText(scaf_to_edge, edges, dnaInfo, file_name, scaf_name,
+                  singleXOs, seq_filename, Aform)
+        timer.add_bytes(seq_filename)
+    timer.record(nucleotides=len(dnaInfo.dnaTop))
+    timer.stop()
+
+    if return_dna_info:
+        return full_file_name, dnaInfo
     return full_file_name
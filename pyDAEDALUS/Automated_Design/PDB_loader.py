@@ -282,3 +282,91 @@ class c_arna(object):
         self.Gscaf=np.asarray(GscafT,dtype=object);
         self.Cstap=np.asarray(CstapT,dtype=object);
         return self.Gscaf, self.Cstap
+
+
+# Registry of reference residue templates
+
+class c_reftemplate(object):
+
+    def __init__(self, refbase):
+
+        """
+        Reference residue template, as used to build every residue of one
+        form, base and strand.
+
+        Parameters
+        ----------
+        refbase:
+            Rows of {atom name, chain, residue number, x, y, z}, such as
+            c_bdna().Ascaf
+
+        Returns
+        -------
+        reftemplate:
+            crds = Nx3 contiguous float64 array of atom coordinates
+            atoms = list of N atom names
+            elements = list of N element symbols, taken from the atom names
+                       as in the PDB atom name columns
+        """
+
+        self.crds = np.ascontiguousarray(
+            np.asarray(refbase[:,3:6], dtype=float))
+        self.atoms = [str(atom) for atom in refbase[:,0]]
+        self.elements = []
+        for atom in self.atoms:
+            if len(atom) == 1:
+                self.elements.append(atom)
+            elif len(atom) == 4:
+                self.elements.append(atom[1])
+            else:
+                self.elements.append(atom[0])
+
+
+# Reference structure classes of each helical form
+reftypes = {'B-DNA': c_bdna, 'A-DNA': c_adna, 'A-RNA': c_arna}
+
+# Base paired with each base, for DNA and RNA
+refcomplements = {'DNA': {'A': 'T', 'C': 'G', 'G': 'C', 'T': 'A'},
+                  'RNA': {'A': 'U', 'C': 'G', 'G': 'C', 'U': 'A'}}
+
+# Templates loaded so far in this process
+reftemplates = {}
+
+def get_reftemplate(form, base, strand):
+
+    """
+    Returns the reference residue template for one form, base and strand,
+    loading it on first use.  Only the base pair that holds it is parsed, so
+    forms and bases that are never used are never loaded.
+
+    Parameters
+    ----------
+    form:
+        'B-DNA', 'A-DNA' or 'A-RNA'
+    base:
+        'A', 'C', 'G', and 'T' for DNA or 'U' for RNA
+    strand:
+        'scaf' or 'stap'
+
+    Returns
+    -------
+    reftemplate:
+        c_reftemplate, or None if there is no such template
+    """
+
+    key = (form, base, strand)
+    if key not in reftemplates:
+        natype = form.split('-')[-1]
+        if form not in reftypes or base not in refcomplements[natype]:
+            return None
+        # Each base pair method sets both of its strands, e.g. AAA() sets
+        # Ascaf and Tstap, so load the one named after the scaffold base
+        if strand == 'scaf':
+            scafbase = base
+        else:
+            scafbase = refcomplements[natype][base]
+        refdna = reftypes[form].__new__(reftypes[form])
+        getattr(refdna, scafbase * 3)()
+        reftemplates[key] = c_reftemplate(getattr(refdna, base + strand))
+
+    return reftemplates[key]
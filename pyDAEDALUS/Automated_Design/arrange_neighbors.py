@@ -1,25 +1,18 @@
-def arrange_neighbors(edge_type_mat_allNodes, pseudo_vert, vert_ID, neighbors,
-                      vert_to_face, face_assign):
+def arrange_neighbors(edge_type_mat_allNodes, vert_ID, vert_to_face):
     """
     Identifies which neighboring vertices share faces (which neighbors are
     adjacent and adds N nodes at the vertex to route the scaffold around the
     vertex vert_ID accordingly, where N is the degree of the vertex vert_ID.
-    Inputs: edge_type_mat_wHalfs = VxV sparse matrix where
+    Inputs: edge_type_mat_allNodes = RoutingGraph where
      -1 is half of a non-spanning tree edge (one side of scaffold crossover)
       2 is spanning tree edge: DX edge with 0 scaffold crossovers
-            pseudo_vert = row vector where value j at index i indicate that
-               vertex i corresponds to vertex j, one of the V real vertices
+               Its pseudo_vert holds the real vertex of each pseudo-vertex,
+               and its face the face_ID of pseudo-vertices added here.
             vert_ID = ID of the central vertex that neighbors surround
-            neighbors = Vx1 column vector of vertices neighboring vert_ID
-               0 indicates not a neighbor, nonzero value indicates neighbor
             vert_to_face = Vx1 cell array, each row has a row vector listing
                 the face IDs the particular vertex belongs to
-            face_assign = vector that stores face_ID of pseudo-vertices
-    Outputs: edge_type_mat_allNodes = VxV sparse matrix where
-     -1 is half of a non-spanning tree edge (one side of scaffold crossover)
-      2 is spanning tree edge: DX edge with 0 scaffold crossovers
-           pseudo_vert = updated to include new pseudo-vertices
-           face_assign = vector that stores face_ID of pseudo-vertices
+    The new pseudo-vertices are added to edge_type_mat_allNodes, and vert_ID
+    is disconnected from it.
     ##########################################################################
     by Sakul Ratanalert, MIT, Bathe Lab, 2016
 
@@ -30,7 +23,16 @@ def arrange_neighbors(edge_type_mat_allNodes, pseudo_vert, vert_ID, neighbors,
     ##########################################################################
     """
 
-    n_rows, dontcare, n_vals = zip(*neighbors)  # n for neighbors
+    graph = edge_type_mat_allNodes
+    NO_FACE = graph.NO_FACE
+    neighbors = graph.vertex_links[vert_ID]
+    n_rows = [neighbor for neighbor, _ in neighbors]  # n for neighbors
+    n_vals = [link_type for _, link_type in neighbors]
+
+    # Remove/disconnect vert_ID from edge_type_mat_allNodes, the real vertex
+    # is no longer needed to route, having been replaced by pseudo-vertices.
+    # Done first, to free the links of neighbors for the new pseudo-vertices.
+    graph.disconnect_vertex(vert_ID)
 
     # # Identify degree of vertex vert_ID, number of vertices connected to
     # # central vertex. This includes pseudo-vertices, so degree may be > N
@@ -43,7 +45,7 @@ def arrange_neighbors(edge_type_mat_allNodes, pseudo_vert, vert_ID, neighbors,
         # # Find neighbor 1 info
         neighbor_1 = n_rows[row_ID1]  # extract ID of neighbor
         val_1 = n_vals[row_ID1]  # extract edge type connecting to neighbor
-        face_1 = face_assign[neighbor_1]  # designated face, if assigned
+        face_1 = graph.face.item(neighbor_1)  # designated face, if assigned
 
         list_b = range(row_ID1 + 1, degree)
         for row_ID2 in list_b:
@@ -51,17 +53,18 @@ def arrange_neighbors(edge_type_mat_allNodes, pseudo_vert, vert_ID, neighbors,
             # # Find neighbor info
             neighbor_2 = n_rows[row_ID2]  # extract ID of neighbor
             val_2 = n_vals[row_ID2]  # extract edge type connecting to neighbor
-            face_2 = face_assign[neighbor_2]  # designated face, if assigned
+            face_2 = graph.face.item(neighbor_2)  # designated face, if any
 
             # # If these potential neighbors do not share the same real vertex,
             # # i.e. are not the same vertex with different pseudo-vert names
             # # And if this pair hasn't already been checked
-            if pseudo_vert[neighbor_1] != pseudo_vert[neighbor_2]:
+            if graph.pseudo_vert.item(neighbor_1) != \
+                    graph.pseudo_vert.item(neighbor_2):
                 # # If these potential neighbors share a face with vert_ID and
                 # # each other, then they are neighbors
                 v2f_vert_ID = vert_to_face[vert_ID]
-                v2f_n1 = vert_to_face[pseudo_vert[neighbor_1]]
-                v2f_n2 = vert_to_face[pseudo_vert[neighbor_2]]
+                v2f_n1 = vert_to_face[graph.pseudo_vert.item(neighbor_1)]
+                v2f_n2 = vert_to_face[graph.pseudo_vert.item(neighbor_2)]
 
                 shared_neighbor = set(v2f_vert_ID)\
                     .intersection(set(v2f_n1))\
@@ -78,33 +81,13 @@ def arrange_neighbors(edge_type_mat_allNodes, pseudo_vert, vert_ID, neighbors,
                     # # match, otherwise don't add node
                     #  if face_1 == face_2 == face_3, but
                     # allowing for empty face_1 or face_2:
-                    if (face_1 == None or face_1 == face_3) and \
-                            (face_2 == None or face_2 == face_3):  # noqa: E711
+                    if (face_1 == NO_FACE or face_1 == face_3) and \
+                            (face_2 == NO_FACE or face_2 == face_3):
 
-                        # # Create a new node and store in pseudo_vert
-                        new_node_id = len(pseudo_vert)  # create a new node
-                        edge_type_mat_allNodes.add_node(new_node_id)
-                        pseudo_vert.append(vert_ID)  # store in pseudo_vert
+                        # # Create a new node, stored in pseudo_vert and
+                        # # face_assign
+                        new_node_id = graph.add_node(vert_ID, face_3)
 
                         # Incorporate new node into edge_type_mat_allNodes
-                        edge_type_mat_allNodes.add_edge(
-                            neighbor_1, new_node_id, attr_dict=val_1)
-                        edge_type_mat_allNodes.add_edge(
-                            new_node_id, neighbor_1, attr_dict=val_1)
-                        edge_type_mat_allNodes.add_edge(
-                            new_node_id, neighbor_2, attr_dict=val_2)
-                        edge_type_mat_allNodes.add_edge(
-                            neighbor_2, new_node_id, attr_dict=val_2)
-
-                        # # Store in face_assign
-                        face_assign.append(face_3)
-
-    # Remove/disconnect vert_ID from edge_type_mat_allNodes, the real vertex
-    # is no longer needed to route, having been replaced by pseudo-vertices
-    edge_type_mat_allNodes.remove_edges_from(
-        edge_type_mat_allNodes.in_edges(vert_ID))
-    edge_type_mat_allNodes.remove_edges_from(
-        edge_type_mat_allNodes.out_edges(vert_ID))
-
-    # TODO: replace pseudo_vert with a property on the node `original_id`?
-    return edge_type_mat_allNodes, pseudo_vert, face_assign
+                        graph.add_link(neighbor_1, new_node_id, val_1)
+                        graph.add_link(new_node_id, neighbor_2, val_2)
@@ -0,0 +1,253 @@
+import numpy as np
+
+# Numbers written straight into arrays of ASCII codes, one row per value, so
+# that fixed-width text such as PDB columns is laid out with array operations
+# rather than formatted one value at a time.
+
+# ASCII codes of every run of _CHUNK_WIDTH decimal digits, packed into one
+# uint32 each, so a whole chunk of text is looked up at once.  The leading
+# chunks leave out leading zeros (as 0 bytes), except for the last digit.
+_CHUNK_WIDTH = 4
+_CHUNK_BASE = 10**_CHUNK_WIDTH
+_DIGIT_CHUNKS = np.frombuffer(
+    ''.join(['%0*d' % (_CHUNK_WIDTH, i) for i in range(_CHUNK_BASE)])
+    .encode('ascii'), dtype=np.uint8).view(np.uint32)
+_LEADING_DIGIT_CHUNKS = np.frombuffer(
+    ''.join(['%*d' % (_CHUNK_WIDTH, i) for i in range(_CHUNK_BASE)])
+    .replace(' ', '\0').encode('ascii'), dtype=np.uint8).view(np.uint32)
+
+# Largest magnitude, in units of the last decimal written, up to which every
+# integer is exact as a float, and so is rounded and written exactly
+MAX_EXACT = 2.0**53
+
+# ASCII codes of `None`, as written for unset values
+NONE_CHARS = np.frombuffer(b'None', dtype=np.uint8)
+
+
+def digit_chars(units, num_digits=None):
+    """
+    Writes non-negative integers as ASCII codes, with array operations only.
+
+    Parameters
+    ----------
+    units : numpy.ndarray
+        N-long column of non-negative integers
+    num_digits : int or None
+        If given, every value is written with exactly this many digits,
+        padded with leading zeros.  If None, values are written as with
+        '%d'.
+
+    Returns
+    -------
+    chars
+        NxW uint8 array of ASCII codes, right-aligned and padded on the left
+        with 0, which is not a printable character and should be dropped.
+    """
+    units = np.asarray(units, dtype=np.int64)
+    if num_digits is None:
+        max_unit = int(units.max()) if len(units) else 0
+        num_chunks = -(-len(str(max_unit)) // _CHUNK_WIDTH)
+    else:
+        num_chunks = -(-num_digits // _CHUNK_WIDTH)
+
+    # Digits left to write, in a copy divided in place, in 32 bits when that
+    # is enough as it is quicker
+    if num_chunks * _CHUNK_WIDTH < 10:
+        remaining = units.astype(np.int32)
+    else:
+        remaining = units.copy()
+
+    chunks = np.empty((len(units), num_chunks), dtype=np.uint32)
+    chunk = np.empty_like(remaining)
+    for k in range(num_chunks - 1, -1, -1):
+        if k > 0:
+            np.multiply(remaining // _CHUNK_BASE, _CHUNK_BASE, out=chunk)
+            np.subtract(remaining, chunk, out=chunk)
+            remaining //= _CHUNK_BASE
+        else:
+            chunk = remaining  # all that is left fits in the first chunk
+        if num_digits is not None:
+            chunks[:, k] = _DIGIT_CHUNKS.take(chunk)
+            continue
+
+        # Chunks above the most significant digit are left empty
+        place = _CHUNK_BASE**(num_chunks - 1 - k)
+        is_leading = units < place * _CHUNK_BASE
+        chars = np.where(is_leading, _LEADING_DIGIT_CHUNKS.take(chunk),
+                         _DIGIT_CHUNKS.take(chunk))
+        if place > 1:
+            chars[units < place] = 0
+        chunks[:, k] = chars
+
+    chars = chunks.view(np.uint8)
+    if num_digits is not None:
+        chars = chars[:, chars.shape[1] - num_digits:]
+    return chars
+
+
+def fixed_point_chars(values, precision=None):
+    """
+    Writes a column of numbers as ASCII codes, with array operations only.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        N-long column of numbers
+    precision : int or None
+        Number of decimals, giving the same text as '%.{precision}f'.  If
+        None, values are integers and written as with '%d'.
+        Values times 10**precision must be finite and under MAX_EXACT.
+
+    Returns
+    -------
+    chars
+        List of NxW uint8 arrays of ASCII codes, padded with 0, which put
+        side by side give the text of each value.  See `digit_chars`.
+    """
+    values = np.asarray(values)
+    if not np.all(np.isfinite(values)) or np.any(
+            np.abs(values) * 10.0**(precision or 0) >= MAX_EXACT):
+        raise Exception("Can't write values this large as ASCII codes, "
+                        "format them with Python instead")
+    sign = np.where(np.signbit(values), ord('-'), 0).astype(np.uint8)
+    sign = sign[:, np.newaxis]
+
+    if precision is None:
+        return [sign, digit_chars(np.abs(values))]
+
+    scaled = np.abs(values.astype(float)) * 10**precision
+    units = np.floor(scaled + 0.5).astype(np.int64)
+
+    # Rounding `scaled` can go either way when it is this close to a half,
+    # so let Python's correctly rounded formatting decide.
+    frac = scaled - np.floor(scaled)
+    near_half = np.abs(frac - 0.5) < np.maximum(1e-6, scaled * 1e-14)
+    for i in np.flatnonzero(near_half):
+        text = '%.*f' % (precision, abs(values[i]))
+        units[i] = int(text.replace('.', ''))
+
+    if precision == 0:
+        return [sign, digit_chars(units)]
+
+    whole, decimals = units // 10**precision, units % 10**precision
+    point = np.full((len(units), 1), ord('.'), dtype=np.uint8)
+    return [sign, digit_chars(whole), point, digit_chars(decimals, precision)]
+
+
+def fixed_width_chars(values, precision=None, min_width=1):
+    """
+    Writes numbers as ASCII codes, with array operations only, all in
+    fields of one width.  This is quicker than `fixed_point_chars` for many
+    values at once, such as a whole table.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Numbers, of any shape
+    precision : int or None
+        Number of decimals, as for `fixed_point_chars`
+    min_width : int
+        Fields are at least this wide
+
+    Returns
+    -------
+    chars
+        Array of the shape of values plus one axis, of uint8 ASCII codes,
+        right-aligned and padded on the left with 0, which is not a
+        printable character and should be dropped.  Signs are in the first
+        column.
+    """
+    values = np.asarray(values)
+    shape = values.shape
+    values = values.ravel()
+    magnitudes = np.abs(values)
+    max_scaled = magnitudes.max() * 10.0**(precision or 0) if len(values) \
+        else 0
+    if not max_scaled < MAX_EXACT:  # also for NaN
+        raise Exception("Can't write values this large as ASCII codes, "
+                        "format them with Python instead")
+
+    if precision is None:
+        units = magnitudes.astype(np.int64, copy=False)
+        is_negative = values < 0
+        num_decimals = 0
+    else:
+        scaled = magnitudes * 10.0**precision
+        units = np.rint(scaled)
+        if max_scaled * 1e-14 > 1e-6:
+            tolerance = 0.5 - scaled * 1e-14
+        else:
+            tolerance = 0.5 - 1e-6
+        # Rounding can go either way when this close to a half, so let
+        # Python's correctly rounded formatting decide.
+        rounding = np.abs(np.subtract(units, scaled, out=scaled), out=scaled)
+        near_half = rounding > tolerance
+        units = units.astype(np.int64)
+        for i in np.flatnonzero(near_half):
+            text = '%.*f' % (precision, abs(values[i]))
+            units[i] = int(text.replace('.', ''))
+        is_negative = np.signbit(values)
+        num_decimals = precision
+
+    # All digits, with at least one before the point
+    max_unit = int(units.max()) if len(units) else 0
+    num_digits = max(len(str(max_unit)), num_decimals + 1)
+    num_whole = num_digits - num_decimals
+    digits = digit_chars(units, num_digits)
+
+    has_sign = bool(is_negative.any())
+    width = max(has_sign + num_digits + (num_decimals > 0), min_width)
+    pad = width - num_digits - (num_decimals > 0)
+    chars = np.zeros((len(values), width), dtype=np.uint8)
+    if num_decimals:
+        chars[:, -num_decimals - 1] = ord('.')
+        chars[:, -num_decimals:] = digits[:, num_whole:]
+
+    # Whole digits, with leading zeros left out but for the last.  The sign
+    # goes in the first column, as the 0s between it and the first digit
+    # are dropped anyway.
+    if has_sign:
+        chars[:, 0] = is_negative * np.uint8(ord('-'))
+    for k in range(num_whole - 1):
+        is_written = units >= 10**(num_digits - 1 - k)
+        chars[:, pad + k] = is_written * digits[:, k]
+    chars[:, pad + num_whole - 1] = digits[:, num_whole - 1]
+
+    return chars.reshape(shape + (width,))
+
+
+def csv_rows_text(fields):
+    """
+    Puts fields of ASCII codes side by side as comma separated rows of text.
+
+    Parameters
+    ----------
+    fields : list
+        NxW uint8 arrays, or NxCxW for C fields of the same width, in the
+        order they appear in each row.  0 codes are dropped.
+
+    Returns
+    -------
+    str
+        All rows, each ending in a newline
+    """
+    fields = [field[:, np.newaxis, :] if field.ndim == 2 else field
+              for field in fields]
+    num_rows = len(fields[0])
+    rows = np.empty((num_rows, sum([field.shape[1] * (field.shape[2] + 1)
+                                    for field in fields])), dtype=np.uint8)
+    start = 0
+    for field in fields:
+        _, num_fields, width = field.shape
+        stop = start + num_fields * (width + 1)
+        separated = rows[:, start:stop].reshape(num_rows, num_fields,
+                                                width + 1)
+        separated[:, :, :-1] = field
+        separated[:, :, -1] = ord(',')
+        start = stop
+    rows[:, -1] = ord('\n')
+
+    text = rows.tobytes().translate(None, b'\0')
+    if not isinstance(text, str):
+        text = text.decode('ascii')
+    return text
@@ -1,4 +1,4 @@
-from Automated_Design.util import intersect_lists, find
+import numpy as np
 
 
 def assign_scaf_to_edge(edges, num_edges, edge_type_mat, edge_bgn_vec,
@@ -31,6 +31,11 @@ def assign_scaf_to_edge(edges, num_edges, edge_type_mat, edge_bgn_vec,
     ###########################################################################
     """
 
+    # Sorting once by (bgn, fin, type) puts the bases of each duplex next to
+    # each other, so each one is a slice of `order` instead of a full scan
+    order, sorted_type, groups = group_scaf_bases(edge_bgn_vec, edge_fin_vec,
+                                                  edge_type_vec)
+
     scaf_to_edge = []
     for edge_ID in range(num_edges):  # TODO: convert to `for edge in edges:`
         # first column low to high, second column high to low
@@ -45,20 +50,65 @@ def assign_scaf_to_edge(edges, num_edges, edge_type_mat, edge_bgn_vec,
                 edge_bgn = edges[edge_ID][1]
                 edge_fin = edges[edge_ID][0]
 
+            start, stop = groups.get((int(edge_bgn), int(edge_fin)), (0, 0))
+            bases_all = order[start:stop]
+            types_all = sorted_type[start:stop]
+
             edge_type = edge_type_mat[edge_bgn][edge_fin]['type']
             if edge_type == 2:  # tree edge  # TODO: extract into constant
-                bases = intersect_lists(find(edge_bgn_vec, edge_bgn),
-                                        find(edge_fin_vec, edge_fin))
+                bases = np.sort(bases_all)
             else:  # non-tree edge
-                bases_all = intersect_lists(find(edge_bgn_vec, edge_bgn),
-                                            find(edge_fin_vec, edge_fin))
-                bases_5 = intersect_lists(bases_all, find(edge_type_vec, -5))
-                bases_3 = intersect_lists(bases_all, find(edge_type_vec, -3))
+                # Within the group, -5 bases come before -3 bases, each in
+                # increasing order
+                bases = bases_all[(types_all == -5) | (types_all == -3)]
 
-                bases = bases_5 + bases_3
-
-            row[col] = bases
+            row[col] = bases.tolist()
 
         scaf_to_edge.append(row)
 
     return scaf_to_edge
+
+
+def group_scaf_bases(edge_bgn_vec, edge_fin_vec, edge_type_vec):
+    """
+    Groups scaffold bases by the (edge_bgn, edge_fin) duplex they lie on.
+
+    Parameters
+    ----------
+    edge_bgn_vec, edge_fin_vec, edge_type_vec :
+        row vectors of scaffold base information, as returned by
+        `enum_scaf_bases`
+
+    Returns
+    -------
+    order
+        array of scaffold base IDs, sorted by (bgn, fin, type) and then by
+        base ID
+    sorted_type
+        edge_type_vec in the order of `order`
+    groups
+        dict mapping (edge_bgn, edge_fin) to the (start, stop) slice of
+        `order` holding the bases on that duplex
+    """
+    edge_bgn_vec = np.asarray(edge_bgn_vec)
+    edge_fin_vec = np.asarray(edge_fin_vec)
+    edge_type_vec = np.asarray(edge_type_vec)
+    num_bases = len(edge_type_vec)
+
+    # lexsort is stable, so base IDs stay increasing within each group
+    order = np.lexsort((edge_type_vec, edge_fin_vec, edge_bgn_vec))
+    sorted_bgn = edge_bgn_vec[order]
+    sorted_fin = edge_fin_vec[order]
+    sorted_type = edge_type_vec[order]
+
+    is_group_start = np.ones(num_bases, dtype=bool)
+    is_group_start[1:] = (sorted_bgn[1:] != sorted_bgn[:-1]) | \
+        (sorted_fin[1:] != sorted_fin[:-1])
+    starts = np.flatnonzero(is_group_start)
+    stops = np.append(starts[1:], num_bases)
+
+    groups = dict(zip(zip(sorted_bgn[starts].tolist(),
+                          sorted_fin[starts].tolist()),
+                      zip(starts.tolist(), stops.tolist())))
+
+    return order, sorted_type, groups
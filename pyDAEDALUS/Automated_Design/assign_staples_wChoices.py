@@ -406,30 +406,38 @@ def assign_staples_wChoices(edges, num_edges, edge_type_mat, scaf_to_edge,
 
     # # A-form: Join 11 and 11 staples with polyT to make 11+5+11 = 27 nt fragments
     # # B-form: Join 11 and 10 staples with polyT to make 11+5+10 = 26 nt fragments
+    # Index the len 10 staples by the scaffold base at their 5' end, so the
+    # one following each len 11 staple is a single lookup.
+    ten_Vstap_by_five_prime_end = {}
+    for other_edge_ID in range(num_edges):
+        for ten_Vstap_ID in [0, 2]:  # len 10 staples
+            this_ten_Vstaple = staples[other_edge_ID][ten_Vstap_ID]
+            if this_ten_Vstaple:  # if it is not empty
+                five_prime_end = int(this_ten_Vstaple[0])
+                ten_Vstap_by_five_prime_end[five_prime_end] = \
+                    (other_edge_ID, ten_Vstap_ID)
+
     for edge_ID in range(len(staples)):
         for elev_Vstap_ID in [1, 3]:  # len 11 staples
             this_eleven_Vstap = staples[edge_ID][elev_Vstap_ID]
             three_prime_end = this_eleven_Vstap[-1]
-            for other_edge_ID in range(num_edges):
-                for ten_Vstap_ID in [0, 2]:  # len 10 staples
-                    this_ten_Vstaple = staples[other_edge_ID][ten_Vstap_ID]
-                    if this_ten_Vstaple:  # if it is not empty
-
-                        five_prime_end = this_ten_Vstaple[0]
-                        thing = int(three_prime_end) - int(five_prime_end)
-                        they_are_consecutive = thing == 1
-                        they_wrap_around = (three_prime_end == 0) and \
-                            five_prime_end == (num_bases - 1)
-                        if they_are_consecutive or they_wrap_around:
-                            # Concatenate with len_polyT `None`s in between
-                            fill = [None] * len_polyT
-                            staples[edge_ID][elev_Vstap_ID] = \
-                                this_eleven_Vstap + fill + this_ten_Vstaple
-
-                            # Change five_prime_end staple to indicate where
-                            # piece went, using - to make it not a real ID
-                            staples[other_edge_ID][ten_Vstap_ID] = \
-                                [-edge_ID, -elev_Vstap_ID]
+
+            # Consecutive bases, wrapping around from 0 to num_bases - 1
+            five_prime_end = (int(three_prime_end) - 1) % num_bases
+            if five_prime_end in ten_Vstap_by_five_prime_end:
+                other_edge_ID, ten_Vstap_ID = \
+                    ten_Vstap_by_five_prime_end.pop(five_prime_end)
+                this_ten_Vstaple = staples[other_edge_ID][ten_Vstap_ID]
+
+                # Concatenate with len_polyT `None`s in between
+                fill = [None] * len_polyT
+                staples[edge_ID][elev_Vstap_ID] = \
+                    this_eleven_Vstap + fill + this_ten_Vstaple
+
+                # Change five_prime_end staple to indicate where
+                # piece went, using - to make it not a real ID
+                staples[other_edge_ID][ten_Vstap_ID] = \
+                    [-edge_ID, -elev_Vstap_ID]
 
     # Group vertex staple fragments int 52 nt (4 domains)
     # and 78 nt (6 domains) staples:
@@ -1,27 +1,166 @@
-from networkx.algorithms.mst import prim_mst
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import breadth_first_order, minimum_spanning_tree
 
+# Ways of picking the spanning tree, see spanning_tree.  The tree decides
+# which edges get a scaffold crossover, so each gives a different routing.
+tree_strategies = ('bfs', 'unweighted', 'length', 'random')
 
-def designate_edge_type(full_graph):
+
+def neighbor_matrix(neighbor_lists):
+    """
+    Sparse matrix whose row i holds the neighbors of vertex i, in the order
+    of neighbor_lists[i], which is the order breadth first search visits
+    them in.
+    """
+    num_vert = len(neighbor_lists)
+    indptr = np.zeros(num_vert + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(neighbors) for neighbors in neighbor_lists])
+    indices = np.array([neighbor for neighbors in neighbor_lists
+                        for neighbor in neighbors], dtype=np.int64)
+    return sparse.csr_matrix((np.ones(len(indices)), indices, indptr),
+                             shape=(num_vert, num_vert))
+
+
+def _edge_keys(edges, num_vert):
+    # One number per undirected edge, the same either way round
+    low = np.minimum(edges[:, 0], edges[:, 1])
+    high = np.maximum(edges[:, 0], edges[:, 1])
+    return low * num_vert + high
+
+
+def _bfs_tree(num_vert, edges, root, neighbors):
+    if neighbors is None:
+        neighbors = sparse.csr_matrix(
+            (np.ones(2 * len(edges)),
+             (np.concatenate((edges[:, 0], edges[:, 1])),
+              np.concatenate((edges[:, 1], edges[:, 0])))),
+            shape=(num_vert, num_vert))
+        neighbors.sort_indices()
+
+    # Search from the root, then from the lowest vertex not yet reached, until
+    # all are reached
+    parents = -np.ones(num_vert, dtype=np.int64)
+    reached = np.zeros(num_vert, dtype=bool)
+    start = root
+    while True:
+        order, predecessors = breadth_first_order(
+            neighbors, start, directed=True, return_predecessors=True)
+        reached[order] = True
+        parents[order[1:]] = predecessors[order[1:]]
+        unreached = np.flatnonzero(~reached)
+        if not len(unreached):
+            break
+        start = unreached[0]
+
+    # Each vertex but the roots joins the tree by the edge to its parent
+    keys = _edge_keys(edges, num_vert)
+    edge_order = np.argsort(keys)
+    children = np.flatnonzero(parents >= 0)
+    tree_keys = _edge_keys(np.column_stack((parents[children], children)),
+                           num_vert)
+    is_tree_edge = np.zeros(len(edges), dtype=bool)
+    is_tree_edge[edge_order[np.searchsorted(keys[edge_order],
+                                            tree_keys)]] = True
+    return is_tree_edge
+
+
+def spanning_tree(num_vert, edges, strategy='bfs', lengths=None, root=0,
+                  seed=None, neighbors=None):
     """
-    Calculate minimum spanning tree, and label the links in the full graph
-    that are also in the min spanning tree as such:
+    Picks a spanning tree of a graph, or a spanning forest if it is not
+    connected.
+
+    Parameters
+    ----------
+    num_vert : int
+        Number of vertices
+    edges : array
+        Ex2 array of the vertex IDs of each edge
+    strategy : str
+        'bfs': breadth first search from `root`.  Each vertex joins the tree
+        by its edge to the first vertex reached next to it.  This is the tree
+        networkx's prim_mst finds when edges have no weights, which DAEDALUS
+        has always used.
+        'unweighted': Kruskal's algorithm, taking edges in their order in
+        `edges`.
+        'length': the tree of shortest total length, ties broken by the order
+        of edges.
+        'random': Kruskal's algorithm, taking edges in a random order drawn
+        from `seed`.
+    lengths : array, optional
+        Length of each edge, needed for 'length'
+    root : int, optional
+        Vertex 'bfs' searches from.  Vertices it does not reach are searched
+        from next, lowest ID first.
+    seed : int, optional
+        Seed of the random order of edges for 'random'
+    neighbors : sparse matrix, optional
+        For 'bfs', VxV matrix whose row i holds the neighbors of vertex i in
+        the order they are visited, see neighbor_matrix.  Lowest ID first if
+        None.
+
+    Returns
+    -------
+    is_tree_edge
+        Boolean array, True for each edge in the tree
+    """
+    if strategy not in tree_strategies:
+        raise Exception("Unknown spanning tree strategy '{}', expected one of "
+                        "{}".format(strategy, list(tree_strategies)))
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    num_edges = len(edges)
+    if strategy == 'bfs':
+        if not 0 <= root < num_vert:
+            raise Exception('Spanning tree root {} is not one of the {} '
+                            'vertices'.format(root, num_vert))
+        return _bfs_tree(num_vert, edges, root, neighbors)
+
+    if strategy == 'unweighted':
+        order = np.arange(num_edges)
+    elif strategy == 'length':
+        if lengths is None:
+            raise Exception("The 'length' spanning tree strategy needs the "
+                            "lengths of the edges")
+        order = np.argsort(lengths, kind='mergesort')
+    else:
+        order = np.random.RandomState(seed).permutation(num_edges)
+
+    # Weighting the edges 1, 2, 3, ... in the order they are taken makes the
+    # minimum spanning tree the one Kruskal's algorithm finds in that order
+    weights = np.empty(num_edges)
+    weights[order] = np.arange(1, num_edges + 1)
+    graph = sparse.csr_matrix(
+        (weights, (np.minimum(edges[:, 0], edges[:, 1]),
+                   np.maximum(edges[:, 0], edges[:, 1]))),
+        shape=(num_vert, num_vert))
+    tree = minimum_spanning_tree(graph).tocoo()
+    is_tree_edge = np.zeros(num_edges, dtype=bool)
+    is_tree_edge[order[tree.data.astype(np.int64) - 1]] = True
+    return is_tree_edge
+
+
+def designate_edge_type(full_graph, strategy='bfs', root=0, seed=None):
+    """
+    Calculate a spanning tree, see spanning_tree for the strategies, and label
+    the links in the full graph that are also in the spanning tree as such:
         1 is non-spanning tree edge: DX edge with 1 scaffold crossover
         2 is spanning tree edge: DX edge with 0 scaffold crossovers
     """
-    tree = prim_mst(full_graph)
-
-    # networkx undirected networks already implicitly can be considered a
-    # symmetrical matrix
-    full_tree = tree
-
-    tree_edges = full_tree.edges()
-    for edge in full_graph.edges():
-        if edge in tree_edges:
-            type = 2
-        else:
-            type = 1
-        i = edge[0]
-        j = edge[1]
-        full_graph[i][j]['type'] = type
+    num_vert = full_graph.number_of_nodes()
+    edge_data = full_graph.edges(data=True)
+    edges = np.array([(i, j) for i, j, _ in edge_data],
+                     dtype=np.int64).reshape(-1, 2)
+    lengths = np.array([data.get('length', 1.0) for _, _, data in edge_data])
+
+    # Search neighbors in the order the graph holds them, as prim_mst did, so
+    # that the default tree stays the same
+    neighbors = neighbor_matrix([list(full_graph.adj[vertex])
+                                 for vertex in range(num_vert)])
+    is_tree_edge = spanning_tree(num_vert, edges, strategy, lengths, root,
+                                 seed, neighbors)
+
+    for (i, j), is_tree in zip(edges.tolist(), is_tree_edge):
+        full_graph[i][j]['type'] = 2 if is_tree else 1
 
     return full_graph
@@ -4,6 +4,8 @@ from copy import deepcopy
 import mpmath
 import numpy as np
 
+from Automated_Design.ascii_columns import MAX_EXACT, NONE_CHARS, \
+    csv_rows_text, fixed_width_chars
 from Automated_Design.constants import VERMILLION, REDPURPLE, WHITE, BLU, ORANG
 from Automated_Design.util import intersect_lists
 
@@ -53,6 +55,94 @@ class DnaTop(object):
         return self.__str__()
 
 
+class DnaTopology(object):
+    """
+    Topology of every nucleotide in a design, with one array per field.
+
+    Indexing returns a `DnaTopologyView` of one nucleotide, so
+    `dnaTop[i].across` works the same as on a list of `DnaTop` objects.
+    Fields that were never set read back as None.
+    """
+    UNSET = -2  # ids, up, down and across are all >= -1 once set
+
+    def __init__(self, num_nt):
+        self.id = np.full(num_nt, self.UNSET, dtype=np.int32)
+        self.up = np.full(num_nt, self.UNSET, dtype=np.int32)
+        self.down = np.full(num_nt, self.UNSET, dtype=np.int32)
+        self.across = np.full(num_nt, self.UNSET, dtype=np.int32)
+        self.seq = np.zeros(num_nt, dtype=np.uint8)  # ASCII code, 0 if unset
+
+    def set_seq(self, nt_IDs, seq):
+        """Sets the bases of `nt_IDs` from a string of the same length."""
+        self.seq[nt_IDs] = np.frombuffer(
+            ''.join(seq).upper().encode('ascii'), dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.id)
+
+    def __getitem__(self, nt_ID):
+        if nt_ID < 0:
+            nt_ID += len(self)
+        if not 0 <= nt_ID < len(self):
+            raise IndexError("nucleotide index out of range")
+        return DnaTopologyView(self, nt_ID)
+
+    def __iter__(self):
+        for nt_ID in range(len(self)):
+            yield DnaTopologyView(self, nt_ID)
+
+    @classmethod
+    def from_dna_tops(cls, dna_tops):
+        """
+        Builds a DnaTopology from a list of `DnaTop` objects, as stored in
+        dnaInfo pickles from before DnaTopology existed.
+        """
+        topology = cls(len(dna_tops))
+        for nt_ID, dna_top in enumerate(dna_tops):
+            view = topology[nt_ID]
+            for field in ['id', 'up', 'down', 'across', 'seq']:
+                setattr(view, field, getattr(dna_top, field))
+        return topology
+
+
+def _topology_field(name):
+    def fget(self):
+        value = getattr(self._topology, name)[self._nt_ID]
+        return None if value == DnaTopology.UNSET else int(value)
+
+    def fset(self, value):
+        if value is None:
+            value = DnaTopology.UNSET
+        getattr(self._topology, name)[self._nt_ID] = value
+
+    return property(fget, fset)
+
+
+class DnaTopologyView(DnaTop):
+    """
+    A single nucleotide of a `DnaTopology`, with the same attributes as
+    `DnaTop`.  Reads and writes go straight to the underlying arrays.
+    """
+
+    def __init__(self, topology, nt_ID):
+        self._topology = topology
+        self._nt_ID = nt_ID
+
+    id = _topology_field('id')
+    up = _topology_field('up')
+    down = _topology_field('down')
+    across = _topology_field('across')
+
+    @property
+    def seq(self):
+        value = self._topology.seq[self._nt_ID]
+        return chr(value) if value else None
+
+    @seq.setter
+    def seq(self, value):
+        self._topology.seq[self._nt_ID] = ord(value) if value else 0
+
+
 def calc_buff(faces, num_vert, coordinates, d, wDX):
     """
     Calculates buffer distance between edge of DX tile and center of vertex.
@@ -189,16 +279,97 @@ def gen_FE_norms(coordinates, faces, edges, vert_to_face):
     return edge_norms
 
 
-def tensor_product(a, b):
+def gen_helix_frames(coord_bgn, coord_fin, buff_bgn, buff_fin, edge_norms,
+                     len_edges, scaf_nick_pos, IHD, Aform=False):
     """
-    Assume a 1 dimensional vector of length n you want to mulply with
-    itself to get an (n,n) shaped matrix.
+    Calculates the axis position and triad of every base pair on a batch of
+    duplexes.
+
+    Each duplex runs from `coord_bgn` to `coord_fin`, offset by half the
+    inter-helical distance to its side of the DX tile.  Its base pairs are
+    turned about the duplex axis by a Rodrigues rotation, either over the
+    whole duplex, or in two segments split at `scaf_nick_pos` if that is
+    positive.
+
+    Parameters
+    ----------
+    coord_bgn, coord_fin : numpy.ndarray
+        Dx3 arrays of the coordinates of the vertices each duplex begins and
+        finishes at, D = number of duplexes
+    buff_bgn, buff_fin : numpy.ndarray
+        D-long arrays of vertex buffers, in nucleotides, at each end
+    edge_norms : numpy.ndarray
+        Dx3 array of the outward normal of the edge each duplex lies on
+    len_edges : numpy.ndarray
+        D-long array of the number of base pairs on each duplex
+    scaf_nick_pos : numpy.ndarray
+        D-long array of the base pair each duplex is split into two turning
+        segments at, or 0 for a single segment
+    IHD : float
+        inter-helical distance, in angstroms
+    Aform : bool
+        True for A-form helices, False for B-form
+
+    Returns
+    -------
+    d_nodes
+        Nx3 array of base pair positions, N = sum(len_edges), duplex by
+        duplex
+    triads
+        Nx3x3 array of base pair orientations, with the x, y and z axes as
+        columns
     """
-    # a `-1` in numpy array length tells numpy to 'make this dimension be
-    # however long it has to be to fit the data into the rest of the supplied
-    # dimensions.
-    m = a.reshape(1, -1) * b.reshape(-1, 1)
-    return m
+    coord_bgn = np.asarray(coord_bgn, dtype=float)
+    coord_fin = np.asarray(coord_fin, dtype=float)
+    edge_norms = np.asarray(edge_norms, dtype=float)
+    len_edges = np.asarray(len_edges, dtype=int)
+    scaf_nick_pos = np.asarray(scaf_nick_pos, dtype=int)
+
+    # # Per duplex: z-axis along the duplex, y-axis across the DX tile
+    z_axes = coord_fin - coord_bgn
+    z_axes /= np.linalg.norm(z_axes, axis=1)[:, np.newaxis]  # normalize
+    y_axes = np.cross(edge_norms, z_axes)
+    y_axes /= np.linalg.norm(y_axes, axis=1)[:, np.newaxis]  # normalize
+    denominator = (buff_bgn + len_edges + buff_fin).astype(float)
+
+    # # Per base pair: duplex it is on, and its index along that duplex
+    duplex_ID = np.repeat(np.arange(len(len_edges)), len_edges)
+    duplex_start = np.cumsum(len_edges) - len_edges
+    bp_ID = np.arange(len(duplex_ID)) - duplex_start[duplex_ID]
+
+    z_axis = z_axes[duplex_ID]
+    y_axis = y_axes[duplex_ID]
+
+    # 3D position on edge axis, shifted to correct side
+    relative_location = (buff_bgn[duplex_ID] + bp_ID) / \
+        denominator[duplex_ID]
+    relative_location = relative_location[:, np.newaxis]
+    d_nodes = coord_bgn[duplex_ID] * (1 - relative_location) + \
+        coord_fin[duplex_ID] * relative_location + y_axis * IHD / 2
+
+    # # Turn angle, for one segment or for either side of scaf_nick_pos
+    nick = scaf_nick_pos[duplex_ID]
+    is_split = nick > 0
+    before_nick = bp_ID < nick
+    num_nt = np.where(is_split,
+                      np.where(before_nick, nick, len_edges[duplex_ID] - nick),
+                      len_edges[duplex_ID])
+    start_nt = np.where(is_split & ~before_nick, nick, 0)
+    turn_angle = np.where(
+        is_split,
+        DnaInfo.get_turn_angle_for_pos_scaf_nick_pos(num_nt, Aform),
+        DnaInfo.get_turn_angle_for_zero_scaf_nick_pos(num_nt, Aform))
+
+    # # Rodrigues rotation of the y-axis about the z-axis
+    angle = (turn_angle * (bp_ID - start_nt + 0.5))[:, np.newaxis]
+    z_dot_y = np.sum(z_axis * y_axis, axis=1)[:, np.newaxis]
+    y_axis = np.cos(angle) * y_axis + np.sin(angle) * np.cross(z_axis, y_axis) \
+        + (1 - np.cos(angle)) * z_dot_y * z_axis
+    x_axis = np.cross(y_axis, z_axis)  # calculate x-axis
+
+    triads = np.stack([x_axis, y_axis, z_axis], axis=2)
+
+    return d_nodes, triads
 
 
 class DnaInfo(object):
@@ -324,6 +495,13 @@ class DnaInfo(object):
         self.scaled_coordinates = coordinates
 
         # Edges
+        # Each edge has two duplexes, low to high and high to low.  Gather
+        # the per-duplex data for all of them and compute every base pair's
+        # frame in one batch.
+        duplex_bgn = []
+        duplex_fin = []
+        duplex_edge = []
+        scaf_parts = []
         for edge_ID in range(num_edges):  # for each edge
             for low_to_high in [0, 1]:  # for each direction per edge
                 if low_to_high == 0:
@@ -333,163 +511,46 @@ class DnaInfo(object):
                     edge_bgn = edges[edge_ID][0]
                     edge_fin = edges[edge_ID][1]
 
-                # Obtain coordinates of end vertices
-                coord_bgn = coordinates[edge_bgn]
-                coord_fin = coordinates[edge_fin]
-
-                z_axis = (coord_fin - coord_bgn)  # row vector
-                z_axis = z_axis/np.linalg.norm(z_axis)  # normalize
-
-                scaf_part = scaf_to_edge[edge_ID][low_to_high]  # scaff bases
-                len_edge = len(scaf_part)  # length of edge, base pairs
-
-                for bp_ID in range(len_edge):  # for each base pair in edge
-                    numerator = buff_nt[edge_bgn] + bp_ID
-                    denominator = (buff_nt[edge_bgn] + len_edge +
-                                   buff_nt[edge_fin])
-                    relative_location = float(numerator) / denominator
-
-                    axis_pos = coord_bgn*(1-relative_location) + \
-                        coord_fin*relative_location  # 3D position on edge axis
-                    edge_norm = edge_norms[edge_ID]
-
-                    y_axis = np.cross(edge_norm, z_axis)  # row vector
-                    y_axis /= np.linalg.norm(y_axis)  # normalize
-
-                    nt_ID = scaf_part[bp_ID]  # nucleotide id
-                    axis_pos = axis_pos + y_axis*IHD/2  # shift to correct side
-
-                    # Search for scaffold crossover, 4 base pairs per crossover
-                    scaf_nick_pos = 0
-
-                    if bp_ID > 0 and bp_ID < (len_edge-1):
-                        nt_down = scaf_part[bp_ID + 1]
-
-                        # set larger int type in scaf test data to negate
-                        # the need for the following `int()`:
-                        five_prime_side_of_scaff_nick = \
-                            abs(int(nt_down) - nt_ID) > 1
-                        not_scaffold_nick = nt_ID > 1 and nt_ID < n_bp
-                        if five_prime_side_of_scaff_nick and not_scaffold_nick:
-                            scaf_nick_pos = bp_ID
-
-                    x_axis = np.cross(y_axis, z_axis)  # calculate x-axis
-
-                    # Store in dnaGeom
-                    self.dnaGeom.dNode[nt_ID] = axis_pos
-                    self.dnaGeom.triad[:, 0, nt_ID] = x_axis
-                    self.dnaGeom.triad[:, 1, nt_ID] = y_axis
-                    self.dnaGeom.triad[:, 2, nt_ID] = z_axis
-                    self.dnaGeom.id_nt[nt_ID] = [nt_ID, nt_ID + n_bp]
-
-                # tensor product of z, row vector
-                zXz = tensor_product(z_axis, z_axis)
-                assert zXz.shape == (3, 3)
-
-                zX = np.array([
-                        [0,          -z_axis[2],  z_axis[1]],
-                        [z_axis[2],           0, -z_axis[0]],
-                        [-z_axis[1],  z_axis[0],          0]
-                    ])
-
-                if scaf_nick_pos > 0:
-                    for bp_ID in range(scaf_nick_pos):
-                        num_nt = scaf_nick_pos
-                        start_nt = 0
-                        nt_ID = scaf_part[bp_ID]  # nucleotide id
-
-                        turnAngle = self.get_turn_angle_for_pos_scaf_nick_pos(
-                            num_nt, Aform)
+                duplex_bgn.append(edge_bgn)
+                duplex_fin.append(edge_fin)
+                duplex_edge.append(edge_ID)
+                scaf_parts.append(scaf_to_edge[edge_ID][low_to_high])
 
-                        rot_matrix = self.get_rot_matrix(bp_ID, start_nt,
-                                                         turnAngle, zX, zXz)
+        buff_nt = np.array(buff_nt)
+        len_edges = np.array([len(scaf_part) for scaf_part in scaf_parts])
 
-                        prev_triad = self.dnaGeom.triad[:, :, nt_ID]
-                        y_axis = prev_triad[:, 1]
+        # The scaffold crossover search used to reset `scaf_nick_pos` to 0 at
+        # every base pair, so only the last base pair of each duplex decided
+        # it, and that one can never be a crossover.  Every duplex therefore
+        # takes a single turn along its full length.
+        scaf_nick_pos = np.zeros(len(scaf_parts), dtype=int)
 
-                        y_axis = np.inner(rot_matrix, y_axis)
+        d_nodes, triads = gen_helix_frames(
+            coordinates[duplex_bgn], coordinates[duplex_fin],
+            buff_nt[duplex_bgn], buff_nt[duplex_fin],
+            edge_norms[duplex_edge], len_edges, scaf_nick_pos, IHD, Aform)
 
-                        x_axis = np.cross(y_axis, z_axis)  # calculate x-axis
+        # Store in dnaGeom
+        nt_IDs = np.concatenate(scaf_parts).astype(int)  # nucleotide ids
+        self.dnaGeom.dNode[nt_IDs] = d_nodes
+        self.dnaGeom.triad[:, :, nt_IDs] = triads.transpose(1, 2, 0)
+        self.dnaGeom.id_nt[nt_IDs, 0] = nt_IDs
+        self.dnaGeom.id_nt[nt_IDs, 1] = nt_IDs + n_bp
 
-                        # Store in dnaGeom
-                        self.dnaGeom.triad[:, 0, nt_ID] = x_axis
-                        self.dnaGeom.triad[:, 1, nt_ID] = y_axis
-                        self.dnaGeom.triad[:, 2, nt_ID] = z_axis
-
-                    for bp_ID in range(scaf_nick_pos, len_edge):
-                        num_nt = len_edge-scaf_nick_pos
-                        start_nt = scaf_nick_pos
-                        nt_ID = scaf_part[bp_ID]  # nucleotide id
-
-                        turnAngle = self.get_turn_angle_for_pos_scaf_nick_pos(
-                            num_nt, Aform)
-
-                        rot_matrix = self.get_rot_matrix(bp_ID, start_nt,
-                                                         turnAngle, zX, zXz)
-
-                        prev_triad = self.dnaGeom.triad[:, :, nt_ID]
-                        y_axis = prev_triad[:, 1]
-
-                        y_axis = np.inner(rot_matrix, y_axis)
-
-                        x_axis = np.cross(y_axis, z_axis)  # calculate x-axis
-
-                        # Store in dnaGeom
-                        self.dnaGeom.triad[:, 0, nt_ID] = x_axis
-                        self.dnaGeom.triad[:, 1, nt_ID] = y_axis
-                        self.dnaGeom.triad[:, 2, nt_ID] = z_axis
-
-                else:
-                    for bp_ID in range(len_edge):
-                        num_nt = len_edge
-                        start_nt = 0
-                        nt_ID = scaf_part[bp_ID]  # nucleotide id
-
-                        turnAngle = self.get_turn_angle_for_zero_scaf_nick_pos(
-                            num_nt, Aform)  # scalar
-
-                        rot_matrix = self.get_rot_matrix(bp_ID, start_nt,
-                                                         turnAngle, zX, zXz)
-
-                        prev_triad = self.dnaGeom.triad[:, :, nt_ID]
-                        y_axis = prev_triad[:, 1]
-
-                        y_axis = np.inner(rot_matrix, y_axis)
-
-                        x_axis = np.cross(y_axis, z_axis)  # calculate x-axis
-
-                        # Store in dnaGeom
-                        self.dnaGeom.triad[:, 0, nt_ID] = x_axis
-                        self.dnaGeom.triad[:, 1, nt_ID] = y_axis
-                        self.dnaGeom.triad[:, 2, nt_ID] = z_axis
+        # Count polyT nucleotides, so dnaTop can be allocated in one go
+        num_polyT = sum(list(stap).count(None) for stap in stap_list)
 
         # Initialize dnaTop
-        self.dnaTop = []
-
-        for scaf_seq_ID in range(n_bp):
-            # Set id in dnaTop
-            this_id = scaf_seq_ID
-
-            # Set up in dnaTop
-            if scaf_seq_ID == 0:
-                this_up = -1
-            else:
-                this_up = scaf_seq_ID-1
-
-            # Set down in dnaTop
-            if scaf_seq_ID == n_bp - 1:
-                this_down = -1
-            else:
-                this_down = scaf_seq_ID+1
-
-            # Set across in dnaTop
-            this_across = scaf_seq_ID + n_bp
+        self.dnaTop = DnaTopology(2*n_bp + num_polyT)
 
-            # Set seq in dnaTop
-            this_seq = scaf_seq[scaf_seq_ID].upper()
-
-            self.dnaTop.append(
-                DnaTop(this_id, this_up, this_down, this_across, this_seq))
+        # Scaffold:
+        scaf_IDs = np.arange(n_bp)
+        self.dnaTop.id[:n_bp] = scaf_IDs
+        self.dnaTop.up[:n_bp] = scaf_IDs - 1  # first base has no up
+        self.dnaTop.down[:n_bp] = scaf_IDs + 1
+        self.dnaTop.down[n_bp - 1] = -1  # last base has no down
+        self.dnaTop.across[:n_bp] = scaf_IDs + n_bp
+        self.dnaTop.set_seq(scaf_IDs, scaf_seq[:n_bp])
 
         # Staples:
         polyT_ID = 2*n_bp  # initialize polyT counter at end of all paired nts
@@ -497,70 +558,43 @@ class DnaInfo(object):
         for stap_ID in range(num_stap):  # for each staple
             stap = stap_list[stap_ID]
 
-            # IDs: Change polyT from 0 to nonzero and staple to staple + n_bp
-            for stap_base in range(len(stap)):
-                if stap[stap_base] is None:  # part of polyT
-                    stap[stap_base] = polyT_ID  # change from 0 to polyT
-
-                    while not polyT_ID < len(self.dnaTop):
-                        self.dnaTop.append(
-                            DnaTop(None, None, None, None, None))
-
-                    self.dnaTop[polyT_ID].across = -1  # no across
-                    polyT_ID += 1  # increment
-                else:
-                    # new staple base ID:
-                    stap[stap_base] = stap[stap_base] + n_bp
-
-            for stap_base in range(len(stap)):  # for each base in staple
-
-                stap_seq_ID = stap[stap_base]  # ID of staple base
-                while not stap_seq_ID < len(self.dnaTop):
-                    self.dnaTop.append(DnaTop(None, None, None, None, None))
-
-                # Set id in dnaTop
-                self.dnaTop[stap_seq_ID].id = stap_seq_ID
+            # IDs: Change polyT from None to nonzero and staple to
+            # staple + n_bp
+            is_polyT = np.array([stap_base is None for stap_base in stap],
+                                dtype=bool)
+            stap_IDs = np.zeros(len(stap), dtype=np.int64)
+            stap_IDs[~is_polyT] = [stap_base + n_bp for stap_base in stap
+                                   if stap_base is not None]
+            stap_IDs[is_polyT] = polyT_ID + np.arange(np.sum(is_polyT))
+            polyT_ID += np.sum(is_polyT)
 
-                # Set up in dnaTop
-                if stap_base == 0:  # if 5' end
-                    self.dnaTop[stap_seq_ID].up = -1
-                else:
-                    self.dnaTop[stap_seq_ID].up = stap[stap_base-1]
+            # Set id in dnaTop
+            self.dnaTop.id[stap_IDs] = stap_IDs
 
-                # Set down in dnaTop
-                if stap_base == len(stap)-1:  # if 3' end
-                    self.dnaTop[stap_seq_ID].down = -1
-                else:
-                    self.dnaTop[stap_seq_ID].down = stap[stap_base+1]
+            # Set up and down in dnaTop, -1 at 5' and 3' ends
+            self.dnaTop.up[stap_IDs] = np.append(-1, stap_IDs[:-1])
+            self.dnaTop.down[stap_IDs] = np.append(stap_IDs[1:], -1)
 
-                # Set across in dnaTop
-                if self.dnaTop[stap_seq_ID].across is None:  # not in polyT
-                    self.dnaTop[stap_seq_ID].across = stap_seq_ID - n_bp
+            # Set across in dnaTop, no across in polyT
+            self.dnaTop.across[stap_IDs] = np.where(is_polyT, -1,
+                                                    stap_IDs - n_bp)
 
-                # Set upper in dnaTop
-                self.dnaTop[stap_seq_ID].seq = \
-                    stap_seq_list[stap_ID][stap_base].upper()
+            # Set seq in dnaTop
+            self.dnaTop.set_seq(stap_IDs, stap_seq_list[stap_ID])
 
     @staticmethod
     def get_turn_angle_for_zero_scaf_nick_pos(num_nt, Aform=False):
         if Aform: # A-form
-            return 2 * np.pi * int(round(num_nt / 11.0)) / (num_nt + 1)
+            return 2 * np.pi * np.floor(num_nt / 11.0 + 0.5) / (num_nt + 1)
         else: # B-form
-            return 2 * np.pi * int(round(num_nt / 10.5)) / (num_nt + 1)
-
-    @staticmethod
-    def get_rot_matrix(bp_ID, start_nt, turnAngle, zX, zXz):
-        rot_matrix = np.cos(turnAngle * (bp_ID - start_nt + 0.5)) * np.eye(3) \
-                     + np.sin(turnAngle * (bp_ID - start_nt + 0.5)) * zX \
-                     + (1 - np.cos(turnAngle * (bp_ID - start_nt + 0.5))) * zXz
-        return rot_matrix
+            return 2 * np.pi * np.floor(num_nt / 10.5 + 0.5) / (num_nt + 1)
 
     @staticmethod
     def get_turn_angle_for_pos_scaf_nick_pos(num_nt, Aform=False):
         if Aform: # A-form
-            return 2 * np.pi * (int(np.floor(num_nt / 11.0)) + 0.5) / (num_nt + 1)
+            return 2 * np.pi * (np.floor(num_nt / 11.0) + 0.5) / (num_nt + 1)
         else: # B-form
-            return 2 * np.pi * (int(np.floor(num_nt / 10.5)) + 0.5) / (num_nt + 1)
+            return 2 * np.pi * (np.floor(num_nt / 10.5) + 0.5) / (num_nt + 1)
 
     def plot_3d_model(self, filename, scale=1.0):  # pragma: no cover
         """
@@ -639,20 +673,67 @@ class DnaInfo(object):
 
         plt.savefig(filename, bbox_inches='tight', pad_inches=0)
 
-    def save_dna_info_to_cando_file(self, cando_filename):
+    def save_dna_info_to_cando_file(self, cando_filename, precision=None):
         """
         Converts dnaInfo into a CanDo text file format.
         See http://cando-dna-origami.org/cndo-file-converter/ for file format
 
+        Integer fields, and dNode and triad values when written with a
+        fixed precision, are laid out as ASCII codes with array operations
+        (see ascii_columns).  Values written with `str` are formatted with
+        one `%` over a row template repeated for every row.  Each section is
+        written with a single `write`.
+
         WARNING!  While all of the internal bits here are 0-indexed, the
         output file needs to be 1-indexed.
+
+        Parameters
+        ----------
+        cando_filename : str
+            Where the .cndo file will be saved.
+        precision : int or None
+            Number of decimals written for dNode and triad values, as with
+            '%.{precision}f'.  If None, values are written with `str`,
+            exactly as in earlier versions of this file.
         """
 
-        def handle_1_indexing(val):
-            one_indexed = True
-            if one_indexed:
-                val = int(val) + 1 if val >= 0 else val
-            return val
+        def handle_1_indexing(vals):
+            # Shift every non-negative ID by one, leaving -1 (N/A) as is
+            vals = np.asarray(vals)
+            return np.where(vals >= 0, vals + 1, vals).astype(np.int64)
+
+        def format_section(id_column, float_columns):
+            # dNode and triad rows: a 1-indexed ID, then float values.  The
+            # check is also false for NaN.
+            floats = np.column_stack(float_columns)
+            if precision is not None and \
+                    np.abs(floats).max() * 10.0**precision < MAX_EXACT:
+                return csv_rows_text([fixed_width_chars(id_column),
+                                      fixed_width_chars(floats, precision)])
+
+            float_fmt = '%s' if precision is None \
+                else '%.{}f'.format(precision)
+            row_fmt = ','.join(['%d'] + [float_fmt] * floats.shape[1]) + '\n'
+            table = np.empty((len(floats), 1 + floats.shape[1]), dtype=object)
+            table[:, 0] = id_column
+            table[:, 1:] = floats
+            return (row_fmt * len(table)) % tuple(table.ravel().tolist())
+
+        dna_top = self.dnaTop
+        if not isinstance(dna_top, DnaTopology):  # e.g. from an old pickle
+            dna_top = DnaTopology.from_dna_tops(dna_top)
+        top_fields = [dna_top.id, dna_top.up, dna_top.down, dna_top.across]
+
+        d_node = self.dnaGeom.dNode
+        n_bp = len(d_node)
+        bp_column = handle_1_indexing(np.arange(n_bp))
+
+        # triad columns: e1 = triad[:, 0], e2 = triad[:, 1], e3 = triad[:, 2]
+        triad = self.dnaGeom.triad
+        triad_columns = [triad[row, col, :] for col in range(3)
+                         for row in range(3)]
+
+        id_nt = self.dnaGeom.id_nt
 
         fid = open(cando_filename, 'w')
 
@@ -665,50 +746,36 @@ class DnaInfo(object):
 
         # dnaInfo.dnaTop
         fid.write('dnaTop,id,up,down,across,seq\n')
-        for i, topology in enumerate(self.dnaTop):
-            fid.write('{},{},{},{},{},{}\n'.format(
-                handle_1_indexing(i),
-                handle_1_indexing(topology.id),
-                handle_1_indexing(topology.up),
-                handle_1_indexing(topology.down),
-                handle_1_indexing(topology.across),
-                topology.seq))
+        # Unset values are written as `None`, as they always have been
+        top_chars = fixed_width_chars(handle_1_indexing(np.column_stack(
+            [np.arange(len(dna_top))] + top_fields)),
+            min_width=len(NONE_CHARS))
+        top_chars[:, 1:][np.column_stack(top_fields) == DnaTopology.UNSET] = \
+            np.append(np.zeros(top_chars.shape[-1] - len(NONE_CHARS),
+                               dtype=np.uint8), NONE_CHARS)
+        seq_chars = np.zeros((len(dna_top), len(NONE_CHARS)), dtype=np.uint8)
+        seq_chars[:, -1] = dna_top.seq
+        seq_chars[dna_top.seq == 0] = NONE_CHARS
+        fid.write(csv_rows_text([top_chars, seq_chars]))
         fid.write('\n')
 
         # dnaInfo.dnaGeom.dNode
         fid.write('dNode,"e0(1)","e0(2)","e0(3)"\n')
-        for i, node in enumerate(self.dnaGeom.dNode):
-            fid.write('{},{},{},{}\n'.format(
-                handle_1_indexing(i),
-                node[0],
-                node[1],
-                node[2]))
+        fid.write(format_section(bp_column, [d_node[:, k] for k in range(3)]))
         fid.write('\n')
 
         # dnaInfo.dnaGeom.triad
         fid.write('triad,"e1(1)","e1(2)","e1(3)","e2(1)",'
                   '"e2(2)","e2(3)","e3(1)","e3(2)","e3(3)"\n')
-        for i in range(self.dnaGeom.triad.shape[-1]):
-            triad = self.dnaGeom.triad[:, :, i]
-            fid.write('{},{},{},{},{},{},{},{},{},{}\n'.format(
-                handle_1_indexing(i),
-                triad[0, 0],
-                triad[1, 0],
-                triad[2, 0],
-                triad[0, 1],
-                triad[1, 1],
-                triad[2, 1],
-                triad[0, 2],
-                triad[1, 2],
-                triad[2, 2]))
+        fid.write(format_section(
+            handle_1_indexing(np.arange(triad.shape[-1])), triad_columns))
         fid.write('\n')
 
         # dnaInfo.dnaGeom.id_nt
         fid.write('id_nt,id1,id2\n')
-        for i, id_nt in enumerate(self.dnaGeom.id_nt):
-            fid.write('{},{},{}\n'.format(
-                handle_1_indexing(i),
-                handle_1_indexing(id_nt[0]),
-                handle_1_indexing(id_nt[1])))
+        fid.write(csv_rows_text(
+            [fixed_width_chars(np.column_stack(
+                [bp_column, handle_1_indexing(id_nt[:, 0]),
+                 handle_1_indexing(id_nt[:, 1])]))]))
 
         fid.close()
@@ -0,0 +1,141 @@
+import numpy as np
+
+
+# Half-edge length rules for non-spanning tree edges, per form.
+#
+# For each form and helix type (A-form: True, B-form: False), rules are keyed
+# by (quotient is odd, edge length is odd), where the quotient is the edge
+# length divided by the bases per turn (11 for A-form, 10.5 for B-form) and
+# rounded.  Each rule is a pair of half-edge rules, one for the -3 half and
+# one for the -5 half:
+#
+#     (shorter_offset, longer_offset, rounding, shift)
+#
+# The length of a half-edge is then
+#
+#     rounding((len_edge + offset) / 2) + shift
+#
+# where `offset` is `shorter_offset` for the shorter half of the edge and
+# `longer_offset` for the longer half.  The -3 half is the shorter one when
+# edge_bgn > edge_fin, the -5 half is the shorter one when edge_bgn < edge_fin.
+_MIDDLE_CEIL = (0, 0, np.ceil, 0)
+_MIDDLE_FLOOR = (0, 0, np.floor, 0)
+
+_B_FORM_RULES = {
+    # quotient is odd, scaffold crossover in middle
+    (True, True): (_MIDDLE_FLOOR, _MIDDLE_CEIL),
+    (True, False): ((-1, 1, np.floor, 0), (-1, 1, np.ceil, 0)),
+    # quotient is even, scaffold crossover 5/6 bp from middle
+    (False, True): ((-10, 10, np.floor, 0), (-10, 10, np.ceil, 0)),
+    (False, False): ((-11, 11, np.floor, 0), (-11, 11, np.ceil, 0)),
+}
+
+_DX_A_FORM_RULES = {
+    # length parity does not matter for A-form edges
+    (True, True): (_MIDDLE_CEIL, _MIDDLE_FLOOR),
+    (True, False): (_MIDDLE_CEIL, _MIDDLE_FLOOR),
+    (False, True): ((-10, 10, np.floor, 0), (-10, 10, np.ceil, 0)),
+    (False, False): ((-10, 10, np.floor, 0), (-10, 10, np.ceil, 0)),
+}
+
+_TWISTED_A_FORM_RULES = {
+    (True, True): ((0, 0, np.ceil, -2), (0, 0, np.floor, 2)),
+    (True, False): ((0, 0, np.ceil, -2), (0, 0, np.floor, 2)),
+    (False, True): ((-16, 6, np.floor, 0), (-6, 16, np.ceil, 0)),
+    (False, False): ((-16, 6, np.floor, 0), (-6, 16, np.ceil, 0)),
+}
+
+HALF_EDGE_RULES = {
+    'DX': {True: _DX_A_FORM_RULES, False: _B_FORM_RULES},
+    'Hybrid': {True: _DX_A_FORM_RULES, False: _B_FORM_RULES},
+    'Twisted': {True: _TWISTED_A_FORM_RULES, False: _B_FORM_RULES},
+}
+
+
+def enum_scaf_bases(route_real, route_vals, edge_length_mat_full, Aform=False,
+                    form='DX'):
+    """
+    Enumerates scaffold bases for N-arm DX tile-based cages
+    Inputs: route_real = row vector of vertices listed in visitation order
+                (only real vertex IDs)
+             route_vals = row vector of edge types, where the value at index
+                j in route_vals is the edge type of the edge between the
+                vertices route_real[j:j+1), wrapping around at end
+            edge_length_mat_full = VxV sparse matrix of edge lengths
+            Aform = True for A-form edges, False for B-form edges
+            form = 'DX', 'Hybrid' or 'Twisted', selecting the half-edge
+                lengths used from HALF_EDGE_RULES
+    Outputs: edge_bgn_vec = row vector of scaff nt IDs at which edge begins
+             edge_fin_vec = row vector of scaff nt IDs at which edge finishes
+             edge_type_vec = row vector of edge types, corresponding to
+                             edge_length_mat_full
+      2 is spanning tree edge: DX edge with 0 scaffold crossovers
+     -3 is half of a non-spanning tree edge, connecting to vertex at 3' end
+     -5 is half of a non-spanning tree edge, connecting to vertex at 5' end
+    All outputs are int32 arrays of length equal to the number of scaffold
+    bases.
+    ##########################################################################
+    by Sakul Ratanalert, MIT, Bathe Lab, 2016
+
+    Copyright 2016. Massachusetts Institute of Technology. Rights Reserved.
+    M.I.T. hereby makes following copyrightable material available to the
+    public under GNU General Public License, version 2 (GPL-2.0). A copy of
+    this license is available at https://opensource.org/licenses/GPL-2.0
+    ##########################################################################
+    """
+    if form not in HALF_EDGE_RULES:
+        raise Exception("Unknown form '{}', expected one of {}".format(
+            form, sorted(HALF_EDGE_RULES.keys())))
+    rules = HALF_EDGE_RULES[form][bool(Aform)]
+
+    # # Vertices at the beginning, end and before each step of the route
+    edge_bgn = np.array(route_real, dtype=np.int32)
+    edge_fin = np.roll(edge_bgn, -1)  # wraps around to first vertex
+    edge_before = np.roll(edge_bgn, 1)  # wraps around to last vertex
+    route_vals = np.array(route_vals, dtype=np.int32)
+
+    len_edge = np.array(
+        [edge_length_mat_full[bgn][fin]['length']
+         for bgn, fin in zip(edge_bgn.tolist(), edge_fin.tolist())],
+        dtype=float)
+
+    is_tree = route_vals == 2  # tree edge, edge with no scaff crossovers
+    is_half = route_vals == -1  # half non-tree edge
+    is_returning = edge_before == edge_fin  # returning half-strand, 3' end
+
+    # -3 = returning half-strand, -5 = outgoing half-strand
+    edge_type = np.where(is_half, np.where(is_returning, -3, -5), route_vals)
+
+    # # Is it an even or odd multiple of 11 (A-form) or 10.5 (B-form)?  Edge
+    # lengths are integers, so the division never lands on a tie and this
+    # agrees with `round`.
+    if Aform:
+        quotient = np.floor(len_edge / 11 + 0.5)
+    else:
+        quotient = np.floor(len_edge / 10.5 + 0.5)
+    quot_is_odd = quotient % 2 == 1
+    len_is_odd = len_edge % 2 == 1
+
+    # # Number of scaffold bases on each step of the route
+    len_half = np.zeros(len(route_vals))
+    len_half[is_tree] = len_edge[is_tree]
+    for (quot_odd, len_odd), (rule_3, rule_5) in rules.items():
+        in_case = is_half & (quot_is_odd == quot_odd) & \
+            (len_is_odd == len_odd)
+        for rule, half_type, is_shorter in [
+                (rule_3, -3, edge_bgn > edge_fin),
+                (rule_5, -5, edge_bgn < edge_fin)]:
+            shorter_offset, longer_offset, rounding, shift = rule
+            mask = in_case & (edge_type == half_type)
+            offset = np.where(is_shorter[mask], shorter_offset, longer_offset)
+            len_half[mask] = rounding((len_edge[mask] + offset) / 2.0) + shift
+
+    # Very short halves can come out negative; they contribute no bases.
+    num_repeats = np.maximum(len_half, 0).astype(np.int64)
+
+    # # Expand each step of the route into its scaffold bases
+    edge_bgn_vec = np.repeat(edge_bgn, num_repeats)
+    edge_fin_vec = np.repeat(edge_fin, num_repeats)
+    edge_type_vec = np.repeat(edge_type.astype(np.int32), num_repeats)
+
+    return [edge_bgn_vec, edge_fin_vec, edge_type_vec]
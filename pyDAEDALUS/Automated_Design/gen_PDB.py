@@ -2,19 +2,26 @@ from numpy import *
 import numpy as np
 import os
 from PDB_loader import *
+from Automated_Design.ascii_columns import digit_chars, fixed_point_chars
+from Automated_Design.dna_info import DnaTopology
 
 '''
 Contents
 --------
     I. cndo_to_dnainfo
-    II. writePDBresidue
+        1. index_base_pairs
+        2. dnainfo_to_arrays
+    II. writePDBchain
         1. Single-model PDB with alphanumeric chains
         2. Multi-model PDB file with chains = 'A'
         3. Single-model PDB with chains = 'A' and iterative segid
+        4. mmCIF file with unlimited atoms, residues and chains
+        5. Functions for laying out columns as ASCII codes
     III. Matrix transformation functions
     IV. Large number encoding functions
         1. base36encode
         2. hybrid36encode
+        3. hybrid36chars
     V. pdbgen Function
 -------
     
@@ -78,6 +85,60 @@ def cndo_to_dnainfo(filename, inputdir):
 
     return dnaTop, dNode, triad, id_nt
 
+# 1. index_base_pairs
+# This function maps each nucleotide ID in id_nt to its base pair row and
+# strand type (scaf = 1, stap = 2), so that pdbgen can look bases up
+# directly instead of scanning id_nt for every nucleotide
+
+def index_base_pairs(id_nt):
+
+    nt_to_bp = {}
+    for j, bp in enumerate(id_nt):
+        # Keep the first match, checking the scaffold strand first
+        nt_to_bp.setdefault(int(bp[1]), (j, 1))
+        nt_to_bp.setdefault(int(bp[2]), (j, 2))
+
+    return nt_to_bp
+
+# 2. dnainfo_to_arrays
+# This function converts a DnaInfo object, as made by DX_cage_design, into
+# the same structure as cndo_to_dnainfo, holding numbers rather than strings.
+# pdbgen can then use a design directly, without writing and re-reading the
+# .cndo file
+
+def dnainfo_to_arrays(dnaInfo):
+
+    def handle_1_indexing(vals):
+        # Shift every non-negative ID by one, leaving -1 (N/A) as is
+        return np.where(vals >= 0, vals + 1, vals)
+
+    # Old pickles store dnaTop as a list of DnaTop objects
+    top = dnaInfo.dnaTop
+    if not isinstance(top, DnaTopology):
+        top = DnaTopology.from_dna_tops(top)
+    fields = [top.id, top.up, top.down, top.across]
+    if np.any(np.array(fields) == DnaTopology.UNSET) or np.any(top.seq == 0):
+        raise Exception('Every nucleotide needs a strand and sequence '
+                        'before generating a PDB file')
+
+    numbases = len(top)
+    rows = np.column_stack([np.arange(1, numbases + 1)] +
+                           [handle_1_indexing(field) for field in fields])
+    seqs = top.seq.tostring().decode('ascii')
+    dnaTop = [row + [seq] for row, seq in zip(rows.tolist(), seqs)]
+
+    # Rows of dNode, triad and id_nt start with the 1-indexed base pair
+    geom = dnaInfo.dnaGeom
+    numbps = len(geom.dNode)
+    bpids = np.arange(1, numbps + 1)
+    dNode = np.column_stack([bpids, geom.dNode])
+    # triad is 3x3xN, with e1, e2 and e3 as columns
+    triad = np.column_stack(
+        [bpids, np.transpose(geom.triad, (2, 1, 0)).reshape(numbps, 9)])
+    id_nt = np.column_stack([bpids, handle_1_indexing(geom.id_nt)])
+
+    return dnaTop, dNode, triad, id_nt
+
 # 1.1. dnaInfo.dnaTop contains the sequential topology
 # {dnaTop, id, up, down, across, seq}
 
@@ -94,243 +155,241 @@ def cndo_to_dnainfo(filename, inputdir):
 # strand. From this we can sequentially build our PDB file, after a routing
 # procedure.
 
-# Function for writing a PDB file atom-by-atom
-# Requires current chain, resnum, restype
+# Functions for writing PDB files a chain at a time. Each column of the atom
+# records of a chain is laid out as ASCII codes in an array with one row per
+# atom, and all variants of the PDB file are put together from these columns.
 
-# II. writePDBresidue
+# II. writePDBchain
 
-def writePDBresidue(filename, chain, chainnum, resnum, atomnum, mmatomnum, restype, refatoms, basecrds, pN, fpdb, fmm, fseg):
+# Variants of the PDB file that can be written, and their file name endings.
+# The mmCIF file holds the whole model in one file, with no limits on the
+# number of atoms, residues or chains.
+pdbvariants = {'single': '.pdb', 'multimodel': '-multimodel.pdb',
+               'segid': '-segid.pdb', 'cif': '.cif'}
 
-    segatomnum = atomnum
+# Chain list consists of 62 alphanumeric characters used sequentially to number
+# PDB chains.
+chainlist = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', \
+             'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z', 'a', 'b', \
+             'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o', 'p', \
+             'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z', '0', '1', '2', '3', \
+             '4', '5', '6', '7', '8', '9']
 
-    # This function will append coordinates to a PDB file residue by residue
-    # 1. Single-model PDB with alphanumeric chains
+# Columns of each atom record of the mmCIF file
+cifcolumns = ['group_PDB', 'id', 'type_symbol', 'label_atom_id',
+              'label_alt_id', 'label_comp_id', 'label_asym_id',
+              'label_entity_id', 'label_seq_id', 'pdbx_PDB_ins_code',
+              'Cartn_x', 'Cartn_y', 'Cartn_z', 'occupancy', 'B_iso_or_equiv',
+              'auth_seq_id', 'auth_asym_id', 'pdbx_PDB_model_num']
 
-#    pdbOut=filename+'.pdb'
-#    fOut=str(os.path.join(pN, pdbOut))
-#    f = open(fOut, 'a')
+# Writes the residues of one chain to the open PDB files of each variant.
+# Residues are {residue number, residue type, atom columns, base coords}, with
+# atom columns from getAtomCols. The mmCIF file must have been started with
+# writeCIFheader, and is finished by writeCIFfooter.
+def writePDBchain(files, chain, chainnum, residues, atomnum, mmatomnum):
 
-    # Check that file lengths are consistent
-    if len(refatoms) != len(basecrds[:,0]):
-        print('...Error: Base coord data is inconsistent. Aborting...\n')
-    else:
-        pass
+    if len(residues) == 0:
+        return atomnum, mmatomnum
 
-    element = ' '
-    # Please see official PDB file format documentation for more information
-    # www.wwpdb.org/documentation/file-format
-    #
-    for i in range(len(refatoms)):
-        # Data type: Record Name: Cols 1 - 6
-        fpdb.write('{0:<6s}'.format('ATOM'))
-        # Data type: Atom serial number: Cols 7 - 11
-        if atomnum < 100000:
-            fpdb.write('{0:>5d}'.format(int(atomnum)))
-        else:
-            hybatomnum = hybrid36encode(atomnum,5)
-            fpdb.write('{0:>5s}'.format(str(hybatomnum)))
-            #f.write('*****')
-        fpdb.write(' ') # <-- One blank space
-        # Data type: Atom name: Cols 13 - 16
-        # This one is complicated and depends on size of string
-        if len(str(refatoms[i])) == 1:
-            fpdb.write(' ' + '{0:>1s}'.format(str(refatoms[i])) + '  ')
-            element = str(refatoms[i])
-        elif len(str(refatoms[i])) == 2:
-            fpdb.write(' ' + '{0:>2s}'.format(str(refatoms[i])) + ' ')
-            element = str(refatoms[i])[0]
-        elif len(str(refatoms[i])) == 3:
-            fpdb.write(' ' + '{0:>3s}'.format(str(refatoms[i])))
-            element = str(refatoms[i])[0]
-        elif len(str(refatoms[i])) == 4:
-            fpdb.write('{0:>4s}'.format(str(refatoms[i])))
-            element = str(refatoms[i])[1]
-        # Data type: Alternate location indicator: Col 17 <-- This is typically empty
-        fpdb.write(' ')
-        # Data type: Residue name: Cols 18 - 20
-        fpdb.write('{0:>3s}'.format(str(restype)))
-        # Data type: Chain identifier: Col 22 <-- Insert extra column 21
-        fpdb.write('{0:>2s}'.format(str(chain)))
-        # Data type: Residue sequence number: Cols 23 - 26
-        if resnum < 10000:
-            fpdb.write('{0:>4d}'.format(int(resnum)))
-        else:
-            hybresnum = hybrid36encode(resnum, 4)
-            fpdb.write('{0:>4s}'.format(str(hybresnum)))
-            #f.write('****')
-        fpdb.write('    ') # <-- Four blank spaces
-        # Data type: X coordinates: Cols 31 - 38 (8.3)
-        fpdb.write('{0:>8.3f}'.format(float(basecrds[i,0])))
-        # Data type: Y coordinates: Cols 39 - 46 (8.3)
-        fpdb.write('{0:>8.3f}'.format(float(basecrds[i,1])))
-        # Data type: Z coordinates: Cols 47 - 54 (8.3)
-        fpdb.write('{0:>8.3f}'.format(float(basecrds[i,2])))
-        # Data type: Occupancy: Cols 55 - 60 (6.2)
-        fpdb.write('{0:>6.2f}'.format(float(1.0)))
-        # Data type: Temperature factor: Cols 61 - 66 (6.2)
-        fpdb.write('{0:>6.2f}'.format(float(0.0)))
-        fpdb.write('          ') # <-- Ten blank spaces
-        # Data type: Element symbol: Cols 77 - 78
-        fpdb.write('{0:>2s}'.format(str(element)))
-        # Data type: Charge: Cols 79 - 80 <-- Currently leaving this blank
-        fpdb.write('  \n') # <-- Move to next line
-
-        # Iterate atom number
-        atomnum += 1
+    resnums, resnames, atomcols, basecrds = zip(*residues)
+    numatoms = [len(crds) for crds in basecrds]
+    totatoms = int(np.sum(numatoms))
+    atomcols = np.concatenate(atomcols)
 
-    
-    # 2. Multi-model PDB with chains = 'A'
-#    pdbOut=filename+'-multimodel.pdb'
-#    fOut=str(os.path.join(pN, pdbOut))
-#    fmm = open(fOut, 'a')
+    def constCols(text):
+        return np.tile(np.frombuffer(text.encode('ascii'), dtype=np.uint8),
+                       (totatoms, 1))
 
-    element = ' '
-    # Please see official PDB file format documentation for more information
-    # www.wwpdb.org/documentation/file-format
-    #
-    for i in range(len(refatoms)):
-        # Data type: Record Name: Cols 1 - 6
-        fmm.write('{0:<6s}'.format('ATOM'))
-        # Data type: Atom serial number: Cols 7 - 11
-        if mmatomnum < 100000:
-            fmm.write('{0:>5d}'.format(int(mmatomnum)))
-        else:
-            mmhybatomnum = hybrid36encode(mmatomnum, 5)
-            fmm.write('{0:>5s}'.format(str(mmhybatomnum)))
-            #f.write('*****')
-        fmm.write(' ') # <-- One blank space
-        # Data type: Atom name: Cols 13 - 16
-        # This one is complicated and depends on size of string
-        if len(str(refatoms[i])) == 1:
-            fmm.write(' ' + '{0:>1s}'.format(str(refatoms[i])) + '  ')
-            element = str(refatoms[i])
-        elif len(str(refatoms[i])) == 2:
-            fmm.write(' ' + '{0:>2s}'.format(str(refatoms[i])) + ' ')
-            element = str(refatoms[i])[0]
-        elif len(str(refatoms[i])) == 3:
-            fmm.write(' ' + '{0:>3s}'.format(str(refatoms[i])))
-            element = str(refatoms[i])[0]
-        elif len(str(refatoms[i])) == 4:
-            fmm.write('{0:>4s}'.format(str(refatoms[i])))
-            element = str(refatoms[i])[1]
-        # Data type: Alternate location indicator: Col 17 <-- This is typically empty
-        fmm.write(' ')
-        # Data type: Residue name: Cols 18 - 20
-        fmm.write('{0:>3s}'.format(str(restype)))
-        # Data type: Chain identifier: Col 22 <-- Insert extra column 21
-        # For multi-model PDB, this is always 'A'
-        fmm.write('{0:>2s}'.format(str('A')))
-        # Data type: Residue sequence number: Cols 23 - 26
-        if resnum < 10000:
-            fmm.write('{0:>4d}'.format(int(resnum)))
-        else:
-            hybresnum = hybrid36encode(resnum,4)
-            fmm.write('{0:>4s}'.format(str(hybresnum)))
-            #fmm.write('****')
-        fmm.write('    ') # <-- Four blank spaces
-        # Data type: X coordinates: Cols 31 - 38 (8.3)
-        fmm.write('{0:>8.3f}'.format(float(basecrds[i,0])))
-        # Data type: Y coordinates: Cols 39 - 46 (8.3)
-        fmm.write('{0:>8.3f}'.format(float(basecrds[i,1])))
-        # Data type: Z coordinates: Cols 47 - 54 (8.3)
-        fmm.write('{0:>8.3f}'.format(float(basecrds[i,2])))
-        # Data type: Occupancy: Cols 55 - 60 (6.2)
-        fmm.write('{0:>6.2f}'.format(float(1.0)))
-        # Data type: Temperature factor: Cols 61 - 66 (6.2)
-        fmm.write('{0:>6.2f}'.format(float(0.0)))
-        fmm.write('          ') # <-- Ten blank spaces
-        # Data type: Element symbol: Cols 77 - 78
-        fmm.write('{0:>2s}'.format(str(element)))
-        # Data type: Charge: Cols 79 - 80 <-- Currently leaving this blank
-        fmm.write('  \n') # <-- Move to next line
-
-        # Iterate atom number
-        mmatomnum += 1
-
-
-    # 3. Single-model PDB with chains = 'A' and iterative segid
-#    pdbOut=filename+'-chseg.pdb'
-#    fOut=str(os.path.join(pN, pdbOut))
-#    fseg = open(fOut, 'a')
-
-    element = ' '
     # Please see official PDB file format documentation for more information
     # www.wwpdb.org/documentation/file-format
     #
-    for i in range(len(refatoms)):
-        # Data type: Record Name: Cols 1 - 6
-        fseg.write('{0:<6s}'.format('ATOM'))
-        # Data type: Atom serial number: Cols 7 - 11
-        if segatomnum < 100000:
-            fseg.write('{0:>5d}'.format(int(segatomnum)))
-        else:
-            hybatomnum = hybrid36encode(segatomnum, 5)
-            fseg.write('{0:>5s}'.format(str(hybatomnum)))
-            #f.write('*****')
-        fseg.write(' ') # <-- One blank space
-        # Data type: Atom name: Cols 13 - 16
-        # This one is complicated and depends on size of string
-        if len(str(refatoms[i])) == 1:
-            fseg.write(' ' + '{0:>1s}'.format(str(refatoms[i])) + '  ')
-            element = str(refatoms[i])
-        elif len(str(refatoms[i])) == 2:
-            fseg.write(' ' + '{0:>2s}'.format(str(refatoms[i])) + ' ')
-            element = str(refatoms[i])[0]
-        elif len(str(refatoms[i])) == 3:
-            fseg.write(' ' + '{0:>3s}'.format(str(refatoms[i])))
-            element = str(refatoms[i])[0]
-        elif len(str(refatoms[i])) == 4:
-            fseg.write('{0:>4s}'.format(str(refatoms[i])))
-            element = str(refatoms[i])[1]
-        # Data type: Alternate location indicator: Col 17 <-- This is typically empty
-        fseg.write(' ')
-        # Data type: Residue name: Cols 18 - 20
-        fseg.write('{0:>3s}'.format(str(restype)))
+    # Data type: Record Name: Cols 1 - 6
+    record = constCols('ATOM  ')
+    # Data type: Atom serial number: Cols 7 - 11
+    serial = serialChars(atomnum + np.arange(totatoms), 5)
+    # Data type: Atom name: Cols 13 - 16, between blank spaces
+    # Data type: Alternate location indicator: Col 17 <-- This is typically empty
+    # Data type: Residue name: Cols 18 - 20
+    restype = np.frombuffer(''.join(['{0:>3s}'.format(str(res)) for res
+                                     in resnames]).encode('ascii'),
+                            dtype=np.uint8).reshape(len(resnames), 3)
+    name = np.hstack([constCols(' '), atomcols[:,:4], constCols(' '),
+                      np.repeat(restype, numatoms, axis=0)])
+    # Data type: Residue sequence number: Cols 23 - 26
+    # Data type: X, Y, Z coordinates: Cols 31 - 54 (8.3), after four blank spaces
+    # Data type: Occupancy: Cols 55 - 60 (6.2)
+    # Data type: Temperature factor: Cols 61 - 66 (6.2)
+    crds = coordChars(np.concatenate(basecrds))
+    position = np.hstack([serialChars(np.repeat(resnums, numatoms), 4),
+                          constCols('    '), crds,
+                          constCols('{0:>6.2f}{1:>6.2f}'.format(1.0, 0.0))])
+    # Data type: Element symbol: Cols 77 - 78, after ten blank spaces
+    # Data type: Charge: Cols 79 - 80 <-- Currently leaving this blank
+    element = np.hstack([atomcols[:,4:6], constCols('  \n')])
+    blank = constCols('          ')
+    # Coordinates too wide for their columns are padded with 0, to be dropped
+    strip = np.any(crds == 0)
+
+    for variant in sorted(files.keys()):
+
+        # 1. Single-model PDB with alphanumeric chains
         # Data type: Chain identifier: Col 22 <-- Insert extra column 21
-        # Use chain 'A' here
-        fseg.write('{0:>2s}'.format(str('A')))
-        # Data type: Residue sequence number: Cols 23 - 26
-        if resnum < 10000:
-            fseg.write('{0:>4d}'.format(int(resnum)))
-        else:
-            hybresnum = hybrid36encode(resnum, 4)
-            fseg.write('{0:>4s}'.format(str(hybresnum)))
-            #fseg.write('****')
-        fseg.write('    ') # <-- Four blank spaces
-        # Data type: X coordinates: Cols 31 - 38 (8.3)
-        fseg.write('{0:>8.3f}'.format(float(basecrds[i,0])))
-        # Data type: Y coordinates: Cols 39 - 46 (8.3)
-        fseg.write('{0:>8.3f}'.format(float(basecrds[i,1])))
-        # Data type: Z coordinates: Cols 47 - 54 (8.3)
-        fseg.write('{0:>8.3f}'.format(float(basecrds[i,2])))
-        # Data type: Occupancy: Cols 55 - 60 (6.2)
-        fseg.write('{0:>6.2f}'.format(float(1.0)))
-        # Data type: Temperature factor: Cols 61 - 66 (6.2)
-        fseg.write('{0:>6.2f}'.format(float(0.0)))
-        fseg.write('      ') # <-- Six blank spaces
-        # Write SEGID here <-- This is a NAMD hack
-        fseg.write('{0:>4d}'.format(chainnum+1))
-        # Data type: Element symbol: Cols 77 - 78
-        fseg.write('{0:>2s}'.format(str(element)))
-        # Data type: Charge: Cols 79 - 80 <-- Currently leaving this blank
-        fseg.write('  \n') # <-- Move to next line
-
-        # Iterate atom number
-        segatomnum += 1
-
-
-    # 4. mmCIF atomic format for large structures
-    #f = open('./' + filename + '.cif', 'a')
-
-    #print 'Segment ' + str(chainnum + 1) + ', Residue ' + str(resnum) + ' printing coordinates...'
-
-    element = ' '
-    # Please see official PDB file format documentation for more information
-    # www.wwpdb.org/documentation/file-format
-    #
-    #for i in range(len(refatoms)):
+        if variant == 'single':
+            columns = [record, serial, name, constCols(' ' + chain),
+                       position, blank, element]
+
+        # 2. Multi-model PDB with chains = 'A', and atom serial numbers
+        # starting from 1 in each model
+        elif variant == 'multimodel':
+            columns = [record, serialChars(mmatomnum + np.arange(totatoms), 5),
+                       name, constCols(' A'), position, blank, element]
+
+        # 3. Single-model PDB with chains = 'A' and iterative segid
+        # Write SEGID after six blank spaces <-- This is a NAMD hack
+        elif variant == 'segid':
+            columns = [record, serial, name, constCols(' A'), position,
+                       constCols('      {0:>4d}'.format(chainnum + 1)), element]
+
+        # 4. mmCIF with a chain ID and entity for each chain, and plain atom
+        # and residue numbers. Values are separated by blank spaces.
+        elif variant == 'cif':
+            asymid = ' ' + getCIFchainID(chainnum) + ' '
+            cifresnum = decimalChars(np.repeat(resnums, numatoms))
+            cifcrds = np.hsplit(crds, 3)
+            columns = [constCols('ATOM '),
+                       decimalChars(atomnum + np.arange(totatoms)),
+                       constCols(' '), atomcols[:,12:], constCols(' '),
+                       atomcols[:,6:12], constCols(' . '), name[:,6:9],
+                       constCols(asymid + str(chainnum + 1) + ' '), cifresnum,
+                       constCols(' ? '), cifcrds[0], constCols(' '),
+                       cifcrds[1], constCols(' '), cifcrds[2],
+                       constCols(' 1.00 0.00 '), cifresnum,
+                       constCols(asymid + '1\n')]
+
+        text = np.hstack(columns).ravel()
+        if strip:
+            text = text[text != 0]
+        text = text.tobytes()
+        if not isinstance(text, str):
+            text = text.decode('ascii')
+        files[variant].write(text)
+
+    return atomnum + totatoms, mmatomnum + totatoms
+
+# Starts the mmCIF file with a data block named after the model, and the
+# names of the columns of its atom records
+def writeCIFheader(f, filename):
+
+    f.write('data_' + '_'.join(str(filename).split()) + '\n#\nloop_\n')
+    for column in cifcolumns:
+        f.write('_atom_site.' + column + '\n')
+
+# Ends the atom records of the mmCIF file
+def writeCIFfooter(f):
+
+    f.write('#\n')
+
+# mmCIF chain ID of a chain, taken from the chain list and growing by one
+# character every time it runs out: 'A', ..., '9', 'AA', 'AB', ...
+def getCIFchainID(chainnum):
+
+    chainid = ''
+    chainnum += 1
+    while chainnum > 0:
+        chainnum, i = divmod(chainnum - 1, len(chainlist))
+        chainid = chainlist[i] + chainid
+
+    return chainid
+
+# 5. Functions for laying out columns as ASCII codes
+
+# Atom name (cols 13 - 16) and element symbol (cols 77 - 78) of each atom,
+# followed by its mmCIF atom name and element symbol, as an Nx13 array. The
+# atom name is shifted one column right unless it fills all four columns.
+# mmCIF atom names with a quote in them are put in double quotes. The mmCIF
+# element is the first letter of the atom name, as all nucleic acid atom names
+# start with their element (the PDB columns keep the legacy symbols).
+def getAtomCols(atoms, elements):
+
+    cols = ''
+    for atom, element in zip(atoms, elements):
+        cifatom = atom
+        cifelement = atom[0]
+        if "'" in atom:
+            cifatom = '"' + atom + '"'
+        if len(atom) < 4:
+            atom = ' ' + atom
+        cols += '{0:<4s}{1:>2s}{2:<6s}{3:1s}'.format(atom, element, cifatom,
+                                                    cifelement)
+
+    return np.frombuffer(cols.encode('ascii'), dtype=np.uint8).reshape(-1, 13)
+
+# Right-aligns rows of characters to the given width behind a leading
+# character (or 0 for none), padding them with blank spaces. The characters
+# are padded on the left with 0, as by digit_chars. Rows too long for the
+# width are kept whole, and the others padded with 0 to the same length.
+def alignChars(lead, chars, width):
+
+    numrows, numcols = chars.shape
+    length = (chars != 0).sum(1)
+
+    aligned = np.zeros((numrows, numcols + 1), dtype=np.uint8)
+    aligned[:,1:] = chars
+    aligned[np.arange(numrows), numcols - length] = lead
+
+    length = length + (np.asarray(lead) != 0)
+    alignedcols = int(np.max([width] + length.tolist()))
+    if alignedcols > numcols + 1:
+        aligned = np.hstack([np.zeros((numrows, alignedcols - numcols - 1),
+                                      dtype=np.uint8), aligned])
+    else:
+        aligned = aligned[:,numcols + 1 - alignedcols:]
+
+    padding = aligned[:,alignedcols - width:]
+    padding[padding == 0] = ord(' ')
+
+    return aligned
+
+# Atom serial or residue sequence numbers in a column of the given width,
+# switching to hybrid36 notation when they no longer fit
+def serialChars(numbers, digits):
+
+    numbers = np.asarray(numbers, dtype=np.int64)
+    chars = np.empty((len(numbers), digits), dtype=np.uint8)
+
+    isdecimal = numbers < 10 ** digits
+    if np.any(isdecimal):
+        chars[isdecimal] = alignChars(0, digit_chars(numbers[isdecimal]),
+                                      digits)
+    if not np.all(isdecimal):
+        chars[~isdecimal] = hybrid36chars(numbers[~isdecimal], digits)
+
+    return chars
+
+# Non-negative integers padded with blank spaces to the width of the longest
+def decimalChars(numbers):
+
+    chars = digit_chars(numbers)
+    chars[chars == 0] = ord(' ')
+    chars = chars[:,np.argmax(np.any(chars != ord(' '), axis=0)):]
+
+    return chars
 
-    return atomnum, mmatomnum
+# Nx3 coordinates in columns of (8.3), as for '{0:>8.3f}'
+def coordChars(crds):
+
+    values = crds.ravel()
+    if np.all(np.isfinite(values)) and np.all(np.abs(values) < 1e12):
+        sign, whole, point, decimals = fixed_point_chars(values, 3)
+        chars = alignChars(sign[:,0], np.hstack([whole, point, decimals]), 8)
+    else:
+        # Python formatting for what fixed_point_chars cannot write, with
+        # rows padded on the right with 0
+        chars = np.array([('{0:>8.3f}'.format(float(value))).encode('ascii')
+                          for value in values])
+        chars = chars.view(np.uint8).reshape(len(values), -1)
+
+    return chars.reshape(len(crds), -1)
 
 # III. Matrix transformation functions
 
@@ -362,6 +421,80 @@ def applyTransMat(transmat, coords):
 
     return np.dot(coords, transmat[:3,:3].T) + transmat[:3, 3]
 
+# Transformations from the origin to the coordinate system of every base pair
+# at once. The triad already gives each rotation directly: its columns are the
+# base pair's x-, y- and z-axes. This is the same transformation getTransMat
+# fits by SVD to the origin and the tips of the axes, including its
+# translation of tar_com - mob_com. If validate is True, every base pair is
+# also fitted with getTransMat as a check.
+def getTransMats(centroids, axes, validate=False):
+
+    # axes rows are {e1(1), e1(2), e1(3), e2(1), ..., e3(3)}
+    npts = centroids.shape[0]
+    rotations = axes.reshape(npts, 3, 3).transpose(0, 2, 1)
+
+    # Same points as xyzbase in pdbgen, for each base pair
+    xyzbases = np.stack([centroids,
+                         centroids + axes[:,0:3],
+                         centroids + axes[:,3:6],
+                         centroids + axes[:,6:9]], axis=1)
+    translations = xyzbases.mean(1) - 0.25
+
+    if validate:
+        xyzorigin = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]])
+        for i in range(npts):
+            transmat = getTransMat(xyzorigin, xyzbases[i])
+            if not np.allclose(transmat[:3,:3], rotations[i], atol=1e-6) or \
+                    not np.allclose(transmat[:3,3], translations[i], atol=1e-6):
+                raise Exception('Triad of base pair {} is not a rotation'
+                                .format(i + 1))
+
+    return rotations, translations
+
+# Apply many transformations to the same coordinates at once
+def applyTransMats(rotations, translations, coords):
+
+    return np.einsum('nij,aj->nai', rotations, coords) + \
+        translations[:,np.newaxis,:]
+
+# Intrinsic transformation from the B- to the A- coordinate frame
+def getBtoATransMat():
+
+    # Two local parameters change to go from the B- to A- coordinate frame:
+    # x-displacement = -4.81 Angstroms
+    # inclination = 19.8 degrees
+
+    # Set intrinsic parameters for rotation
+    alpha = [14.7] # rotation angle around x-axis (degrees)
+    beta = [0.0] # rotation angle around y-axis (degrees)
+    gamma = [0.0] # rotation angle around z-axis (degrees)
+
+    xdisp = [-4.17] # Angstrom
+    ydisp = [0.0] # Angstrom
+    zdisp = [0.0] # Angstrom
+
+    alpharad = radians(alpha)
+    betarad = radians(beta)
+    gammarad = radians(gamma)
+
+    # Set intrinsic rotation matrix for B- to A- coordinate transformation
+    R = zeros((4,4),dtype=float)
+    R[0,0] = cos(betarad) * cos(gammarad)
+    R[0,1] = -cos(betarad) * sin(gammarad)
+    R[0,2] = sin(betarad)
+    R[1,0] = cos(alpharad) * sin(gammarad) + cos(gammarad) * sin(alpharad) * sin(betarad)
+    R[1,1] = cos(alpharad) * cos(gammarad) - sin(alpharad) * sin(betarad) * sin(gammarad)
+    R[1,2] = -cos(betarad) * sin(alpharad)
+    R[2,0] = sin(alpharad) * sin(gammarad) - cos(alpharad) * cos(gammarad) * sin(betarad)
+    R[2,1] = cos(gammarad) * sin(alpharad) + cos(alpharad) * sin(betarad) * sin(gammarad)
+    R[2,2] = cos(alpharad) * cos(betarad)
+    R[0,3] = xdisp[0]
+    R[1,3] = ydisp[0]
+    R[2,3] = zdisp[0]
+    R[3,3] = 1
+
+    return R
+
 # Translate coords
 def translate(mob,trans):
 
@@ -439,11 +572,78 @@ def hybrid36encode(number,digits):
 
     return hyb36str
 
+# 3. Function to encode an array of decimals using hybrid36 notation, as
+# ASCII codes in columns of the given width, as done by hybrid36encode
+def hybrid36chars(numbers, digits):
+
+    # Alphabets of the first and the other digits, as ASCII codes
+    alphahyb36 = np.frombuffer(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+                               b'abcdefghijklmnopqrstuvwxyz', dtype=np.uint8)
+    alphab36 = np.frombuffer(b'0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ',
+                             dtype=np.uint8)
+
+    numbers = np.asarray(numbers, dtype=np.int64)
+    div, rem = numbers // 36 ** (digits - 1), numbers % 36 ** (digits - 1)
+    b36rem = np.zeros((len(div), digits - 1), dtype=np.uint8)
+    for i in range(digits - 2, -1, -1):
+        # base36encode writes no leading zeros
+        isdigit = rem > 0
+        rem, digit = rem // 36, rem % 36
+        b36rem[:,i] = np.where(isdigit, alphab36.take(digit), 0)
+
+    return alignChars(alphahyb36.take(div), b36rem, digits)
+
 # V. PDBGen Function Definition
-def pdbgen(filename, hF, pN):
+
+# Residue names of each base
+restypes = {'A': 'ADE', 'C': 'CYT', 'G': 'GUA', 'T': 'THY', 'U': 'URA'}
+
+# Atom columns of each reference base, from getAtomCols, by template
+refatomcols = {}
+
+# Reference coordinates, atom names, residue name and atom columns of a base,
+# given its strand type (scaf = 1, stap = 2) and sequence. Returns None if
+# there is no reference base for it.
+def getRefBase(type, baseseq, abtype, natype):
+
+    if type != 1 and type != 2:
+        return None
+    # Thymine is built as uracil in RNA
+    if natype[type-1] == 'RNA' and baseseq == 'T':
+        baseseq = 'U'
+
+    key = (abtype + '-' + natype[type-1], baseseq, ['scaf', 'stap'][type-1])
+    reftemplate = get_reftemplate(*key)
+    if reftemplate is None:
+        return None
+    if key not in refatomcols:
+        refatomcols[key] = getAtomCols(reftemplate.atoms, reftemplate.elements)
+
+    return reftemplate.crds, reftemplate.atoms, restypes[baseseq], \
+        refatomcols[key]
+
+# The design is read from the .cndo file 'filename' in folder pN, unless it is
+# passed as dnaInfo: either a DnaInfo object or the output of cndo_to_dnainfo
+# or dnainfo_to_arrays.
+# Base pair frames are built directly from the triad; validate_frames also
+# fits each of them by SVD as a check.
+# variants selects which of the PDB files in pdbvariants are written.
+def pdbgen(filename, hF, pN, dnaInfo=None, validate_frames=False,
+           variants=('single', 'multimodel', 'segid')):
+
+    for variant in variants:
+        if variant not in pdbvariants:
+            raise Exception("Unknown PDB variant '{}', expected one of "
+                            "{}".format(variant, sorted(pdbvariants.keys())))
 
     # Open PDBGen logging file
-    dnaTop, dNode, triad, id_nt = cndo_to_dnainfo(filename, pN)
+    if dnaInfo is None:
+        dnaTop, dNode, triad, id_nt = cndo_to_dnainfo(filename, pN)
+    elif hasattr(dnaInfo, 'dnaGeom'):
+        dnaTop, dNode, triad, id_nt = dnainfo_to_arrays(dnaInfo)
+    else:
+        dnaTop, dNode, triad, id_nt = dnaInfo
+    nt_to_bp = index_base_pairs(id_nt)
     # Specify A- or B-type Helix
     if hF==True:
         abtype='A'
@@ -460,30 +660,25 @@ def pdbgen(filename, hF, pN):
     chainnum = 0
     chlist = 'A'
     cc = 0
-    bdna = c_bdna()
-    adna = c_adna()
-    arna = c_arna()
-
-    # Chain list consists of 63 alphanumeric characters used sequentially to number
-    # PDB chains.
-    chainlist = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', \
-             'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z', 'a', 'b', \
-             'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o', 'p', \
-             'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z', '0', '1', '2', '3', \
-             '4', '5', '6', '7', '8', '9']
 
     # First need to re-order the dnaInfo.dnaTop structure as it is not in the order
     # needed to build a pdb file. Loop through data structure and save to routeTemp.
     # The dnaInfo.dnaTop structure is ordered so that the scaffold strand is first.
     # Next, the staple strands are not always contiguous, so they need to be reordered.
 
-    # First convert to list for easier processing
-    unrouteTemp = np.asarray(dnaTop)
+    # First convert to array for easier processing, with IDs as integers
+    unrouteTemp = np.asarray(dnaTop, dtype=object)
+    unrouteTemp[:,:5] = unrouteTemp[:,:5].astype(int)
     numbases = len(unrouteTemp[:,0])
     routeTemp = np.zeros((numbases,5),dtype=object)
     visited = np.zeros(numbases,dtype=int)
     routeindex = 0
 
+    # Row of each nucleotide ID in dnaTop
+    nt_to_row = {}
+    for jj in range(numbases):
+        nt_to_row[int(unrouteTemp[jj,1])] = jj
+
     # Loop through all of the bases
     for ii in range(numbases):
 
@@ -505,57 +700,15 @@ def pdbgen(filename, hF, pN):
             strlen = 1
             while basedown != -1:
                 nextbaseid = basedown
-                # Check if next base is correct one
-                # Fails if ii == numbases - 1
-                if ii + strlen < numbases - 1:
-                    tempnextbaseid = int(unrouteTemp[ii+strlen,1])
-                    if nextbaseid == tempnextbaseid:
-                        # Base-pairing info for base
-                        base = unrouteTemp[ii+strlen,1:]
-                        baseid = int(unrouteTemp[ii+strlen,1])
-                        baseup = int(unrouteTemp[ii+strlen,2])
-                        basedown = int(unrouteTemp[ii+strlen,3])
-                        baseacross = int(unrouteTemp[ii+strlen,4])
-                        baseseq = str(unrouteTemp[ii+strlen,5])
-                    else:
-                        # First try unrouteTemp[basedown-1]
-                        tempnextbaseid = int(unrouteTemp[basedown-1,1])
-                        if nextbaseid == tempnextbaseid:
-                            base = unrouteTemp[basedown-1,1:]
-                            baseid = int(unrouteTemp[basedown-1,1])
-                            baseup = int(unrouteTemp[basedown-1,2])
-                            basedown = int(unrouteTemp[basedown-1,3])
-                            baseacross = int(unrouteTemp[basedown-1,4])
-                            baseseq = str(unrouteTemp[basedown-1,5])
-                        else:
-                            # If all else fails!
-                            # Loop through to find next base in sequence
-                            for jj in range(numbases):
-                                # Base-pairing info for base
-                                base = unrouteTemp[jj,1:]
-                                baseid = int(unrouteTemp[jj,1])
-                                baseup = int(unrouteTemp[jj,2])
-                                basedown = int(unrouteTemp[jj,3])
-                                baseacross = int(unrouteTemp[jj,4])
-                                baseseq = str(unrouteTemp[jj,5])
-                                if baseid == nextbaseid:
-                                    break
-                                else:
-                                    continue
-                else:
-                    # Loop through to find next base in sequence
-                    for jj in range(numbases):
-                        # Base-pairing info for base
-                        base = unrouteTemp[jj,1:]
-                        baseid = int(unrouteTemp[jj,1])
-                        baseup = int(unrouteTemp[jj,2])
-                        basedown = int(unrouteTemp[jj,3])
-                        baseacross = int(unrouteTemp[jj,4])
-                        baseseq = str(unrouteTemp[jj,5])
-                        if baseid == nextbaseid:
-                            break
-                        else:
-                            continue
+                # Find next base in sequence
+                jj = nt_to_row[nextbaseid]
+                # Base-pairing info for base
+                base = unrouteTemp[jj,1:]
+                baseid = int(unrouteTemp[jj,1])
+                baseup = int(unrouteTemp[jj,2])
+                basedown = int(unrouteTemp[jj,3])
+                baseacross = int(unrouteTemp[jj,4])
+                baseseq = str(unrouteTemp[jj,5])
                 routeTemp[routeindex,:] = base
                 routeindex += 1
                 strlen += 1
@@ -595,27 +748,66 @@ def pdbgen(filename, hF, pN):
             #
     
     # Open PDB files for appending
-    fpdb_name = filename + '.pdb'
-    fpdbOut = str(os.path.join(pN, fpdb_name))
-    fpdb = open(fpdbOut, 'a')
-    
-    fmm_name = filename + '-multimodel.pdb'
-    fmmOut = str(os.path.join(pN,fmm_name))
-    fmm = open(fmmOut, 'a')
-    
-    fseg_name = filename + '-segid.pdb'
-    fsegOut = str(os.path.join(pN, fseg_name))
-    fseg = open(fsegOut, 'a')
-    
+    pdbfiles = {}
+    for variant in variants:
+        pdbOut = str(os.path.join(pN, filename + pdbvariants[variant]))
+        if variant == 'cif':
+            # One data block per file, so start a new one
+            pdbfiles[variant] = open(pdbOut, 'w')
+            writeCIFheader(pdbfiles[variant], filename)
+        else:
+            pdbfiles[variant] = open(pdbOut, 'a')
+
+    # Residues of the current chain, written out when it ends
+    chainres = []
+
     ssfirst = 0 # ID of first nucleotide in ss region
     sslast = 0 # ID of last nucleotide in ss region
     sslength = 0 # Length of ss region
     ssbases = []
 
+    # Convert dNode, triad to arrays of floats, and to lists for reading
+    # single values
+    dNodeArr = np.asarray(dNode, dtype=float)
+    triadArr = np.asarray(triad, dtype=float)
+    dNode = dNodeArr.tolist()
+    triad = triadArr.tolist()
+
+    # Transformation for A-form structures
+    batransform = getBtoATransMat()
+
+    # Get transformation matrices for origin to every base pair coordinate
+    # system
+    bprotations, bptranslations = getTransMats(
+        dNodeArr[:,1:4], triadArr[:,1:10], validate_frames)
+
+    # Place all base-paired nucleotides, one reference base at a time
+    basesbyref = {}
+    for jj in range(numbases):
+        baseid = unrouteTemp[jj,1]
+        if unrouteTemp[jj,4] != -1 and baseid in nt_to_bp:
+            bpid, type = nt_to_bp[baseid]
+            key = (type, str(unrouteTemp[jj,5]))
+            basesbyref.setdefault(key, []).append((baseid, bpid))
+
+    pairedcrds = {}
+    for (type, baseseq), bases in basesbyref.items():
+        refbase = getRefBase(type, baseseq, abtype, natype)
+        if refbase is None:
+            continue
+        refcrds = refbase[0]
+        if abtype == 'A': # Transformation for A-form DNA
+            # Apply B to A-form transform matrix
+            refcrds = applyTransMat(batransform, refcrds)
+        baseids, bpids = zip(*bases)
+        bpids = np.array(bpids)
+        # Now transform reference coordinates to base coordinate systems
+        crds = applyTransMats(bprotations[bpids], bptranslations[bpids],
+                              refcrds)
+        for baseid, basecrds in zip(baseids, crds):
+            pairedcrds[baseid] = basecrds
+
     # Go through each base in routed structure
-    # Create array for dNode, triad
-    dNode = np.asarray(dNode)
-    triad = np.asarray(triad)
 
     for ii in range(numbases):
 
@@ -633,8 +825,13 @@ def pdbgen(filename, hF, pN):
 
         # Check if the base is 5'-end
         if baseup == -1:
+            atomnum, mmatomnum = writePDBchain(pdbfiles, chlist, chainnum,
+                                               chainres, atomnum, mmatomnum)
+            chainres = []
             # Multi-model PDB starts new model here
-            fmm.write('MODEL' + '{0:>9s}'.format(str(chainnum + 1)) + '\n')
+            if 'multimodel' in pdbfiles:
+                pdbfiles['multimodel'].write(
+                    'MODEL' + '{0:>9s}'.format(str(chainnum + 1)) + '\n')
 
         #print sslength, sslast, baseid
 
@@ -655,54 +852,14 @@ def pdbgen(filename, hF, pN):
         if baseacross == -1:
             type = 3
             pass
-        else:
+        elif baseid in nt_to_bp:
             # Otherwise, Extract basepairid
-            for j, bp in enumerate(id_nt):
-                # Scaffold strand
-                if baseid == int(bp[1]):
-                    bpid = int(j)
-                    type = 1
-                    break
-                # Staple strand
-                elif baseid == int(bp[2]):
-                    bpid = int(j)
-                    type = 2
-                    break
+            bpid, type = nt_to_bp[baseid]
 
         #print type
 
-        # Only basepaired sequences have coordinates
-        if type == 1 or type == 2:
-            # Extract Centroid of Base
-            xx0, yy0, zz0 = float(dNode[bpid,1]), float(dNode[bpid,2]), float(dNode[bpid,3])
-            #print xx0, yy0, zz0
-
-            # Extract Coordinate System of Base
-            xx1, xx2, xx3 = float(triad[bpid,1]), float(triad[bpid,2]), float(triad[bpid,3]) # X-axis
-            yy1, yy2, yy3 = float(triad[bpid,4]), float(triad[bpid,5]), float(triad[bpid,6]) # Y-axis
-            zz1, zz2, zz3 = float(triad[bpid,7]), float(triad[bpid,8]), float(triad[bpid,9]) # Z-axis
-
-            #print xx1, xx2, xx3
-            #print yy1, yy2, yy3
-            #print zz1, zz2, zz3
-
-            # Get transformation matrix for origin to base coordinate system
-            # Start by using available ProDy functions
-            # Should re-write later!!
-
-            xyzorigin = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]])
-
-            xyzbase = np.array([[xx0, yy0, zz0],
-                                [xx0 + xx1, yy0 + xx2, zz0 + xx3],
-                                [xx0 + yy1, yy0 + yy2, zz0 + yy3],
-                                [xx0 + zz1, yy0 + zz2, zz0 + zz3]])
-
-            #print xyzorigin, xyzbase
-
-            transformMat = getTransMat(xyzorigin, xyzbase)
-
         # For unpaired sequences, need to calculate the reference frame
-        elif type == 3:
+        if type == 3:
 
             # Whole ss region will be calculated within this statement
             ssfirst = baseid
@@ -732,27 +889,17 @@ def pdbgen(filename, hF, pN):
             # Print ssDNA characteristics
 
             # Extract coordinates of upstream base
-            for j, bp in enumerate(id_nt):
-                # Scaffold strand
-                if upbase == int(bp[1]):
-                    bpidup = int(j)
-                    typeup = 1
-                    break
-                # Staple strand
-                elif upbase == int(bp[2]):
-                    bpidup = int(j)
-                    typeup = 2
-                    break
+            bpidup, typeup = nt_to_bp[upbase]
 
             # Extract Centroid of Upstream Base
-            xx0up, yy0up, zz0up = float(dNode[bpidup,1]), float(dNode[bpidup,2]), float(dNode[bpidup,3])
+            xx0up, yy0up, zz0up = dNode[bpidup][1:4]
 
             #print xx0up, yy0up, zz0up
 
             # Extract Coordinate System of Upstream Base
-            xx1up, xx2up, xx3up = float(triad[bpidup,1]), float(triad[bpidup,2]), float(triad[bpidup,3]) # X-axis
-            yy1up, yy2up, yy3up = float(triad[bpidup,4]), float(triad[bpidup,5]), float(triad[bpidup,6]) # Y-axis
-            zz1up, zz2up, zz3up = float(triad[bpidup,7]), float(triad[bpidup,8]), float(triad[bpidup,9]) # Z-axis
+            xx1up, xx2up, xx3up = triad[bpidup][1:4] # X-axis
+            yy1up, yy2up, yy3up = triad[bpidup][4:7] # Y-axis
+            zz1up, zz2up, zz3up = triad[bpidup][7:10] # Z-axis
 
             xyzbase0 = np.array([[xx0up, yy0up, zz0up],
                                  [xx0up + xx1up, yy0up + xx2up, zz0up + xx3up],
@@ -760,25 +907,15 @@ def pdbgen(filename, hF, pN):
                                  [xx0up + zz1up, yy0up + zz2up, zz0up + zz3up]])
 
             # Extract coordinates of downstream base
-            for j, bp in enumerate(id_nt):
-                # Scaffold strand
-                if downbase == int(bp[1]):
-                    bpiddo = int(j)
-                    typedo = 1
-                    break
-                # Staple strand
-                elif downbase == int(bp[2]):
-                    bpiddo = int(j)
-                    typedo = 2
-                    break
+            bpiddo, typedo = nt_to_bp[downbase]
 
             # Extract Centroid of Downstream Base
-            xx0do, yy0do, zz0do = float(dNode[bpiddo,1]), float(dNode[bpiddo,2]), float(dNode[bpiddo,3])
+            xx0do, yy0do, zz0do = dNode[bpiddo][1:4]
 
             # Extract Coordinate System of Downstream Base
-            xx1do, xx2do, xx3do = float(triad[bpiddo,1]), float(triad[bpiddo,2]), float(triad[bpiddo,3]) # X-axis
-            yy1do, yy2do, yy3do = float(triad[bpiddo,4]), float(triad[bpiddo,5]), float(triad[bpiddo,6]) # Y-axis
-            zz1do, zz2do, zz3do = float(triad[bpiddo,7]), float(triad[bpiddo,8]), float(triad[bpiddo,9]) # Z-axis
+            xx1do, xx2do, xx3do = triad[bpiddo][1:4] # X-axis
+            yy1do, yy2do, yy3do = triad[bpiddo][4:7] # Y-axis
+            zz1do, zz2do, zz3do = triad[bpiddo][7:10] # Z-axis
 
             xyzbase3 = np.array([[xx0do, yy0do, zz0do],
                                  [xx0do + xx1do, yy0do + xx2do, zz0do + xx3do],
@@ -786,9 +923,9 @@ def pdbgen(filename, hF, pN):
                                  [xx0do + zz1do, yy0do + zz2do, zz0do + zz3do]])
 
             # Compute distance between upstream and downstream bases
-            dist12 = sqrt(pow(float(xx0do)-float(xx0up), 2) + \
-                      pow(float(yy0do)-float(yy0up), 2) + \
-                      pow(float(zz0do)-float(zz0up), 2))
+            dist12 = sqrt(pow(xx0do-xx0up, 2) + \
+                      pow(yy0do-yy0up, 2) + \
+                      pow(zz0do-zz0up, 2))
 
             # Debugging - ssDNA region distance
             #print 'ssDNA Region Dist = ', str(dist12)
@@ -878,132 +1015,11 @@ def pdbgen(filename, hF, pN):
                 baseseq = str(base[4])
 
                 # Now pull reference base information
-                refcrds = []
-                refatoms = []
-                restype = ''
-                if typeup == 1 and abtype == 'B' and natype[typeup-1] == 'DNA': # Scaffold strand
-                    if baseseq == 'A':
-                        refcrds = bdna.Ascaf[:,3:6]
-                        refatoms = bdna.Ascaf[:,0]
-                        restype = 'ADE'
-                    elif baseseq == 'C':
-                        refcrds = bdna.Cscaf[:,3:6]
-                        refatoms = bdna.Cscaf[:,0]
-                        restype = 'CYT'
-                    elif baseseq == 'G':
-                        refcrds = bdna.Gscaf[:,3:6]
-                        refatoms = bdna.Gscaf[:,0]
-                        restype = 'GUA'
-                    elif baseseq == 'T':
-                        refcrds = bdna.Tscaf[:,3:6]
-                        refatoms = bdna.Tscaf[:,0]
-                        restype = 'THY'
-                    else:
-                        print('...Error: No base sequence for scaffold strand...\n');
-                elif typeup == 2 and abtype == 'B' and natype[typeup-1] == 'DNA': # Staple strand
-                    if baseseq == 'A':
-                        refcrds = bdna.Astap[:,3:6]
-                        refatoms = bdna.Astap[:,0]
-                        restype = 'ADE'
-                    elif baseseq == 'C':
-                        refcrds = bdna.Cstap[:,3:6]
-                        refatoms = bdna.Cstap[:,0]
-                        restype = 'CYT'
-                    elif baseseq == 'G':
-                        refcrds = bdna.Gstap[:,3:6]
-                        refatoms = bdna.Gstap[:,0]
-                        restype = 'GUA'
-                    elif baseseq == 'T':
-                        refcrds = bdna.Tstap[:,3:6]
-                        refatoms = bdna.Tstap[:,0]
-                        restype = 'THY'
-                    else:
-                        print('...Error: No base sequence for staple strand...\n');
-                elif typeup == 1 and abtype == 'A' and natype[typeup-1] == 'DNA': # Scaffold strand
-                    if baseseq == 'A':
-                        refcrds = adna.Ascaf[:,3:6]
-                        refatoms = adna.Ascaf[:,0]
-                        restype = 'ADE'
-                    elif baseseq == 'C':
-                        refcrds = adna.Cscaf[:,3:6]
-                        refatoms = adna.Cscaf[:,0]
-                        restype = 'CYT'
-                    elif baseseq == 'G':
-                        refcrds = adna.Gscaf[:,3:6]
-                        refatoms = adna.Gscaf[:,0]
-                        restype = 'GUA'
-                    elif baseseq == 'T':
-                        refcrds = adna.Tscaf[:,3:6]
-                        refatoms = adna.Tscaf[:,0]
-                        restype = 'THY'
-                    else:
-                        print('...Error: No base sequence for scaffold strand...\n');
-                elif typeup == 2 and abtype == 'A' and natype[typeup-1] == 'DNA': # Staple strand
-                    if baseseq == 'A':
-                        refcrds = adna.Astap[:,3:6]
-                        refatoms = adna.Astap[:,0]
-                        restype = 'ADE'
-                    elif baseseq == 'C':
-                        refcrds = adna.Cstap[:,3:6]
-                        refatoms = adna.Cstap[:,0]
-                        restype = 'CYT'
-                    elif baseseq == 'G':
-                        refcrds = adna.Gstap[:,3:6]
-                        refatoms = adna.Gstap[:,0]
-                        restype = 'GUA'
-                    elif baseseq == 'T':
-                        refcrds = adna.Tstap[:,3:6]
-                        refatoms = adna.Tstap[:,0]
-                        restype = 'THY'
-                    else:
-                        print('...Error: No base sequence for staple strand...\n')
-                elif typeup == 1 and abtype == 'A' and natype[typeup-1] == 'RNA': # Scaffold strand
-                    if baseseq == 'A':
-                        refcrds = arna.Ascaf[:,3:6]
-                        refatoms = arna.Ascaf[:,0]
-                        restype = 'ADE'
-                    elif baseseq == 'C':
-                        refcrds = arna.Cscaf[:,3:6]
-                        refatoms = arna.Cscaf[:,0]
-                        restype = 'CYT'
-                    elif baseseq == 'G':
-                        refcrds = arna.Gscaf[:,3:6]
-                        refatoms = arna.Gscaf[:,0]
-                        restype = 'GUA'
-                    elif baseseq == 'U':
-                        refcrds = arna.Uscaf[:,3:6]
-                        refatoms = arna.Uscaf[:,0]
-                        restype = 'URA'
-                    elif baseseq == 'T':
-                        refcrds = arna.Uscaf[:,3:6]
-                        refatoms = arna.Uscaf[:,0]
-                        restype = 'URA'
-                    else:
-                        print('...Error: No base sequence for scaffold strand...\n')
-                elif typeup == 2 and abtype == 'A' and natype[typeup-1] == 'RNA': # Staple strand
-                    if baseseq == 'A':
-                        refcrds = arna.Astap[:,3:6]
-                        refatoms = arna.Astap[:,0]
-                        restype = 'ADE'
-                    elif baseseq == 'C':
-                        refcrds = arna.Cstap[:,3:6]
-                        refatoms = arna.Cstap[:,0]
-                        restype = 'CYT'
-                    elif baseseq == 'G':
-                        refcrds = arna.Gstap[:,3:6]
-                        refatoms = arna.Gstap[:,0]
-                        restype = 'GUA'
-                    elif baseseq == 'U':
-                        refcrds = arna.Ustap[:,3:6]
-                        refatoms = arna.Ustap[:,0]
-                        restype = 'URA'
-                    elif baseseq == 'T':
-                        refcrds = arna.Ustap[:,3:6]
-                        refatoms = arna.Ustap[:,0]
-                        restype = 'URA'
-                else:
+                refbase = getRefBase(typeup, baseseq, abtype, natype)
+                if refbase is None:
                     print('...Error: No base sequence available in database...\n')
                     continue
+                refcrds, refatoms, restype, atomcols = refbase
 
                 # First move to upstream base position
                 xyzorigin = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]])
@@ -1060,41 +1076,6 @@ def pdbgen(filename, hF, pN):
                 # Additional step if calculating A-form structure
                 if abtype == 'A':
 
-                    # Two local parameters change to go from the B- to A- coordinate frame:
-                    # x-displacement = -4.81 Angstroms
-                    # inclination = 19.8 degrees
-
-                    # Set intrinsic parameters for rotation
-                    alpha = [14.7] # rotation angle around x-axis (degrees)
-                    beta = [0.0] # rotation angle around y-axis (degrees)
-                    gamma = [0.0] # rotation angle around z-axis (degrees)
-
-                    xdisp = [-4.17] # Angstrom
-                    ydisp = [0.0] # Angstrom
-                    zdisp = [0.0] # Angstrom
-
-                    alpharad = radians(alpha)
-                    betarad = radians(beta)
-                    gammarad = radians(gamma)
-
-                    # Set intrinsic rotation matrix for B- to A- coordinate transformation
-                    R = zeros((4,4),dtype=float)
-                    R[0,0] = cos(betarad) * cos(gammarad)
-                    R[0,1] = -cos(betarad) * sin(gammarad)
-                    R[0,2] = sin(betarad)
-                    R[1,0] = cos(alpharad) * sin(gammarad) + cos(gammarad) * sin(alpharad) * sin(betarad)
-                    R[1,1] = cos(alpharad) * cos(gammarad) - sin(alpharad) * sin(betarad) * sin(gammarad)
-                    R[1,2] = -cos(betarad) * sin(alpharad)
-                    R[2,0] = sin(alpharad) * sin(gammarad) - cos(alpharad) * cos(gammarad) * sin(betarad)
-                    R[2,1] = cos(gammarad) * sin(alpharad) + cos(alpharad) * sin(betarad) * sin(gammarad)
-                    R[2,2] = cos(alpharad) * cos(betarad)
-                    R[0,3] = xdisp[0]
-                    R[1,3] = ydisp[0]
-                    R[2,3] = zdisp[0]
-                    R[3,3] = 1
-
-                    batransform = R
-
                     # Apply B to A-form transform matrix
                     basecrds = applyTransMat(batransform, upbasecrds)
 
@@ -1108,213 +1089,45 @@ def pdbgen(filename, hF, pN):
                 # Move base back to upbase coordinates
                 basecrds = translate(basecrds,np.array([xx0up, yy0up, zz0up]))
 
-                # Write out PDB file sequentially
-                # Pass {filename, chain, residue number, atom number, residue type,
-                # atom types, base coords} to PDB writer
-                atomnum, mmatomnum = writePDBresidue(filename, chlist, chainnum, resnum, atomnum, \
-                                          mmatomnum, restype, refatoms, basecrds, pN, fpdb, fmm, fseg)
+                # Add residue to the chain written out at its end
+                chainres.append((resnum, restype, atomcols, basecrds))
 
                 # Iterate residue indexing
                 resnum += 1
 
         # Now pull reference base information
-        refcrds = []
-        refatoms = []
-        restype = ''
-        #print type, baseseq
-        if type == 1 and abtype == 'B' and natype[type-1] == 'DNA': # Scaffold strand
-            if baseseq == 'A':
-                refcrds = bdna.Ascaf[:,3:6]
-                refatoms = bdna.Ascaf[:,0]
-                restype = 'ADE'
-            elif baseseq == 'C':
-                refcrds = bdna.Cscaf[:,3:6]
-                refatoms = bdna.Cscaf[:,0]
-                restype = 'CYT'
-            elif baseseq == 'G':
-                refcrds = bdna.Gscaf[:,3:6]
-                refatoms = bdna.Gscaf[:,0]
-                restype = 'GUA'
-            elif baseseq == 'T':
-                refcrds = bdna.Tscaf[:,3:6]
-                refatoms = bdna.Tscaf[:,0]
-                restype = 'THY'
-            else:
-                print('...Error: No base sequence for scaffold strand...\n')
-        elif type == 2 and abtype == 'B' and natype[type-1] == 'DNA': # Staple strand
-            if baseseq == 'A':
-                refcrds = bdna.Astap[:,3:6]
-                refatoms = bdna.Astap[:,0]
-                restype = 'ADE'
-            elif baseseq == 'C':
-                refcrds = bdna.Cstap[:,3:6]
-                refatoms = bdna.Cstap[:,0]
-                restype = 'CYT'
-            elif baseseq == 'G':
-                refcrds = bdna.Gstap[:,3:6]
-                refatoms = bdna.Gstap[:,0]
-                restype = 'GUA'
-            elif baseseq == 'T':
-                refcrds = bdna.Tstap[:,3:6]
-                refatoms = bdna.Tstap[:,0]
-                restype = 'THY'
-            else:
-                print('...Error: No base sequence for staple strand...\n')
-        elif type == 1 and abtype == 'A' and natype[type-1] == 'DNA': # Scaffold strand
-            if baseseq == 'A':
-                refcrds = adna.Ascaf[:,3:6]
-                refatoms = adna.Ascaf[:,0]
-                restype = 'ADE'
-            elif baseseq == 'C':
-                refcrds = adna.Cscaf[:,3:6]
-                refatoms = adna.Cscaf[:,0]
-                restype = 'CYT'
-            elif baseseq == 'G':
-                refcrds = adna.Gscaf[:,3:6]
-                refatoms = adna.Gscaf[:,0]
-                restype = 'GUA'
-            elif baseseq == 'T':
-                refcrds = adna.Tscaf[:,3:6]
-                refatoms = adna.Tscaf[:,0]
-                restype = 'THY'
-            else:
-                print('...Error: No base sequence for scaffold strand...\n')
-        elif type == 2 and abtype == 'A' and natype[type-1] == 'DNA': # Staple strand
-            if baseseq == 'A':
-                refcrds = adna.Astap[:,3:6]
-                refatoms = adna.Astap[:,0]
-                restype = 'ADE'
-            elif baseseq == 'C':
-                refcrds = adna.Cstap[:,3:6]
-                refatoms = adna.Cstap[:,0]
-                restype = 'CYT'
-            elif baseseq == 'G':
-                refcrds = adna.Gstap[:,3:6]
-                refatoms = adna.Gstap[:,0]
-                restype = 'GUA'
-            elif baseseq == 'T':
-                refcrds = adna.Tstap[:,3:6]
-                refatoms = adna.Tstap[:,0]
-                restype = 'THY'
-            else:
-                print('...Error: No base sequence for staple strand...\n')
-        elif type == 1 and abtype == 'A' and natype[type-1] == 'RNA': # Scaffold strand
-            if baseseq == 'A':
-                refcrds = arna.Ascaf[:,3:6]
-                refatoms = arna.Ascaf[:,0]
-                restype = 'ADE'
-            elif baseseq == 'C':
-                refcrds = arna.Cscaf[:,3:6]
-                refatoms = arna.Cscaf[:,0]
-                restype = 'CYT'
-            elif baseseq == 'G':
-                refcrds = arna.Gscaf[:,3:6]
-                refatoms = arna.Gscaf[:,0]
-                restype = 'GUA'
-            elif baseseq == 'U':
-                refcrds = arna.Uscaf[:,3:6]
-                refatoms = arna.Uscaf[:,0]
-                restype = 'URA'
-            elif baseseq == 'T':
-                refcrds = arna.Uscaf[:,3:6]
-                refatoms = arna.Uscaf[:,0]
-                restype = 'URA'
-            else:
-                print('...No base sequence for scaffold strand...\n')
-        elif type == 2 and abtype == 'A' and natype[type-1] == 'RNA': # Staple strand
-            if baseseq == 'A':
-                refcrds = arna.Astap[:,3:6]
-                refatoms = arna.Astap[:,0]
-                restype = 'ADE'
-            elif baseseq == 'C':
-                refcrds = arna.Cstap[:,3:6]
-                refatoms = arna.Cstap[:,0]
-                restype = 'CYT'
-            elif baseseq == 'G':
-                refcrds = arna.Gstap[:,3:6]
-                refatoms = arna.Gstap[:,0]
-                restype = 'GUA'
-            elif baseseq == 'U':
-                refcrds = arna.Ustap[:,3:6]
-                refatoms = arna.Ustap[:,0]
-                restype = 'URA'
-            elif baseseq == 'T':
-                refcrds = arna.Ustap[:,3:6]
-                refatoms = arna.Ustap[:,0]
-                restype = 'URA'
-            else:
-                print('...Error: No base sequence for staple strand...\n')
-        else:
+        refbase = getRefBase(type, baseseq, abtype, natype)
+        if refbase is None:
 #            print('...Error: Base sequence not labelled as scaffold or staple strand...\n')
             continue
+        refcrds, refatoms, restype, atomcols = refbase
 
-        # Additional step if calculating A-DNA structure
-        if abtype == 'A': # Transformation for A-form DNA
-
-            # Two local parameters change to go from the B- to A- coordinate frame:
-            # x-displacement = -4.81 Angstroms
-            # inclination = 19.8 degrees
-
-            # Set intrinsic parameters for rotation
-            alpha = [14.7] # rotation angle around x-axis (degrees)
-            beta = [0.0] # rotation angle around y-axis (degrees)
-            gamma = [0.0] # rotation angle around z-axis (degrees)
-
-            xdisp = [-4.17] # Angstrom
-            ydisp = [0.0] # Angstrom
-            zdisp = [0.0] # Angstrom
-
-            alpharad = radians(alpha)
-            betarad = radians(beta)
-            gammarad = radians(gamma)
-
-            # Set intrinsic rotation matrix for B- to A- coordinate transformation
-            R = zeros((4,4),dtype=float)
-            R[0,0] = cos(betarad) * cos(gammarad)
-            R[0,1] = -cos(betarad) * sin(gammarad)
-            R[0,2] = sin(betarad)
-            R[1,0] = cos(alpharad) * sin(gammarad) + cos(gammarad) * sin(alpharad) * sin(betarad)
-            R[1,1] = cos(alpharad) * cos(gammarad) - sin(alpharad) * sin(betarad) * sin(gammarad)
-            R[1,2] = -cos(betarad) * sin(alpharad)
-            R[2,0] = sin(alpharad) * sin(gammarad) - cos(alpharad) * cos(gammarad) * sin(betarad)
-            R[2,1] = cos(gammarad) * sin(alpharad) + cos(alpharad) * sin(betarad) * sin(gammarad)
-            R[2,2] = cos(alpharad) * cos(betarad)
-            R[0,3] = xdisp[0]
-            R[1,3] = ydisp[0]
-            R[2,3] = zdisp[0]
-            R[3,3] = 1
-
-            batransform = R
-
-            # Apply B to A-form transform matrix
-            abcrds = applyTransMat(batransform, refcrds)
-
-            # Now transform reference coordinates back to base coordinate system
-            basecrds = applyTransMat(transformMat, abcrds)
-
-        else: # Standard B-form DNA
+        # Base coordinates were transformed with the others of its kind above
+        basecrds = pairedcrds[baseid]
 
-            # Now transform reference coordinates to base coordinate system
-            basecrds = applyTransMat(transformMat, refcrds)
-
-        # Write out PDB file sequentially
-        # Pass {filename, chain, residue number, atom number, residue type,
-        # atom types, base coords} to PDB writer
-        atomnum, mmatomnum = writePDBresidue(filename, chlist, chainnum, resnum, atomnum, \
-                                  mmatomnum, restype, refatoms, basecrds, pN, fpdb, fmm, fseg)
+        # Add residue to the chain written out at its end
+        chainres.append((resnum, restype, atomcols, basecrds))
 
         # Iterate residue indexing
         resnum += 1
         if basedown == -1:
 
+            # Write out the chain
+            atomnum, mmatomnum = writePDBchain(pdbfiles, chlist, chainnum,
+                                               chainres, atomnum, mmatomnum)
+            chainres = []
+
             # Standard PDB end chain
-            fpdb.write('TER\n')
-            
+            if 'single' in pdbfiles:
+                pdbfiles['single'].write('TER\n')
+
             # Multi-model PDB ends model here
-            fmm.write('\TER\nENDMDL\n')
+            if 'multimodel' in pdbfiles:
+                pdbfiles['multimodel'].write('\TER\nENDMDL\n')
 
             # Chain segment PDB end chain
-            fseg.write('TER\n')
+            if 'segid' in pdbfiles:
+                pdbfiles['segid'].write('TER\n')
 
 
             # Iterate chainnum and return mmatomnum to 1
@@ -1331,9 +1144,11 @@ def pdbgen(filename, hF, pN):
             else:
                 chlist = chainlist[chainnum - int(62*cc)]
                 
-    # close any open files
-    fpdb.close()
-    fmm.close()
-    fseg.close()
+    # Write out any residues left, and close any open files
+    writePDBchain(pdbfiles, chlist, chainnum, chainres, atomnum, mmatomnum)
+    if 'cif' in pdbfiles:
+        writeCIFfooter(pdbfiles['cif'])
+    for pdbfile in pdbfiles.values():
+        pdbfile.close()
     
     return 1
@@ -1,10 +1,56 @@
 import numpy as np
-from matplotlib import pyplot as plt
+from scipy import sparse
+from scipy.sparse.linalg import cg, splu
 
 from Automated_Design.constants import VERMILLION, REDPURPLE, SKYBLUE, WHITE
 
 
-def create_2d_mapping(edges, coordinates, faces):
+def graph_laplacian(edges, num_vert):
+    """
+    Graph Laplacian, degree minus adjacency, as a sparse matrix.  An edge
+    listed twice counts twice.
+    """
+    edges = np.asarray(edges, dtype=int).reshape(-1, 2)
+    rows = np.concatenate([edges[:, 0], edges[:, 1]])
+    cols = np.concatenate([edges[:, 1], edges[:, 0]])
+    adjacency = sparse.coo_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(num_vert, num_vert)).tocsr()
+    degree = np.asarray(adjacency.sum(axis=1)).ravel()
+    return (sparse.diags(degree) - adjacency).tocsr()
+
+
+def create_2d_mapping(edges, coordinates, faces, solver='direct', tol=1e-10,
+                      max_iter=None):
+    """
+    Maps the vertices onto the plane for the Schlegel diagram, by Tutte's
+    barycentric embedding: the vertices of the biggest face are fixed on the
+    unit circle, and every other vertex sits at the mean of its neighbors.
+
+    Parameters
+    ----------
+    edges : numpy.ndarray
+        Ex2 matrix where each row corresponds to one edge, denoting the
+        vertices being connected
+    coordinates : numpy.ndarray
+        Vx3 matrix of spatial coordinates of vertices; only their number is
+        used
+    faces : list
+        Vertex IDs of each face
+    solver : str
+        'direct' to solve the linear system for the free vertices by sparse
+        LU factorization, or 'iterative' to solve it by conjugate gradients,
+        until the residual is below `tol` relative to the right hand side
+    tol : float
+        Convergence tolerance of the iterative solver
+    max_iter : int
+        Maximum number of iterations of the iterative solver, by default
+        10 times the number of free vertices
+
+    Returns
+    -------
+    xycoord
+        Vx2 matrix of 2d coordinates of vertices
+    """
     # Choose Biggest Face:
     big_face = max(faces, key=len)
 
@@ -14,48 +60,48 @@ def create_2d_mapping(edges, coordinates, faces):
 
     # Initialize xycoord
     xycoord = np.zeros(shape=(num_vert, 2))
-    num_repeat = 10 * num_vert  # number of iterations to calculate xycoord
 
     # Set big face on unit circle
     angle = 2. * np.pi / num_face_vert
-
-    for i in range(num_face_vert):  # for each vertex in big face
-        xycoord[big_face[i]] = [np.cos(angle * i), np.sin(angle * i)]
-
-    # Calculate positions of other vertices through iterative process
-    for repeat_ID in range(num_repeat):
-
-        for vert_ID in range(num_vert):  # For each vertex,
-            if vert_ID not in big_face:  # that's not in big_face,
-                # move the xycoord of the given vertex to the centerpont
-                # of all neighboring nodes.
-
-                # # Find vert_ID
-                find_vert_row, find_vert_col = np.where(edges == vert_ID)
-
-                # # Find neighbors
-                neighbors = []
-                for row, col in zip(find_vert_row, find_vert_col):
-                    find_vert_col_nbr = 1 - col
-                    neighbors.append(edges[row, find_vert_col_nbr])
-                neighbors = np.array(neighbors, dtype=np.int)
-
-                # # Get neighbor coords
-                nbr_coord = xycoord[neighbors, :]
-
-                # # # Find midpoint
-                num_nbr = len(find_vert_col)
-                midpt = np.array(
-                    [sum(nbr_coord[:, 0]), sum(nbr_coord[:, 1])]
-                ) / num_nbr
-
-                # # Store as new xycoord for vert_ID
-                xycoord[vert_ID, :] = midpt
+    face_angles = angle * np.arange(num_face_vert)
+    xycoord[big_face] = np.column_stack([np.cos(face_angles),
+                                         np.sin(face_angles)])
+
+    is_fixed = np.zeros(num_vert, dtype=bool)
+    is_fixed[big_face] = True
+    free = np.flatnonzero(~is_fixed)
+    fixed = np.flatnonzero(is_fixed)
+    if not len(free):
+        return xycoord
+
+    # Every free vertex at the mean of its neighbors is, in terms of the
+    # Laplacian L, L[free, free] * xy[free] = -L[free, fixed] * xy[fixed]
+    laplacian = graph_laplacian(edges, num_vert)
+    laplacian_free = laplacian[free]
+    free_block = laplacian_free[:, free].tocsc()
+    rhs = -laplacian_free[:, fixed].dot(xycoord[fixed])
+
+    if solver == 'direct':
+        xycoord[free] = splu(free_block).solve(rhs)
+    elif solver == 'iterative':
+        if max_iter is None:
+            max_iter = 10 * len(free)
+        for axis in range(2):
+            xycoord[free, axis], info = cg(free_block, rhs[:, axis], tol=tol,
+                                           maxiter=max_iter)
+            if info > 0:
+                raise Exception('Schlegel layout did not converge to {} '
+                                'within {} iterations'.format(tol, max_iter))
+    else:
+        raise Exception("Unknown solver '{}', expected 'direct' or "
+                        "'iterative'".format(solver))
     return xycoord
 
 
 def plot_schlegel(edges, edge_type_graph, xycoord,
                   schlegel_filename):  # pragma: no cover
+    import matplotlib.pyplot as plt
+
     f = plt.figure(2, figsize=(8, 8))
     f.clf()
     plt.xlim((-1.2, 1.2))
@@ -0,0 +1,232 @@
+import itertools
+import multiprocessing
+import threading
+import time
+import traceback
+
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+def _run_job(conn, func, args):
+    """
+    Runs one job in a worker process and sends its outcome back.
+    """
+    try:
+        outcome = (FINISHED, func(*args))
+    except Exception:
+        outcome = (FAILED, traceback.format_exc())
+    conn.send(outcome)
+    conn.close()
+
+
+class Job(object):
+    def __init__(self, job_id, args):
+        self.job_id = job_id
+        self.args = args
+        self.state = QUEUED
+        self.value = None
+        self.process = None
+        self.conn = None
+        self.started = None
+        self.ended = None
+
+
+class JobQueue(object):
+    def __init__(self, func, processes=None, poll_interval=0.1,
+                 time_limit=None, keep_ended=3600):
+        """
+        Runs calls to one function as jobs, each in its own worker process,
+        with at most `processes` of them running at a time.  Jobs start in
+        the order they are submitted.
+
+        Each job has its own process, rather than sharing those of a pool,
+        so that a running job can be cancelled by terminating it.
+
+        A job is forgotten once `result` has returned it (or raised its
+        error), or `keep_ended` seconds after it ended if its result is never
+        asked for, so that a long-running queue does not keep every job.
+
+        Parameters
+        ----------
+        func : callable
+            Module level function run by each job.  It and its arguments must
+            be picklable, as must what it returns.
+        processes : int
+            Maximum number of jobs running at a time.  Defaults to the number
+            of CPUs.
+        poll_interval : float
+            Seconds between checks for running jobs that have ended
+        time_limit : float
+            If given, jobs still running after this many seconds are
+            terminated and fail
+        keep_ended : float
+            Seconds a job that has ended is kept for, if `result` is not
+            called for it
+        """
+        self.func = func
+        self.processes = processes or multiprocessing.cpu_count()
+        self.poll_interval = poll_interval
+        self.time_limit = time_limit
+        self.keep_ended = keep_ended
+        self.jobs = {}
+        self.queued = []
+        self.running = []
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._closed = False
+
+        self._watcher = threading.Thread(target=self._watch)
+        self._watcher.daemon = True
+        self._watcher.start()
+
+    def submit(self, *args):
+        """
+        Queues a call to `func` with the given arguments.
+
+        Returns
+        -------
+        int
+            ID of the job, to be passed to the other methods
+        """
+        with self._lock:
+            if self._closed:
+                raise Exception('Job queue has been shut down')
+            job = Job(next(self._job_ids), args)
+            self.jobs[job.job_id] = job
+            self.queued.append(job)
+            self._start_queued()
+        return job.job_id
+
+    def status(self, job_id):
+        """
+        Returns the state of a job: 'queued', 'running', 'finished', 'failed'
+        or 'cancelled'.
+        """
+        with self._lock:
+            return self._get_job(job_id).state
+
+    def result(self, job_id):
+        """
+        Waits for a job to end and returns what `func` returned.  The job is
+        then forgotten, and its ID no longer known.
+
+        Raises an Exception if the job failed, with the traceback from the
+        worker process, or if it was cancelled.
+        """
+        with self._lock:
+            job = self._get_job(job_id)
+            while job.state in (QUEUED, RUNNING):
+                self._changed.wait(self.poll_interval)
+            self.jobs.pop(job_id, None)
+            if job.state == FAILED:
+                raise Exception('Job {} failed:\n{}'.format(job_id, job.value))
+            if job.state == CANCELLED:
+                raise Exception('Job {} was cancelled'.format(job_id))
+            return job.value
+
+    def cancel(self, job_id):
+        """
+        Cancels a job, terminating its worker process if it is running.
+
+        Returns
+        -------
+        bool
+            True if the job was cancelled, False if it had already ended
+        """
+        with self._lock:
+            job = self._get_job(job_id)
+            if job.state == QUEUED:
+                self.queued.remove(job)
+                job.ended = time.time()
+                job.args = None
+            elif job.state == RUNNING:
+                job.process.terminate()
+                self._end(job, CANCELLED, None)
+                self._start_queued()
+            else:
+                return False
+            job.state = CANCELLED
+            self._changed.notify_all()
+            return True
+
+    def shutdown(self):
+        """
+        Cancels all jobs that have not ended and stops the queue.
+        """
+        with self._lock:
+            self._closed = True
+            job_ids = [job.job_id for job in self.queued + self.running]
+        for job_id in job_ids:
+            self.cancel(job_id)
+
+    def _get_job(self, job_id):
+        if job_id not in self.jobs:
+            raise Exception('Unknown job ID {}'.format(job_id))
+        return self.jobs[job_id]
+
+    def _start_queued(self):
+        while self.queued and len(self.running) < self.processes:
+            job = self.queued.pop(0)
+            parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+            job.conn = parent_conn
+            job.process = multiprocessing.Process(
+                target=_run_job, args=(child_conn, self.func, job.args))
+            job.process.daemon = True
+            job.process.start()
+            child_conn.close()
+            job.started = time.time()
+            job.state = RUNNING
+            self.running.append(job)
+
+    def _end(self, job, state, value):
+        job.process.join()
+        job.conn.close()
+        job.process = job.conn = None
+        job.state = state
+        job.value = value
+        job.ended = time.time()
+        job.args = None  # not needed any more, and may be large
+        self.running.remove(job)
+
+    def _collect_ended(self):
+        for job in list(self.running):
+            if job.conn.poll():
+                try:
+                    state, value = job.conn.recv()
+                except EOFError:
+                    state, value = FAILED, 'Worker process exited with ' \
+                        'code {}'.format(job.process.exitcode)
+            elif not job.process.is_alive() and not job.conn.poll():
+                state, value = FAILED, 'Worker process exited with code ' \
+                    '{}'.format(job.process.exitcode)
+            elif self.time_limit is not None and \
+                    time.time() - job.started > self.time_limit:
+                job.process.terminate()
+                state, value = FAILED, 'Timed out after {} s'.format(
+                    self.time_limit)
+            else:
+                continue
+            self._end(job, state, value)
+            self._changed.notify_all()
+        self._start_queued()
+
+    def _forget_expired(self):
+        expired_before = time.time() - self.keep_ended
+        for job_id, job in list(self.jobs.items()):
+            if job.ended is not None and job.ended < expired_before:
+                del self.jobs[job_id]
+
+    def _watch(self):
+        while True:
+            with self._lock:
+                if self._closed and not self.running:
+                    return
+                self._collect_ended()
+                self._forget_expired()
+            time.sleep(self.poll_interval)
@@ -0,0 +1,279 @@
+from collections import OrderedDict
+
+import numpy as np
+
+# PLY property types and the numpy types they are read as
+ply_types = {'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+             'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+             'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+             'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8'}
+
+# PLY formats and their byte orders, None for text
+ply_formats = {'ascii': None, 'binary_little_endian': '<',
+               'binary_big_endian': '>'}
+
+
+class PlyProperty(object):
+    def __init__(self, name, dtype, count_dtype=None):
+        """
+        One property of a PLY element.  List properties, e.g. the vertex
+        indices of faces, have the type of their length as count_dtype and
+        the type of their items as dtype.
+        """
+        self.name = name
+        self.dtype = dtype
+        self.count_dtype = count_dtype
+
+    @property
+    def is_list(self):
+        return self.count_dtype is not None
+
+
+class PlyElement(object):
+    def __init__(self, name, count):
+        """
+        One element of a PLY file, e.g. 'vertex' or 'face': its number of
+        rows and the properties of each row.
+        """
+        self.name = name
+        self.count = count
+        self.properties = []
+
+    def row_dtype(self, byte_order):
+        """
+        Structured type of one row, if the element has no list properties.
+        """
+        return np.dtype([(prop.name, byte_order + prop.dtype)
+                         for prop in self.properties])
+
+
+def _ply_type(type_name, line):
+    if type_name not in ply_types:
+        raise Exception("Unknown PLY property type '{}' in header line "
+                        "'{}'".format(type_name, line))
+    return ply_types[type_name]
+
+
+def read_ply_header(f):
+    """
+    Reads the header of a PLY file, from a file opened in binary mode, up to
+    and including the end_header line.
+
+    Returns
+    -------
+    ply_format
+        'ascii', 'binary_little_endian' or 'binary_big_endian'
+    elements
+        List of PlyElement, in the order of the file
+    """
+    if f.readline().strip() != b'ply':
+        raise Exception('Not a PLY file: {}'.format(getattr(f, 'name', f)))
+    ply_format = None
+    elements = []
+    while True:
+        raw_line = f.readline()
+        if not raw_line:
+            raise Exception('PLY header has no end_header line')
+        line = raw_line.decode('ascii', 'replace').strip()
+        words = line.split()
+        if not words or words[0] in ('comment', 'obj_info'):
+            continue
+        if words[0] == 'end_header':
+            break
+        if words[0] == 'format':
+            if len(words) < 2 or words[1] not in ply_formats:
+                raise Exception("Unknown PLY format in header line "
+                                "'{}'".format(line))
+            ply_format = words[1]
+        elif words[0] == 'element' and len(words) == 3:
+            elements.append(PlyElement(words[1], int(words[2])))
+        elif words[0] == 'property' and elements:
+            if words[1] == 'list' and len(words) == 5:
+                elements[-1].properties.append(PlyProperty(
+                    words[4], _ply_type(words[3], line),
+                    _ply_type(words[2], line)))
+            elif len(words) == 3:
+                elements[-1].properties.append(PlyProperty(
+                    words[2], _ply_type(words[1], line)))
+            else:
+                raise Exception("Malformed PLY header line '{}'".format(line))
+        else:
+            raise Exception("Malformed PLY header line '{}'".format(line))
+    if ply_format is None:
+        raise Exception('PLY header has no format line')
+    return ply_format, elements
+
+
+def _read_ascii_element(element, lines):
+    data = OrderedDict()
+    if not any(prop.is_list for prop in element.properties):
+        # Fixed number of values per row: parse them all in one go.  Values
+        # are read as double or int64, whatever their type, so that numbers
+        # written as text keep all their digits.
+        values = np.array(b' '.join(lines).split(), dtype=np.float64)
+        if len(values) != element.count * len(element.properties):
+            raise Exception('PLY {} rows should have {} values each'.format(
+                element.name, len(element.properties)))
+        values = values.reshape(element.count, len(element.properties))
+        for col, prop in enumerate(element.properties):
+            is_float = np.dtype(prop.dtype).kind == 'f'
+            data[prop.name] = values[:, col] if is_float else \
+                values[:, col].astype(np.int64)
+        return data
+
+    columns = [[] for _ in element.properties]
+    for line in lines:
+        words = line.split()
+        pos = 0
+        for col, prop in enumerate(element.properties):
+            is_float = np.dtype(prop.dtype).kind == 'f'
+            if prop.is_list:
+                count = int(words[pos])
+                items = words[pos + 1:pos + 1 + count]
+                if len(items) != count:
+                    raise Exception('PLY {} row has {} of its {} list items: '
+                                    '{}'.format(element.name, len(items),
+                                                count, line.strip()))
+                columns[col].append(np.array(
+                    items, dtype=np.float64 if is_float else np.int64))
+                pos += 1 + count
+            else:
+                columns[col].append(float(words[pos]) if is_float
+                                    else int(words[pos]))
+                pos += 1
+    for col, prop in enumerate(element.properties):
+        data[prop.name] = columns[col] if prop.is_list else \
+            np.array(columns[col])
+    return data
+
+
+def _read_binary_element(element, body, offset, byte_order):
+    data = OrderedDict()
+    if not any(prop.is_list for prop in element.properties):
+        row_dtype = element.row_dtype(byte_order)
+        rows = np.frombuffer(body, dtype=row_dtype, count=element.count,
+                             offset=offset)
+        for prop in element.properties:
+            data[prop.name] = rows[prop.name].astype(prop.dtype)
+        return data, offset + row_dtype.itemsize * element.count
+
+    # Rows of a mesh usually all have lists of the same length, e.g. faces
+    # that are all triangles.  Try reading them all as such first.
+    if len(element.properties) == 1 and element.count:
+        prop = element.properties[0]
+        count_dtype = np.dtype(byte_order + prop.count_dtype)
+        item_dtype = np.dtype(byte_order + prop.dtype)
+        length = int(np.frombuffer(body, dtype=count_dtype, count=1,
+                                   offset=offset)[0])
+        row_dtype = np.dtype([('count', count_dtype),
+                              ('items', item_dtype, (length,))])
+        end = offset + row_dtype.itemsize * element.count
+        if end <= len(body):
+            rows = np.frombuffer(body, dtype=row_dtype, count=element.count,
+                                 offset=offset)
+            if np.all(rows['count'] == length):
+                items = rows['items'].reshape(element.count, length)
+                data[prop.name] = list(items.astype(prop.dtype))
+                return data, end
+
+    columns = [[] for _ in element.properties]
+    for _ in range(element.count):
+        for col, prop in enumerate(element.properties):
+            item_dtype = np.dtype(byte_order + prop.dtype)
+            if prop.is_list:
+                count_dtype = np.dtype(byte_order + prop.count_dtype)
+                count = int(np.frombuffer(body, dtype=count_dtype, count=1,
+                                          offset=offset)[0])
+                offset += count_dtype.itemsize
+            else:
+                count = 1
+            values = np.frombuffer(body, dtype=item_dtype, count=count,
+                                   offset=offset).astype(prop.dtype)
+            offset += item_dtype.itemsize * count
+            columns[col].append(values if prop.is_list else values[0])
+    for col, prop in enumerate(element.properties):
+        data[prop.name] = columns[col] if prop.is_list else \
+            np.array(columns[col], dtype=prop.dtype)
+    return data, offset
+
+
+def read_ply(filename):
+    """
+    Reads all elements of a PLY file, ASCII or binary.
+
+    Binary files are memory mapped, and elements whose rows have a fixed
+    size, such as vertices, are read as one block.  So are lists of the same
+    length in every row, such as the faces of a triangle mesh.
+
+    Returns
+    -------
+    OrderedDict
+        For each element, e.g. 'vertex', an OrderedDict from each property
+        name to an array of its values, or for list properties, to a list of
+        arrays, one per row
+    """
+    with open(filename, 'rb') as f:
+        ply_format, elements = read_ply_header(f)
+        header_size = f.tell()
+        if ply_format == 'ascii':
+            lines = [line for line in f.read().splitlines() if line.strip()]
+
+    data = OrderedDict()
+    if ply_format == 'ascii':
+        start = 0
+        for element in elements:
+            element_lines = lines[start:start + element.count]
+            if len(element_lines) < element.count:
+                raise Exception('PLY file {} ends within its {} '
+                                'element'.format(filename, element.name))
+            data[element.name] = _read_ascii_element(element, element_lines)
+            start += element.count
+        return data
+
+    offset = 0
+    element = elements[0] if elements else None
+    try:
+        body = b''
+        if any(element.count for element in elements):
+            body = np.memmap(filename, dtype=np.uint8, mode='r',
+                             offset=header_size)
+        for element in elements:
+            data[element.name], offset = _read_binary_element(
+                element, body, offset, ply_formats[ply_format])
+    except ValueError:  # read past the end of the file
+        raise Exception('PLY file {} ends within its {} '
+                        'element'.format(filename, element.name))
+    return data
+
+
+def read_ply_geometry(filename):
+    """
+    Reads the vertex coordinates and faces of a PLY file.  Other elements and
+    properties, e.g. vertex normals or colors, are ignored.
+
+    Returns
+    -------
+    coordinates
+        Vx3 array of the x, y and z of each vertex, as double
+    faces
+        List of F lists, the vertex IDs of each face
+    """
+    data = read_ply(filename)
+    if 'vertex' not in data or 'face' not in data:
+        raise Exception('PLY file {} needs both vertex and face '
+                        'elements'.format(filename))
+    vertices = data['vertex']
+    for axis in ('x', 'y', 'z'):
+        if axis not in vertices:
+            raise Exception('PLY file {} has no {} vertex '
+                            'property'.format(filename, axis))
+    coordinates = np.column_stack([vertices[axis].astype(np.float64)
+                                   for axis in ('x', 'y', 'z')])
+
+    face_lists = [name for name in ('vertex_indices', 'vertex_index')
+                  if name in data['face']]
+    if not face_lists:
+        raise Exception('PLY file {} has no vertex_indices face '
+                        'property'.format(filename))
+    faces = [face.tolist() for face in data['face'][face_lists[0]]]
+    return coordinates, faces
@@ -1,10 +1,10 @@
 from os import path
 import numpy as np
 
-from matplotlib import pyplot as plt
+from Automated_Design.ply_reader import read_ply_geometry
 
 
-def extract_file_reader_and_shape_name_from_input_filename(input_filename):
+def extract_filename_and_shape_name_from_input_filename(input_filename):
     if input_filename[-4:] == '.ply':
         fname_no_ply = input_filename[:-4]
         full_filename = input_filename
@@ -13,9 +13,8 @@ def extract_file_reader_and_shape_name_from_input_filename(input_filename):
         full_filename = input_filename + '.ply'
     assert path.isfile(full_filename)
 
-    f = open(full_filename)
     shape_name = path.basename(path.normpath(fname_no_ply))
-    return f, shape_name
+    return full_filename, shape_name
 
 
 def ply_to_input(input_filename, results_foldername=None, min_len_nt=31, Aform=False):
@@ -24,10 +23,15 @@ def ply_to_input(input_filename, results_foldername=None, min_len_nt=31, Aform=F
     Converts PLY file into design variables for DX_cage_design input.
 
     This function parses the ply-formatted file pointed to by the given
-    `input_filename`.  First, it directly reads in all shape data.  Second,
+    `input_filename`, ASCII or binary, with `read_ply_geometry`.  First, it
+    directly reads in all shape data.  Second,
     it parses out some meta-variables to be used for scaffold creaction.
     Optionally, it also creates plots for edge length distributions.
 
+    The faces must close into a consistently oriented surface: every edge is
+    the side of exactly two faces, which go along it in opposite directions.
+    An exception is raised otherwise.
+
     Parameters
     ----------
     input_filename : str
@@ -65,108 +69,91 @@ def ply_to_input(input_filename, results_foldername=None, min_len_nt=31, Aform=F
         `0` if double crossover vertex staples should be used.
     """
 
-    f, shape_name = extract_file_reader_and_shape_name_from_input_filename(
-        input_filename)
-
-    def extract_number_from_keyword_in_ply_file(filestream, keyword):
-        # Eat (read through) all lines up to and including line with `keyword`:
-        line = ''
-        while keyword not in line:
-            line = filestream.readline()
-
-        # grab last whitespace-delimited bit from line and convert to int:
-        number = int(line.strip().split()[-1])
-
-        return number
-
-    num_vert = extract_number_from_keyword_in_ply_file(f, 'element vertex')
-    num_faces = extract_number_from_keyword_in_ply_file(f, 'element face')
-
-    def extract_coordinates_from_file(filestream, number_of_vertices):
-        # read lines up to and including the one containing 'end header':
-        temp = ''
-        while 'end_header' not in temp:  # not strict equality, because
-            temp = filestream.readline()
-
-        coordinates_as_list = []
-        for i in range(number_of_vertices):
-            line = filestream.readline()
-            line_as_list = line.split()
-            coords_on_this_line = map(float, line_as_list)
-            coordinates_as_list.append(coords_on_this_line)
-
-        return coordinates_as_list
-
-    coordinates = extract_coordinates_from_file(f, num_vert)
-
-    def extract_faces_from_file(filestream, number_of_faces):
-
-        faces_as_list = []
-        for face_id in range(number_of_faces):
-            line = filestream.readline()
-            line_as_list_of_ints = map(int, line.strip().split())
-            number_of_vertices = line_as_list_of_ints[0]
-            vertices = line_as_list_of_ints[1:]
-
-            assert number_of_vertices == len(vertices)
-            faces_as_list.append(vertices)
-
-        return faces_as_list
-
-    faces = extract_faces_from_file(f, num_faces)
-
-    def remove_unused_vertices(coordinates, faces, number_of_vertices):
-        # Determine if you need to clean the vertex indices:
-        used_face_ids_as_list = []
-        for vertices in faces:
-            used_face_ids_as_list += vertices
-        unique_used_faces_as_set = set(used_face_ids_as_list)
-        # sort to enforce consistency:
-        unique_used_faces_as_list = sorted(list(unique_used_faces_as_set))
-        cleaning_needed = len(unique_used_faces_as_set) < number_of_vertices
-
-        # Then clean if needed:
-        if cleaning_needed:
-            # Remove unused row from coordinates data.
-            new_coordinates = []
-            for i, row in enumerate(coordinates):
-                if i in unique_used_faces_as_set:
-                    new_coordinates.append(row)
-            coordinates = new_coordinates
-
-            new_faces = []
-            for current_vertices in faces:
-                new_vertices = []
-                for vertex in current_vertices:
-                    new_vertex = unique_used_faces_as_list.index(vertex)
-                    new_vertices.append(new_vertex)
-                new_faces.append(new_vertices)
-            faces = new_faces
-
-        return coordinates, faces
-
-    coordinates, faces = remove_unused_vertices(coordinates, faces, num_vert)
-
-    def get_edges_from_faces(faces):
-        edges = []
-        for vertices in faces:
-            curr_face = list(vertices)  # force python to make make copy
-            curr_face += [curr_face[0]]
-            for i in range(len(curr_face)-1):
-                if curr_face[i + 1] > curr_face[i]:
-                    edges.append((curr_face[i + 1], curr_face[i]))
-        return np.array(edges)
-
-    edges = get_edges_from_faces(faces)
+    full_filename, shape_name = \
+        extract_filename_and_shape_name_from_input_filename(input_filename)
+
+    # Vertex coordinates as a Vx3 array, and faces as lists of vertex IDs
+    coordinates, faces = read_ply_geometry(full_filename)
+    num_vert = len(coordinates)
+
+    def get_padded_faces(faces, number_of_vertices):
+        # Faces as an F x (longest face) array of vertex IDs, padded with -1
+        face_sizes = np.array([len(vertices) for vertices in faces])
+        padded_faces = -np.ones((len(faces), face_sizes.max()), dtype=np.int64)
+        in_face = np.arange(padded_faces.shape[1]) < face_sizes[:, np.newaxis]
+        padded_faces[in_face] = np.concatenate(faces)
+        used_ids = padded_faces[in_face]
+        if used_ids.min() < 0 or used_ids.max() >= number_of_vertices:
+            raise Exception('PLY faces use vertex IDs outside 0 to {}'.format(
+                number_of_vertices - 1))
+        return padded_faces, face_sizes, in_face
+
+    padded_faces, face_sizes, in_face = get_padded_faces(faces, num_vert)
+
+    def remove_unused_vertices(coordinates, padded_faces, in_face,
+                               number_of_vertices):
+        # Renumber the vertices used by faces 0, 1, 2, ... in order of their
+        # old IDs, and drop the rest
+        unique_used_ids, new_ids = np.unique(padded_faces[in_face],
+                                             return_inverse=True)
+        if len(unique_used_ids) < number_of_vertices:
+            coordinates = coordinates[unique_used_ids]
+            padded_faces = padded_faces.copy()
+            padded_faces[in_face] = new_ids
+        return coordinates, padded_faces
+
+    coordinates, padded_faces = remove_unused_vertices(
+        coordinates, padded_faces, in_face, num_vert)
+    num_vert = len(coordinates)
+    faces = [vertices[:face_size] for vertices, face_size
+             in zip(padded_faces.tolist(), face_sizes)]
+
+    def get_half_edges(padded_faces, face_sizes, in_face):
+        # Each face goes round its vertices, from each one to the next, and
+        # from the last back to the first.  Half-edges are in order of faces,
+        # then of their vertices.
+        face_ids, positions = np.nonzero(in_face)
+        tails = padded_faces[face_ids, positions]
+        heads = padded_faces[face_ids, (positions + 1) % face_sizes[face_ids]]
+        return tails, heads
+
+    tails, heads = get_half_edges(padded_faces, face_sizes, in_face)
+
+    def check_edges_are_manifold(tails, heads, number_of_vertices):
+        # Every edge must be the side of exactly two faces, which go along it
+        # in opposite directions.  Otherwise the faces do not close into a
+        # consistently oriented surface, and the scaffold cannot be routed.
+        if np.any(tails == heads):
+            raise Exception('PLY faces have repeated vertices, e.g. vertex '
+                            '{}'.format(tails[tails == heads][0]))
+        half_edge_keys = tails * number_of_vertices + heads
+        sorted_keys = np.sort(half_edge_keys)
+        repeated = sorted_keys[1:][sorted_keys[1:] == sorted_keys[:-1]]
+        if len(repeated):
+            raise Exception('PLY edge ({}, {}) is the side of more than two '
+                            'faces, or of two faces that are not consistently '
+                            'oriented'.format(*divmod(repeated[0],
+                                                      number_of_vertices)))
+        twin_keys = heads * number_of_vertices + tails
+        unpaired = ~np.in1d(twin_keys, half_edge_keys)
+        if np.any(unpaired):
+            raise Exception('PLY edge ({}, {}) is the side of only one '
+                            'face'.format(tails[unpaired][0],
+                                          heads[unpaired][0]))
+
+    check_edges_are_manifold(tails, heads, num_vert)
+
+    def get_edges_from_half_edges(tails, heads):
+        # One edge for each pair of half-edges, (higher ID, lower ID), taken
+        # from the half-edge that goes up
+        goes_up = heads > tails
+        return np.column_stack((heads[goes_up], tails[goes_up]))
+
+    edges = get_edges_from_half_edges(tails, heads)
 
     def get_edge_lengths(edges, coordinates):
-        edge_length_vec = []
-        for edge in edges:
-            beginning, end = edge
-            length = np.linalg.norm(np.array(coordinates[beginning]) -
-                                    np.array(coordinates[end]))
-            edge_length_vec.append(length)
-        return edge_length_vec
+        edge_vectors = coordinates[edges[:, 0]] - coordinates[edges[:, 1]]
+        return np.sqrt(np.sum(edge_vectors * edge_vectors, axis=1))
 
     edge_length_PLY = get_edge_lengths(edges, coordinates)
 
@@ -230,6 +217,8 @@ def plot_edge_length_distributions(shape_name,
                                    rounded_edge_length_PLY,
                                    results_foldername,
 								   Aform):  # pragma: no cover
+    import matplotlib.pyplot as plt
+
     min_len_nt = min(rounded_edge_length_PLY)
     max_len_nt = max(rounded_edge_length_PLY)
     bins_for_hist = range(min_len_nt, max_len_nt + 3, 1)
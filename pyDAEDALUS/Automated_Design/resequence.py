@@ -0,0 +1,187 @@
+import copy
+import pickle
+from os import path, makedirs
+
+import numpy as np
+
+from Automated_Design.csv_staples import csv_staples
+from Automated_Design.DX_cage_design import design_file_name
+from Automated_Design.dna_info import DnaTopology
+from Automated_Design.gen_PDB import pdbgen
+from Automated_Design.gen_stap_seq import gen_stap_seq
+from Automated_Design.seq_to_text import seqtoText
+
+# Scaffold routing, staple placement and the geometry of a design depend only
+# on the shape and helical form, not on the scaffold sequence.  Given a design
+# saved by DX_cage_design, these regenerate only what does depend on it: the
+# staple sequences, the sequences in dnaTop, and the files holding them.
+#
+# e.g. to screen scaffolds:
+#   route_info, dnaInfo = load_design('TestProject', full_file_name)
+#   for scaf_name, scaf_seq in scaffolds:
+#       new_route_info, new_dnaInfo = resequence_design(
+#           route_info, dnaInfo, scaf_seq, scaf_name)
+#       ...
+#       save_design(new_route_info, new_dnaInfo, 'TestProject_' + scaf_name)
+
+# Base paired to each scaffold base, by ASCII code, as in gen_stap_seq.
+# 0 marks bases that are not recognized.
+complement = np.zeros(256, dtype=np.uint8)
+for base, paired in [('A', 'T'), ('T', 'A'), ('G', 'C'), ('C', 'G'),
+                     ('U', 'A')]:
+    complement[ord(base)] = ord(paired)
+
+
+def load_design(results_foldername, full_file_name):
+    """
+    Loads the route info and DnaInfo pickles saved by DX_cage_design.
+
+    Returns
+    -------
+    route_info
+        dict saved as routeInfo_[full_file_name].pickle
+    dnaInfo
+        DnaInfo object saved as dnaInfo_[full_file_name].pickle
+    """
+    with open(path.join(results_foldername, 'routeInfo_' + full_file_name +
+                        '.pickle'), 'rb') as f:
+        route_info = pickle.load(f)
+    if 'staples' not in route_info:
+        raise Exception('routeInfo_{}.pickle was saved by an older version, '
+                        'without the staples needed to resequence it; design '
+                        'it again first'.format(full_file_name))
+    with open(path.join(results_foldername, 'dnaInfo_' + full_file_name +
+                        '.pickle'), 'rb') as f:
+        dnaInfo = pickle.load(f)
+    return route_info, dnaInfo
+
+
+def resequence_design(route_info, dnaInfo, scaf_seq, scaf_name):
+    """
+    Gives a design a new scaffold sequence, keeping its routing, staples and
+    geometry.
+
+    Parameters
+    ----------
+    route_info : dict
+        Route info of the design, from load_design
+    dnaInfo : DnaInfo
+        DnaInfo of the design, from load_design.  It is left as is.
+    scaf_seq : str
+        New scaffold sequence, at least as long as the scaffold of the design
+    scaf_name : str
+        Name of the new scaffold, used in staple and file names
+
+    Returns
+    -------
+    route_info
+        New route info, with the new staple sequences
+    dnaInfo
+        New DnaInfo, with the new sequences in dnaTop.  Its dnaGeom and the
+        other dnaTop fields are shared with the given dnaInfo.
+    """
+    scaf_seq = ''.join(scaf_seq.split()).upper()
+    n_bp = len(dnaInfo.dnaGeom.dNode)
+    if len(scaf_seq) < n_bp:
+        raise Exception('Scaffold sequence {} is {} nt long, but the design '
+                        'needs {} nt'.format(scaf_name, len(scaf_seq), n_bp))
+
+    [stap_seq, stap_seq_list, stap_list,
+     named_stap_seq_list] = gen_stap_seq(route_info['staples'], scaf_seq,
+                                         route_info['staple_name'], scaf_name,
+                                         route_info['len_scaf_used'])
+
+    # Every staple base pairs with the scaffold base across from it, and the
+    # polyT loops, which pair with nothing, are all T
+    dna_top = dnaInfo.dnaTop
+    if not isinstance(dna_top, DnaTopology):  # e.g. from an old pickle
+        dna_top = DnaTopology.from_dna_tops(dna_top)
+    dna_top = copy.copy(dna_top)
+    dna_top.seq = np.empty(len(dna_top), dtype=np.uint8)
+    dna_top.set_seq(np.arange(n_bp), scaf_seq[:n_bp])
+    across = dna_top.across[n_bp:]
+    dna_top.seq[n_bp:] = np.where(
+        across >= 0, complement[dna_top.seq[np.maximum(across, 0)]],
+        ord('T'))
+
+    new_dnaInfo = copy.copy(dnaInfo)
+    new_dnaInfo.dnaTop = dna_top
+
+    new_route_info = dict(route_info)
+    new_route_info.update(scaf_seq=scaf_seq, scaf_name=scaf_name,
+                          stap_list=stap_list, stap_seq_list=stap_seq_list,
+                          named_stap_seq_list=named_stap_seq_list)
+    return new_route_info, new_dnaInfo
+
+
+def save_design(route_info, dnaInfo, results_foldername, pdb=False):
+    """
+    Saves the files of a resequenced design that depend on its sequence: the
+    route info and DnaInfo pickles, the .cndo file, the staple sequences
+    .csv, the sequence text file and, if pdb is True, the PDB files.  Its
+    plots and Schlegel diagram are the same as those of the original design.
+
+    Returns
+    -------
+    full_file_name
+        The name shared by the saved files
+    """
+    if not path.exists(results_foldername):
+        makedirs(results_foldername)
+    full_file_name = design_file_name(
+        path.split(route_info['file_name'])[1], route_info['scaf_name'],
+        route_info['singleXOs'])
+
+    def full_path(filename):
+        return path.join(results_foldername, filename)
+
+    with open(full_path('dnaInfo_' + full_file_name + '.pickle'), 'wb') as f:
+        pickle.dump(dnaInfo, f)
+    with open(full_path('routeInfo_' + full_file_name + '.pickle'),
+              'wb') as f:
+        pickle.dump(route_info, f)
+    dnaInfo.save_dna_info_to_cando_file(full_path(full_file_name + '.cndo'))
+    csv_staples(full_file_name, route_info['named_stap_seq_list'],
+                results_foldername)
+    seqtoText(route_info['scaf_to_edge'], route_info['edges'], dnaInfo,
+              route_info['file_name'], route_info['scaf_name'],
+              route_info['singleXOs'],
+              full_path('seq_{}.txt'.format(full_file_name)),
+              route_info['Aform'])
+    if pdb:
+        pdbgen(full_file_name, route_info['Aform'], results_foldername,
+               dnaInfo)
+    return full_file_name
+
+
+def resequence(results_foldername, full_file_name, scaf_seq, scaf_name,
+               out_foldername=None, pdb=False):
+    """
+    Resequences a design saved by DX_cage_design with another scaffold, and
+    saves its new files.
+
+    Parameters
+    ----------
+    results_foldername : str
+        Folder the design was saved into
+    full_file_name : str
+        The name shared by the files of the design
+    scaf_seq : str
+        New scaffold sequence
+    scaf_name : str
+        Name of the new scaffold
+    out_foldername : str, optional
+        Folder to save the new files into, results_foldername by default
+    pdb : bool, optional
+        If True, also generate the PDB files
+
+    Returns
+    -------
+    full_file_name
+        The name shared by the new files
+    """
+    route_info, dnaInfo = load_design(results_foldername, full_file_name)
+    route_info, dnaInfo = resequence_design(route_info, dnaInfo, scaf_seq,
+                                            scaf_name)
+    return save_design(route_info, dnaInfo,
+                       out_foldername or results_foldername, pdb)
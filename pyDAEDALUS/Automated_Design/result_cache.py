@@ -0,0 +1,230 @@
+import hashlib
+import json
+import shutil
+import tempfile
+import time
+from os import listdir, makedirs, path, remove, rename, utime
+
+import numpy as np
+
+# Bump whenever a change to the design code changes its output files, so that
+# designs cached by earlier versions are no longer used.
+CACHE_VERSION = 3
+
+MANIFEST = 'manifest.json'
+
+
+def _hash_array(h, values, dtype):
+    arr = np.ascontiguousarray(values, dtype=dtype)
+    h.update('{}{}'.format(arr.dtype.str, arr.shape).encode('ascii'))
+    h.update(arr.tobytes())
+
+
+def _hash_text(h, text):
+    text = text.encode('utf-8') if not isinstance(text, bytes) else text
+    h.update('{}:'.format(len(text)).encode('ascii'))
+    h.update(text)
+
+
+def design_key(geometry, minEdgeLen, hForm, twist, scaf_seq, scaf_name,
+               artifacts, spanning_tree=None):
+    """
+    Hashes everything the output of a design depends on.
+
+    Parameters
+    ----------
+    geometry : list
+        Output of ply_to_input: coordinates, edges, faces, edge_length_vec,
+        structure_name, staple_name and singleXOs
+    minEdgeLen, hForm, twist
+        Design settings, from get_form_settings
+    scaf_seq, scaf_name
+        Scaffold sequence and name, both [] for the default scaffold
+    artifacts
+        Names of the output files saved
+    spanning_tree
+        Keyword arguments picking the spanning tree, or None for the default
+
+    Returns
+    -------
+    str
+        Hex digest, used as the name of the cache entry
+    """
+    coordinates, edges, faces, edge_length_vec, structure_name, \
+        staple_name, singleXOs = geometry
+    h = hashlib.sha256()
+    h.update('pyDAEDALUS design v{}'.format(CACHE_VERSION).encode('ascii'))
+    _hash_array(h, coordinates, np.float64)
+    _hash_array(h, edges, np.int64)
+    _hash_array(h, [len(face) for face in faces], np.int64)
+    for face in faces:
+        _hash_array(h, face, np.int64)
+    _hash_array(h, edge_length_vec, np.int64)
+    # Output file and staple names are made from these
+    _hash_text(h, structure_name)
+    _hash_text(h, staple_name)
+    _hash_array(h, [minEdgeLen], np.float64)
+    _hash_array(h, [hForm, twist, singleXOs], np.int64)
+    scaf_hash = hashlib.sha256()
+    _hash_text(scaf_hash, scaf_seq or '')
+    _hash_text(h, scaf_hash.hexdigest())
+    _hash_text(h, scaf_name or '')
+    _hash_text(h, ','.join(sorted(artifacts)))
+    _hash_text(h, json.dumps(spanning_tree or {}, sort_keys=True))
+    return h.hexdigest()
+
+
+def _make_folder(folder):
+    if not path.exists(folder):
+        try:
+            makedirs(folder)
+        except OSError:  # made by another process in the meantime
+            pass
+
+
+def move_files(src_dir, names, out_dir):
+    """
+    Moves the files `names` from src_dir into out_dir, replacing any there.
+    Each is renamed into place, so nothing reading out_dir sees a file that
+    is half-written.  Both folders must be on the same file system.
+    """
+    _make_folder(out_dir)
+    for name in names:
+        src = path.join(src_dir, name)
+        dst = path.join(out_dir, name)
+        try:
+            rename(src, dst)
+        except OSError:  # Windows does not rename over an existing file
+            remove(dst)
+            rename(src, dst)
+
+
+class ResultCache(object):
+    def __init__(self, cache_dir, max_bytes=2 * 2**30):
+        """
+        Keeps the output files of finished designs on disk, so that a design
+        that is asked for again is copied from the cache rather than worked
+        out again.
+
+        Each design is stored in a folder of its own, named by its key from
+        `design_key`, holding its output files (the plots, the .cndo, the
+        staple .csv, the route and DnaInfo pickles and the PDB files) and a
+        manifest.  When the cache holds more than `max_bytes`, the designs
+        used least recently are removed.
+
+        Several processes can share one cache folder: designs are stored by
+        moving a finished folder into place, and one that disappears while
+        being read counts as a miss.
+
+        Parameters
+        ----------
+        cache_dir : str
+            Folder to keep the cache in.  It is created if needed.
+        max_bytes : int
+            Size the cache is kept under
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def get(self, key, out_dir, rename=None):
+        """
+        Copies the output files of the design with the given key into
+        out_dir.
+
+        Parameters
+        ----------
+        key : str
+            Key of the design, from `design_key`
+        out_dir : str
+            Folder to copy the files into.  It is created if needed.
+        rename : function
+            If given, maps the full_file_name the design was stored under to
+            the one its files are given in out_dir, e.g. `redate_file_name`
+            so that they are named like those of a design made today.
+
+        Returns
+        -------
+        str or None
+            The full_file_name of the copied files, or None if the design is
+            not cached
+        """
+        entry_dir = path.join(self.cache_dir, key)
+        manifest_file = path.join(entry_dir, MANIFEST)
+        try:
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+            _make_folder(out_dir)
+            # Copy next to out_dir first, then move into place
+            tmp_dir = tempfile.mkdtemp(prefix='.cache_', dir=out_dir)
+        except (IOError, OSError, ValueError):
+            return None
+        full_file_name = manifest['full_file_name']
+        if rename is not None:
+            full_file_name = rename(full_file_name)
+        # Every file is named after the design, e.g. staples_[name].csv, but
+        # for the edge length plots, which are named after the shape only
+        names = [name.replace(manifest['full_file_name'], full_file_name)
+                 for name in manifest['files']]
+        try:
+            for name, new_name in zip(manifest['files'], names):
+                shutil.copyfile(path.join(entry_dir, name),
+                                path.join(tmp_dir, new_name))
+            move_files(tmp_dir, names, out_dir)
+            utime(manifest_file, None)  # most recently used
+        except (IOError, OSError):
+            return None
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return full_file_name
+
+    def put(self, key, full_file_name, design_dir):
+        """
+        Stores the output files of a design, all the files in design_dir,
+        which must hold those of this design only, and evicts designs used
+        least recently if the cache has grown too big.
+        """
+        files = [name for name in listdir(design_dir)
+                 if path.isfile(path.join(design_dir, name))]
+        num_bytes = sum(path.getsize(path.join(design_dir, name))
+                        for name in files)
+        entry_dir = path.join(self.cache_dir, key)
+        if num_bytes > self.max_bytes or path.exists(entry_dir):
+            return
+
+        _make_folder(self.cache_dir)
+        tmp_dir = tempfile.mkdtemp(prefix='.tmp_', dir=self.cache_dir)
+        try:
+            for name in files:
+                shutil.copyfile(path.join(design_dir, name),
+                                path.join(tmp_dir, name))
+            with open(path.join(tmp_dir, MANIFEST), 'w') as f:
+                json.dump({'full_file_name': full_file_name,
+                           'files': sorted(files), 'bytes': num_bytes,
+                           'created': time.time()}, f)
+            rename(tmp_dir, entry_dir)
+        except OSError:  # stored by another process in the meantime
+            pass
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the designs used least recently until the cache holds at
+        most max_bytes.
+        """
+        entries = []
+        for key in listdir(self.cache_dir):
+            manifest_file = path.join(self.cache_dir, key, MANIFEST)
+            try:
+                with open(manifest_file) as f:
+                    num_bytes = json.load(f)['bytes']
+                entries.append((path.getmtime(manifest_file), num_bytes, key))
+            except (IOError, OSError, ValueError, KeyError):
+                continue  # being stored or removed
+        total_bytes = sum(num_bytes for _, num_bytes, _ in entries)
+        for _, num_bytes, key in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            shutil.rmtree(path.join(self.cache_dir, key), ignore_errors=True)
+            total_bytes -= num_bytes
@@ -0,0 +1,111 @@
+import numpy as np
+
+
+class RoutingGraph(object):
+    """
+    Graph of the pseudo-nodes the scaffold is routed through, built by
+    `split_edge` and `split_vert`, with one int32 array per field.
+
+    Nodes 0 to V-1 are the real vertices.  Every other node is a
+    pseudo-node, with the real vertex it belongs to in `pseudo_vert`, the
+    face it lies on in `face` (NO_FACE for halves of non-spanning tree
+    edges), and at most two links, to the nodes in `neighbors` with the link
+    types in `link_type`:
+        -1 is half of a non-spanning tree edge (one side of scaffold
+        crossover)
+        2 is spanning tree edge: DX edge with 0 scaffold crossovers
+    Once built, every pseudo-node on the route has exactly two links, so the
+    route is a single cycle through them.
+
+    Real vertices can have any number of links while the graph is being
+    built.  Those are kept in `vertex_links`, a list per vertex of
+    (node, link type) in the order they were made, and are removed as each
+    vertex is split.
+    """
+    EMPTY = -1  # unused neighbor slot
+    NO_FACE = -1
+
+    def __init__(self, num_vert, num_nodes):
+        """
+        Starts a graph of the num_vert real vertices, with room for
+        num_nodes nodes in all.
+        """
+        self.num_vert = num_vert
+        self.num_nodes = num_vert
+        self.pseudo_vert = np.zeros(num_nodes, dtype=np.int32)
+        self.pseudo_vert[:num_vert] = np.arange(num_vert)
+        self.face = np.full(num_nodes, self.NO_FACE, dtype=np.int32)
+        self.neighbors = np.full((num_nodes, 2), self.EMPTY, dtype=np.int32)
+        self.link_type = np.zeros((num_nodes, 2), dtype=np.int32)
+        self.vertex_links = [[] for _ in range(num_vert)]
+
+    def number_of_nodes(self):
+        return self.num_nodes
+
+    def reserve(self, num_nodes):
+        """
+        Makes room for num_nodes nodes in all.
+        """
+        if num_nodes <= len(self.pseudo_vert):
+            return
+        self.pseudo_vert = np.resize(self.pseudo_vert, num_nodes)
+        self.face = np.resize(self.face, num_nodes)
+        self.neighbors = np.resize(self.neighbors, (num_nodes, 2))
+        self.neighbors[self.num_nodes:] = self.EMPTY
+        self.link_type = np.resize(self.link_type, (num_nodes, 2))
+
+    def add_node(self, vert_ID, face_ID=NO_FACE):
+        """
+        Adds a pseudo-node of real vertex vert_ID, and returns its ID.
+        """
+        if self.num_nodes == len(self.pseudo_vert):  # out of room
+            self.reserve(2 * self.num_nodes)
+        node = self.num_nodes
+        self.pseudo_vert[node] = vert_ID
+        self.face[node] = face_ID
+        self.num_nodes += 1
+        return node
+
+    def add_link(self, node_1, node_2, link_type):
+        """
+        Links two nodes, at least one of which is a pseudo-node.
+        """
+        for node, other in ((node_1, node_2), (node_2, node_1)):
+            if node < self.num_vert:
+                self.vertex_links[node].append((other, link_type))
+                continue
+            # item() is much faster than indexing for single values
+            if self.neighbors.item(node, 0) == self.EMPTY:
+                slot = 0
+            elif self.neighbors.item(node, 1) == self.EMPTY:
+                slot = 1
+            else:
+                raise Exception("Pseudo-node {} already has two links, "
+                                "can't link it to {}".format(node, other))
+            self.neighbors[node, slot] = other
+            self.link_type[node, slot] = link_type
+
+    def disconnect_vertex(self, vert_ID):
+        """
+        Removes all links of real vertex vert_ID.
+        """
+        for node, _ in self.vertex_links[vert_ID]:
+            if node < self.num_vert:
+                self.vertex_links[node] = [
+                    link for link in self.vertex_links[node]
+                    if link[0] != vert_ID]
+            else:
+                for slot in (0, 1):
+                    if self.neighbors.item(node, slot) == vert_ID:
+                        self.neighbors[node, slot] = self.EMPTY
+        self.vertex_links[vert_ID] = []
+
+    def finish(self):
+        """
+        Trims the arrays to the nodes added, once all vertices are split.
+        """
+        self.pseudo_vert = self.pseudo_vert[:self.num_nodes]
+        self.face = self.face[:self.num_nodes]
+        self.neighbors = self.neighbors[:self.num_nodes]
+        self.link_type = self.link_type[:self.num_nodes]
+        self.vertex_links = None
@@ -0,0 +1,293 @@
+from math import floor
+from os import listdir, path, makedirs
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from Automated_Design.ply_to_input import ply_to_input
+from Automated_Design.DX_cage_design import DX_cage_design, \
+    artifact_names as dx_artifact_names, redate_file_name
+from Automated_Design.gen_PDB import pdbgen, pdbvariants
+from Automated_Design.result_cache import design_key, move_files
+from Automated_Design.stage_timer import StageTimer
+
+# Output files of a design, to be picked with the `artifacts` option: the edge
+# length plots from ply_to_input, the files saved by DX_cage_design (see its
+# artifact_names), the three PDB files and the mmCIF file, which holds the
+# same atomic model in a single file.
+artifact_names = ('edge_length_plots',) + dx_artifact_names + ('pdb', 'cif')
+
+# Saved when no artifacts are asked for: all but the mmCIF file
+default_artifacts = tuple(artifact for artifact in artifact_names
+                          if artifact != 'cif')
+
+# Variants of pdbgen written for each of the atomic model artifacts
+model_variants = {'pdb': ('single', 'multimodel', 'segid'), 'cif': ('cif',)}
+
+# All that is needed when screening designs: the staples to order, and the
+# .cndo to check the design in CanDo.  No plots are made, so matplotlib is not
+# even imported.
+screening_artifacts = ('cndo', 'staples_csv')
+
+
+def get_form_settings(helicalForm, helicalTurns):
+    """
+    Works out the design settings of a helical form.
+
+    Parameters
+    ----------
+    helicalForm : str
+        'Aform', 'Bform', 'Hybrid' or 'Twisted'
+    helicalTurns : int
+        Number of helical turns of the shortest edge
+
+    Returns
+    -------
+    minEdgeLen
+        Number of base pairs of the shortest edge
+    hForm
+        True for A-form helices, False for B-form helices
+    twist
+        1 for DX, 2 for Hybrid and 3 for Twisted designs
+    """
+    hMult = int(helicalTurns)
+    hF = str(helicalForm)
+    if hF == 'Aform':
+        # staple crossover asymmetry, 11 nt/helical turn
+        minEdgeLen = hMult*11
+        hForm = True
+        twist = 1
+    elif hF == 'Bform':
+        # no asymmetry in staple or scaffold crossovers, 10.5 nt/helical turn
+        minEdgeLen = floor(hMult*10.5)
+        hForm = False
+        twist = 1
+    elif hF == 'Hybrid':
+        # no asymmetry in staple or scaffold crossovers, 10.5 nt/helical turn
+        minEdgeLen = hMult*11
+        hForm = True
+        twist = 2
+    elif hF == 'Twisted':
+        # scaffold crossover asymmetry in opposite direction, 11 nt/helical turn
+        minEdgeLen = hMult*11
+        hForm = True
+        twist = 3
+    else:
+        raise Exception("Unknown helical form '{}', expected one of "
+                        "'Aform', 'Bform', 'Hybrid' or 'Twisted'".format(hF))
+    return minEdgeLen, hForm, twist
+
+
+def run_design(pName, helicalForm, helicalTurns, plyfile, seqfile,
+               timings=False, cache=None, artifacts=None, spanning_tree=None):
+    """
+    Designs a wireframe origami from a PLY file, start to finish, and saves
+    all its output files, including the PDB files, into one folder.
+
+    This is what the RPC server runs for each `calc` or `submit` call.  See
+    `design_from_ply` for the other parameters.
+
+    Parameters
+    ----------
+    timings : bool
+        If True, time each stage of the design, save the timings as
+        timings_[design name].json next to the other outputs, and return
+        them.
+    cache : ResultCache
+        If given, a design that is in the cache is copied from it rather
+        than worked out again, and one that is not is added to it.
+    artifacts : list
+        Names of the output files to save, out of `artifact_names`.  All
+        but 'cif' are saved if None.
+    spanning_tree : dict
+        How the spanning tree is chosen, see `design_from_ply`.
+
+    Returns
+    -------
+    str or dict
+        "Finished!", or if timings is True, a dict with status "Finished!",
+        total_time and the stages, each with its time in seconds and the
+        sizes it worked on, as floats
+    """
+    if not timings:
+        design_from_ply(pName, helicalForm, helicalTurns, plyfile, seqfile,
+                        cache=cache, artifacts=artifacts,
+                        spanning_tree=spanning_tree)
+        return "Finished!"
+    timer = StageTimer()
+    full_file_name, _ = design_from_ply(pName, helicalForm, helicalTurns,
+                                        plyfile, seqfile, timer=timer,
+                                        cache=cache, artifacts=artifacts,
+                                        spanning_tree=spanning_tree)
+    timer.save_json(path.join(str(pName),
+                              'timings_' + full_file_name + '.json'))
+    result = timer.to_dict()
+    # Sizes as floats, as XML-RPC cannot send ints over 2**31 - 1, which
+    # bytes_written of a large design can be
+    for record in result['stages'].values():
+        for key, value in record.items():
+            record[key] = float(value)
+    result['status'] = "Finished!"
+    return result
+
+
+def design_from_ply(pName, helicalForm, helicalTurns, plyfile, seqfile,
+                    timer=None, cache=None, artifacts=None,
+                    spanning_tree=None):
+    """
+    Designs a wireframe origami from a PLY file, start to finish, and saves
+    all its output files, including the PDB files, into one folder.
+
+    Parameters
+    ----------
+    pName : str
+        Project name, and the name of the folder the output files are saved
+        into.  It is created if needed.
+    helicalForm : str
+        'Aform', 'Bform', 'Hybrid' or 'Twisted'
+    helicalTurns : int
+        Number of helical turns of the shortest edge.  Multiplied by 11
+        (A-form) or 10.5 (B-form) to get the minimum edge length.
+    plyfile : str
+        Path to the PLY file
+    seqfile : str
+        Path to the scaffold sequence file, or 'M13.txt' to use the default
+        scaffold sequence
+    timer : StageTimer
+        If given, the time taken by each stage is recorded into it: reading
+        the PLY file as 0_ply_to_input, the steps of DX_cage_design, and
+        writing the PDB and mmCIF files as 12_pdbgen.
+    cache : ResultCache
+        If given, the design is looked up in it by its geometry, settings and
+        scaffold sequence.  If found, its output files are copied from the
+        cache, named with today's date.  If not, it is designed and then
+        added to the cache.
+    artifacts : list
+        Names of the output files to save, out of `artifact_names`, e.g.
+        `screening_artifacts`, or ['cndo', 'cif'] for the design and its
+        atomic model as a single mmCIF file.  All but 'cif' are saved if
+        None.
+    spanning_tree : dict
+        Keyword arguments for designate_edge_type, picking how the spanning
+        tree, and so where the scaffold crossovers go, is chosen: strategy,
+        one of 'bfs', 'unweighted', 'length' or 'random', root for 'bfs' and
+        seed for 'random', e.g. {'strategy': 'random', 'seed': 3}.  The tree
+        DAEDALUS has always used is chosen if None.
+
+    Returns
+    -------
+    full_file_name
+        The name shared by the output files of the design
+    dnaInfo
+        The DnaInfo object of the design, or None if the design was copied
+        from the cache
+    """
+    if not path.exists(pName):
+        makedirs(pName)
+    pFile = str(plyfile)
+    sFile = str(seqfile)
+    minEdgeLen, hForm, twist = get_form_settings(helicalForm, helicalTurns)
+    if timer is None:
+        timer = StageTimer(enabled=False)
+    if artifacts is None:
+        artifacts = default_artifacts
+    for artifact in artifacts:
+        if artifact not in artifact_names:
+            raise Exception("Unknown artifact '{}', expected one of "
+                            "{}".format(artifact, list(artifact_names)))
+    if (sFile == 'M13.txt'):
+        scaf_seq = []
+        scaf_name = []
+    else:
+        scaf_name = str(pName)
+        fSeq = open(sFile, 'r')
+        scaf_seq = ''
+        for lines in fSeq:
+            scaf_seq = scaf_seq+lines.strip()
+        scaf_seq = scaf_seq.upper()  # Force scaffold sequence to be uppercase
+
+    if cache is not None:
+        # Read the geometry without plotting it, to look the design up
+        timer.start('0_cache_lookup')
+        key = design_key(ply_to_input(str(pFile), None, minEdgeLen, hForm),
+                         minEdgeLen, hForm, twist, scaf_seq, scaf_name,
+                         artifacts, spanning_tree)
+        # Named like those of a design made today, as if worked out again
+        full_file_name = cache.get(key, str(pName), rename=redate_file_name)
+        if full_file_name is not None:
+            timer.record(cache_hit=1)
+            timer.stop()
+            return full_file_name, None
+
+    # With a cache, design into a folder of its own, so that only the files of
+    # this design are cached, even while others are saved into pName
+    if cache is not None:
+        design_dir = tempfile.mkdtemp(prefix='.design_', dir=str(pName))
+    else:
+        design_dir = str(pName)
+    try:
+        timer.start('0_ply_to_input')
+        coordinates, edges, faces, edge_length_vec, file_name, \
+            staple_name, singleXOs = ply_to_input(
+                str(pFile),
+                design_dir if 'edge_length_plots' in artifacts else None,
+                minEdgeLen, hForm)
+        full_file_name, dnaInfo = DX_cage_design(
+            coordinates, edges, faces, edge_length_vec, file_name,
+            staple_name, singleXOs, scaf_seq, scaf_name, hForm, design_dir,
+            twist, print_to_console=False, return_dna_info=True, timer=timer,
+            artifacts=[artifact for artifact in artifacts
+                       if artifact in dx_artifact_names],
+            spanning_tree=spanning_tree)
+        # Hand the design to pdbgen directly, rather than re-reading the .cndo
+        variants = [variant for artifact in sorted(model_variants)
+                    if artifact in artifacts
+                    for variant in model_variants[artifact]]
+        if variants:
+            timer.start('12_pdbgen')
+            pdbgen(full_file_name, hForm, design_dir, dnaInfo,
+                   variants=variants)
+            timer.add_bytes(*[path.join(design_dir,
+                                        full_file_name + pdbvariants[variant])
+                              for variant in variants])
+        timer.stop()
+
+        if cache is not None:
+            cache.put(key, full_file_name, design_dir)
+            move_files(design_dir, listdir(design_dir), str(pName))
+    finally:
+        if cache is not None:
+            shutil.rmtree(design_dir, ignore_errors=True)
+    return full_file_name, dnaInfo
+
+
+def summarize_design(pName, helicalForm, helicalTurns, plyfile, seqfile,
+                     artifacts=None, spanning_tree=None):
+    """
+    Runs `design_from_ply` and sums up how it went, for batch runs.  Errors
+    are caught and reported in the summary rather than raised.
+
+    Returns
+    -------
+    dict
+        status ('finished' or 'failed'), scaffold_length, num_staples and
+        elapsed seconds, plus the error message if it failed
+    """
+    summary = {'status': 'finished', 'scaffold_length': None,
+               'num_staples': None, 'elapsed': None, 'error': ''}
+    start = time.time()
+    try:
+        _, dnaInfo = design_from_ply(pName, helicalForm, helicalTurns,
+                                     plyfile, seqfile, artifacts=artifacts,
+                                     spanning_tree=spanning_tree)
+        summary['scaffold_length'] = len(dnaInfo.dnaGeom.dNode)
+        # Every strand but the scaffold is a staple
+        summary['num_staples'] = \
+            int(np.count_nonzero(dnaInfo.dnaTop.up == -1)) - 1
+    except Exception as e:
+        summary['status'] = 'failed'
+        summary['error'] = '{}: {}'.format(type(e).__name__, e)
+    summary['elapsed'] = time.time() - start
+    return summary
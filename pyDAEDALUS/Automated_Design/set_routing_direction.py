@@ -1,17 +1,73 @@
 import numpy as np
-from networkx.algorithms.simple_paths import all_simple_paths
 
 
-def pick_longest_path(paths):
-    return max(list(paths), key=len)
+def dereference_pseudonodes_in_path(path_with_pseudonodes, pseudo_vert):
+    return np.asarray(pseudo_vert)[path_with_pseudonodes].tolist()
 
 
-def dereference_pseudonodes_in_path(path_with_pseudonodes, pseudo_vert):
-    path_with_only_real_nodes = []
-    for node in path_with_pseudonodes:
-        dereferenced = pseudo_vert[node]
-        path_with_only_real_nodes.append(dereferenced)
-    return path_with_only_real_nodes
+def walk_scaffold_cycle(edge_type_mat_allNodes, start_node):
+    """
+    Walks the scaffold cycle once, starting and ending at `start_node`.
+
+    After `split_vert`, every pseudo-node that is still connected has exactly
+    two neighbors, so the scaffold route is a single cycle through all of
+    them.  Following that cycle one step at a time visits each pseudo-node
+    once, which replaces enumerating every simple path between `start_node`
+    and its neighbors.
+
+    Parameters
+    ----------
+    edge_type_mat_allNodes : RoutingGraph
+        Network representation including link types, as returned by
+        `split_vert`.
+    start_node : int
+        Pseudo-node to start (and end) the walk at.
+
+    Returns
+    -------
+    path
+        list of pseudo-nodes in visitation order, starting at `start_node`
+    path_vals
+        list of link types, where the value at index j is the type of the link
+        between path[j] and path[j+1], wrapping around at end
+    """
+    # Only pseudo-nodes that are part of the route have neighbors.  The real
+    # vertices were disconnected in `arrange_neighbors`.
+    neighbors = edge_type_mat_allNodes.neighbors
+    has_neighbors = neighbors != edge_type_mat_allNodes.EMPTY
+    num_routed_nodes = int(np.count_nonzero(has_neighbors.any(axis=1)))
+    num_neighbors = has_neighbors.sum(axis=1).tolist()
+    neighbors = neighbors.tolist()
+    link_type = edge_type_mat_allNodes.link_type.tolist()
+
+    path = []
+    path_vals = []
+    prev_node = None
+    curr_node = start_node
+    while True:
+        if num_neighbors[curr_node] != 2:
+            raise Exception(
+                "Broken scaffold route: pseudo-node {} has {} neighbors "
+                "instead of 2".format(curr_node, num_neighbors[curr_node]))
+
+        slot = 0 if neighbors[curr_node][0] != prev_node else 1
+        next_node = neighbors[curr_node][slot]
+
+        path.append(curr_node)
+        path_vals.append(link_type[curr_node][slot])
+
+        prev_node = curr_node
+        curr_node = next_node
+        if curr_node == start_node:
+            break
+
+    if len(path) != num_routed_nodes:
+        raise Exception(
+            "Broken scaffold route: the cycle through pseudo-node {} visits "
+            "{} of {} pseudo-nodes".format(start_node, len(path),
+                                           num_routed_nodes))
+
+    return path, path_vals
 
 
 def check_direction(route_real, vert_to_face, faces):
@@ -23,8 +79,13 @@ def check_direction(route_real, vert_to_face, faces):
     """
 
     # every face has at least three nodes and three is enough to detect
-    # direction, so only grab first three
-    first_face_route = np.array(route_real[0:3])
+    # direction, so only grab the first three that differ.  Where the route
+    # crosses over a non-spanning tree edge it turns back, e.g. 0, 1, 0,
+    # which is not a corner of any face.
+    for i in range(len(route_real) - 2):
+        first_face_route = np.array(route_real[i:(i + 3)])
+        if len(set(route_real[i:(i + 3)])) == 3:
+            break
 
     # should just have one overlapping face
     vtf_1 = vert_to_face[first_face_route[0]]
@@ -60,7 +121,7 @@ def set_routing_direction(edge_type_mat_allNodes, num_vert, pseudo_vert,
 
     Parameters
     ----------
-    edge_type_mat_allNodes : networkx.classes.digraph.DiGraph
+    edge_type_mat_allNodes : RoutingGraph
         Network representation including link types.  Link types have the
         following possible values:
             -1 is half of a non-spanning tree edge (one side of scaffold
@@ -68,7 +129,7 @@ def set_routing_direction(edge_type_mat_allNodes, num_vert, pseudo_vert,
             2 is spanning tree edge: DX edge with 0 scaffold crossovers
     num_vert : int
         number of vertices, V
-    pseudo_vert : list
+    pseudo_vert : array
         row vector where value j at index i indicate that
         vertex i corresponds to vertex j, one of the V real vertices
     faces : list
@@ -94,37 +155,26 @@ def set_routing_direction(edge_type_mat_allNodes, num_vert, pseudo_vert,
     # graph network
     start_node = 2*num_vert+2  # this node is a pseudo-node at Vertex 1
 
-    next_nodes = edge_type_mat_allNodes.neighbors(start_node)  # you'll have 2
-    # TODO: Convert to generator, since you only need to make the second
-    # path if the first is the wrong direction?
-    for next_node in next_nodes:
-        paths = all_simple_paths(
-            edge_type_mat_allNodes, start_node, next_node)
-
-        # you'll have one 1-length path because they're neighbors.  You want
-        # the other path that includes all the other nodes:
-        path = pick_longest_path(paths)
-
-        route_real = path
-        temp_route_real = route_real + [route_real[0]]
-        route_vals = [edge_type_mat_allNodes
-                      [temp_route_real[i]][temp_route_real[i+1]]['type']
-                      for i in range(len(route_real))]
-
-        dereferenced_path = dereference_pseudonodes_in_path(path, pseudo_vert)
-        route_real = dereferenced_path
-
-        if check_direction(route_real, vert_to_face, faces):
-        # For consistency, start routing at a tree edge (route_vals = 2)
-            start_route_list=[]
-            for i in range(len(route_real)):
-                if route_real[i] == 0 and route_vals[i] == 2:
-                    start_route_list.append(i)
-            start_route = start_route_list[0] # in case there are multiple choices
-        #
-        # Shift route_real and route_vals to start at start_route
-            route_real = route_real[start_route:] + route_real[:start_route]
-            route_vals = route_vals[start_route:] + route_vals[:start_route]
-            return [route_real, route_vals]
-
-    raise Exception("one of the two above should have returned")
+    # Walk the scaffold cycle once, in an arbitrary direction.
+    path, route_vals = walk_scaffold_cycle(edge_type_mat_allNodes, start_node)
+    route_real = dereference_pseudonodes_in_path(path, pseudo_vert)
+
+    # If that was the wrong direction, reverse the cycle in place rather than
+    # walking it a second time.  Link types are the same in both directions.
+    if not check_direction(route_real, vert_to_face, faces):
+        route_real = route_real[:1] + route_real[:0:-1]
+        route_vals = route_vals[::-1]
+        if not check_direction(route_real, vert_to_face, faces):
+            raise Exception("Neither routing direction matches the faces")
+
+    # For consistency, start routing at a tree edge (route_vals = 2)
+    start_route_list = []
+    for i in range(len(route_real)):
+        if route_real[i] == 0 and route_vals[i] == 2:
+            start_route_list.append(i)
+    start_route = start_route_list[0]  # in case there are multiple choices
+
+    # Shift route_real and route_vals to start at start_route
+    route_real = route_real[start_route:] + route_real[:start_route]
+    route_vals = route_vals[start_route:] + route_vals[:start_route]
+    return [route_real, route_vals]
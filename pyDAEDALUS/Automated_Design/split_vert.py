@@ -7,8 +7,8 @@ def split_vert(edge_type_mat_wHalfs, pseudo_vert, num_vert, vert_to_face):
 
     Parameters
     ----------
-    edge_type_mat_wHalfs : networkx.classes.digraph.DiGraph
-        VxV sparse matrix where
+    edge_type_mat_wHalfs : RoutingGraph
+        As returned by `split_edge`, where
             -1 is half of a non-spanning tree edge (one side of scaffold
             crossover)
             2 is spanning tree edge: DX edge with 0 scaffold crossovers
@@ -24,7 +24,8 @@ def split_vert(edge_type_mat_wHalfs, pseudo_vert, num_vert, vert_to_face):
     Returns
     -------
     edge_type_mat_allNodes
-        sparse matrix where
+        The same RoutingGraph, with every real vertex split into
+        pseudo-nodes and disconnected, where
             -1 is half of a non-spanning tree edge (one side of scaffold
             crossover)
             2 is spanning tree edge: DX edge with 0 scaffold crossovers
@@ -32,19 +33,18 @@ def split_vert(edge_type_mat_wHalfs, pseudo_vert, num_vert, vert_to_face):
         updated to include new pseudo-vertices
     """
 
-    # # Initialize edge_type_mat_allNodes. It will be augmented from _wHalfs
-    edge_type_mat_allNodes = edge_type_mat_wHalfs.copy()
+    edge_type_mat_allNodes = edge_type_mat_wHalfs
 
-    # # Initialize face_storage matrix for pseudo nodes added in this function
-    face_assign = [None] * len(pseudo_vert)
+    # # Every real vertex is split into one pseudo-node per face around it
+    edge_type_mat_allNodes.reserve(
+        edge_type_mat_allNodes.number_of_nodes() +
+        sum(len(vert_to_face[vert_ID]) for vert_ID in range(num_vert)))
 
     for vert_ID in range(num_vert):  # for each real vertex
-        neighbors = edge_type_mat_allNodes.in_edges(vert_ID, data=True)
-
         # # arrange_neighbors identifies which neighboring vertices share faces
         # # and adds nodes at the vertex to route the scaffold around the
         # # vertex vert_ID accordingly
-        edge_type_mat_allNodes, pseudo_vert, face_assign = arrange_neighbors(
-            edge_type_mat_allNodes, pseudo_vert, vert_ID, neighbors,
-            vert_to_face, face_assign)
-    return edge_type_mat_allNodes, pseudo_vert
+        arrange_neighbors(edge_type_mat_allNodes, vert_ID, vert_to_face)
+
+    edge_type_mat_allNodes.finish()
+    return edge_type_mat_allNodes, edge_type_mat_allNodes.pseudo_vert
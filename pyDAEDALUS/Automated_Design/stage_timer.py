@@ -0,0 +1,125 @@
+import json
+import sys
+import time
+from collections import OrderedDict
+from os import path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_memory_mb():
+    """
+    Peak resident memory of this process so far, in MB, or None where it
+    cannot be found out (Windows).
+    """
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':  # bytes rather than kB
+        return maxrss / 2.0**20
+    return maxrss / 2.0**10
+
+
+class StageTimer(object):
+    def __init__(self, enabled=True, memory=False):
+        """
+        Records how long each stage of a design takes, along with the sizes
+        of what it worked on, e.g. numbers of nodes, bases or staples, and
+        bytes written to file.
+
+        Stages run back to back: `start` ends the stage that is running, if
+        any, and starts the next one.  A disabled timer records nothing, and
+        each of its methods returns straight away, so that a design run
+        without timings pays next to nothing for them.
+
+        Parameters
+        ----------
+        enabled : bool
+            If False, nothing is recorded
+        memory : bool
+            If True, also record the peak memory of the process by the end of
+            each stage, as peak_mb
+        """
+        self.enabled = enabled
+        self.memory = memory
+        self.stages = OrderedDict()
+        self._stage = None
+        self._started = None
+
+    def start(self, stage):
+        """
+        Ends the running stage and starts timing `stage`.  Starting a stage
+        that has run before adds to its time.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        self._end(now)
+        self._stage = self.stages.setdefault(stage, OrderedDict(time=0.0))
+        self._started = now
+
+    def stop(self):
+        """
+        Ends the running stage, if any.
+        """
+        if not self.enabled:
+            return
+        self._end(time.time())
+
+    def record(self, **sizes):
+        """
+        Records sizes, e.g. record(nodes=120, bases=1116), against the
+        running stage.
+        """
+        if not self.enabled or self._stage is None:
+            return
+        for key, value in sizes.items():
+            self._stage[key] = int(value)
+
+    def add_bytes(self, *filenames):
+        """
+        Adds the sizes of the given files, those that exist, to the bytes
+        written by the running stage.
+        """
+        if not self.enabled or self._stage is None:
+            return
+        num_bytes = self._stage.get('bytes_written', 0)
+        for filename in filenames:
+            if path.isfile(filename):
+                num_bytes += path.getsize(filename)
+        self._stage['bytes_written'] = num_bytes
+
+    def total_time(self):
+        return sum(stage['time'] for stage in self.stages.values())
+
+    def to_dict(self):
+        """
+        Returns the timings as plain dicts, ready for JSON:
+        {'total_time': seconds, 'stages': {stage: {'time': seconds, ...}}}.
+        Sizes are ints, which XML-RPC cannot send over 2**31 - 1.
+        """
+        self.stop()
+        return {'total_time': self.total_time(),
+                'stages': dict((stage, dict(record))
+                               for stage, record in self.stages.items())}
+
+    def save_json(self, filename):
+        self.stop()
+        with open(filename, 'w') as f:
+            json.dump(OrderedDict([('total_time', self.total_time()),
+                                   ('stages', self.stages)]), f, indent=1,
+                      separators=(',', ': '))
+
+    def _end(self, now):
+        if self._stage is None:
+            return
+        self._stage['time'] += now - self._started
+        if self.memory:
+            peak_mb = peak_memory_mb()
+            if peak_mb is not None:
+                self._stage['peak_mb'] = peak_mb
+        self._stage = None
+        self._started = None
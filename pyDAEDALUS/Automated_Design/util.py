@@ -33,9 +33,12 @@ def find(iterable, val):
 
     # Some times, data comes in as an array.  Directly computing array equality
     # breaks, so they first need converted over to iterables.
-    # If arrays, it is assumed the iterable is two dimensions and val is one.
+    # If arrays, it is assumed the iterable is two dimensions and val is one,
+    # unless the iterable is a one dimensional array of scalars.
 
     if type(iterable) == np.ndarray:
+        if iterable.ndim == 1:
+            return np.flatnonzero(iterable == val).tolist()
         iterable = [list(item) for item in iterable]
     if type(val) == np.ndarray:
         val = list(val)
@@ -0,0 +1,125 @@
+import argparse
+import csv
+import glob
+import sys
+from os import path, makedirs
+from Automated_Design.designate_edge_type import tree_strategies
+from Automated_Design.job_queue import JobQueue
+from Automated_Design.run_design import artifact_names, summarize_design
+
+# Designs every PLY file in a folder with each of the given helical forms and
+# turn counts, several at a time, and writes a summary table of how each went.
+#
+# e.g. python pyDAEDALUS/DAEDbatch.py PLY_Files --forms Aform Bform --turns 4
+#
+# Each design is saved into its own folder under --out, named after the PLY
+# file, helical form and turns, e.g. 01_tetrahedron_Aform_4. A design that
+# fails, or whose worker process dies, is recorded as failed in the summary
+# and the batch carries on. Designs can be given a time limit with --timeout,
+# so that one that never finishes cannot hold up the batch either.
+#
+# To screen many designs quickly, save only the files needed with e.g.
+# --artifacts cndo staples_csv, which skips all plots and the PDB files, or
+# with --artifacts cndo cif for the atomic model as a single mmCIF file.
+#
+# The spanning tree, which decides where the scaffold crossovers go, can be
+# picked with --tree, e.g. --tree random --tree-seed 3 to try another routing.
+
+summary_columns = ['ply', 'form', 'turns', 'project', 'status',
+                   'scaffold_length', 'num_staples', 'elapsed', 'error']
+
+
+def run_batch(ply_dir, forms, turns, seqfile='M13.txt', out_dir='.',
+              processes=None, summary_file='batch_summary.csv',
+              time_limit=None, artifacts=None, spanning_tree=None):
+    plyfiles = sorted(glob.glob(path.join(ply_dir, '*.ply')))
+    if not plyfiles:
+        raise Exception('No PLY files found in {}'.format(ply_dir))
+    if not path.exists(out_dir):
+        makedirs(out_dir)
+
+    jobs = JobQueue(summarize_design, processes, time_limit=time_limit)
+    rows = []
+    for plyfile in plyfiles:
+        shape_name = path.splitext(path.basename(plyfile))[0]
+        for form in forms:
+            for hMult in turns:
+                project = '{}_{}_{}'.format(shape_name, form, hMult)
+                row = {'ply': plyfile, 'form': form, 'turns': hMult,
+                       'project': project}
+                row['job'] = jobs.submit(path.join(out_dir, project), form,
+                                         hMult, plyfile, seqfile, artifacts,
+                                         spanning_tree)
+                rows.append(row)
+
+    try:
+        for i, row in enumerate(rows):
+            try:
+                row.update(jobs.result(row['job']))
+            except Exception as e:
+                # The worker process itself died, or ran out of time
+                row.update(status='failed', elapsed=None,
+                           error=str(e).splitlines()[-1])
+            elapsed = ''
+            if row['elapsed'] is not None:
+                row['elapsed'] = '{:.2f}'.format(row['elapsed'])
+                elapsed = row['elapsed'] + 's'
+            print('[{}/{}] {} {} {} {}'.format(
+                i + 1, len(rows), row['project'], row['status'], elapsed,
+                row['error']))
+            sys.stdout.flush()
+    finally:
+        jobs.shutdown()
+
+    with open(summary_file, 'wb') as f:
+        writer = csv.DictWriter(f, summary_columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Design every PLY file in a folder, several at a time')
+    parser.add_argument('ply_dir', help='folder of PLY files, e.g. PLY_Files')
+    parser.add_argument('--forms', nargs='+', default=['Aform'],
+                        choices=['Aform', 'Bform', 'Hybrid', 'Twisted'],
+                        help='helical forms to design with (default: Aform)')
+    parser.add_argument('--turns', nargs='+', type=int, default=[4],
+                        help='helical turns of the shortest edge (default: 4)')
+    parser.add_argument('--seq', default='M13.txt',
+                        help='scaffold sequence file, or M13.txt for the '
+                             'default scaffold (default: M13.txt)')
+    parser.add_argument('--out', default='.',
+                        help='folder to save the designs into (default: .)')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='number of designs run at a time (default: '
+                             'number of CPUs)')
+    parser.add_argument('--summary', default='batch_summary.csv',
+                        help='summary table to write (default: '
+                             'batch_summary.csv)')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='seconds a design may run before it is stopped '
+                             'and counted as failed (default: no limit)')
+    parser.add_argument('--artifacts', nargs='+', default=None,
+                        choices=artifact_names,
+                        help='output files to save for each design, e.g. '
+                             'cndo staples_csv (default: all but cif)')
+    parser.add_argument('--tree', default='bfs', choices=tree_strategies,
+                        help='how the spanning tree is chosen (default: bfs, '
+                             'the tree DAEDALUS has always used)')
+    parser.add_argument('--tree-root', type=int, default=0,
+                        help='vertex the bfs tree is grown from (default: 0)')
+    parser.add_argument('--tree-seed', type=int, default=None,
+                        help='seed of the random tree (default: none)')
+    args = parser.parse_args()
+    spanning_tree = {'strategy': args.tree, 'root': args.tree_root,
+                     'seed': args.tree_seed}
+    rows = run_batch(args.ply_dir, args.forms, args.turns, args.seq,
+                     args.out, args.jobs, args.summary, args.timeout,
+                     args.artifacts, spanning_tree)
+    num_failed = len([row for row in rows if row['status'] != 'finished'])
+    print('{} of {} designs finished, summary written to {}'.format(
+        len(rows) - num_failed, len(rows), args.summary))
+    sys.exit(1 if num_failed else 0)
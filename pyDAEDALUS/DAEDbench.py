@@ -0,0 +1,210 @@
+import argparse
+import fnmatch
+import glob
+import json
+import platform
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from os import path, walk
+
+import numpy as np
+
+from Automated_Design.job_queue import JobQueue
+from Automated_Design.run_design import design_from_ply
+from Automated_Design.stage_timer import StageTimer, peak_memory_mb
+
+# Benchmarks the whole design pipeline over a folder of PLY files, by default
+# the bundled PLY_Files, for each of the given helical forms.
+#
+# e.g. python pyDAEDALUS/DAEDbench.py --output bench.json
+#      python pyDAEDALUS/DAEDbench.py --output new.json --baseline bench.json
+#
+# Each design runs in its own process, one at a time unless --jobs is given,
+# and records the wall time of ply_to_input, of each of the 11 stages of
+# DX_cage_design and of pdbgen, the peak memory of the process by the end of
+# each of them, and the sizes of the design. Results are saved as JSON, and
+# compared against those of an earlier run if --baseline is given.
+
+
+def folder_size(folder):
+    return sum(path.getsize(path.join(root, name))
+               for root, _, names in walk(folder) for name in names)
+
+
+def count_atoms(pdb_filename):
+    num_atoms = 0
+    with open(pdb_filename, 'rb') as f:
+        for line in f:
+            if line.startswith(b'ATOM'):
+                num_atoms += 1
+    return num_atoms
+
+
+def benchmark_design(plyfile, helicalForm, helicalTurns, out_dir):
+    """
+    Runs one design in this process, saving it into out_dir, and returns its
+    timings and sizes.  Meant to run in a fresh worker process, so that the
+    peak memory is its own.
+    """
+    np.random.seed(0)  # random scaffolds for large designs
+    timer = StageTimer(memory=True)
+    full_file_name, _ = design_from_ply(
+        out_dir, helicalForm, helicalTurns, plyfile, 'M13.txt', timer=timer)
+    timings = timer.to_dict()
+
+    stages = dict((stage, {'time': record['time'],
+                           'peak_mb': record.get('peak_mb')})
+                  for stage, record in timings['stages'].items())
+    return {'ply': path.basename(plyfile), 'form': helicalForm,
+            'turns': helicalTurns, 'stages': stages,
+            'total_time': timings['total_time'],
+            'peak_mb': peak_memory_mb(),
+            'sizes': {
+                'vertices': timings['stages']['1_graph']['vertices'],
+                'edges': timings['stages']['1_graph']['edges'],
+                'nucleotides': timings['stages']['11_output']['nucleotides'],
+                'staples': timings['stages']['10_staple_seq']['staples'],
+                'atoms': count_atoms(
+                    path.join(out_dir, full_file_name + '.pdb')),
+                'bytes_written': folder_size(out_dir),
+            }}
+
+
+def run_key(run):
+    return '{} {} {}'.format(run['ply'], run['form'], run['turns'])
+
+
+def run_benchmarks(plyfiles, forms, turns, processes=1, keep_dir=None):
+    work_dir = keep_dir or tempfile.mkdtemp(prefix='DAEDbench_')
+    jobs = JobQueue(benchmark_design, processes)
+    submitted = []
+    for plyfile in plyfiles:
+        for form in forms:
+            for hMult in turns:
+                out_dir = path.join(work_dir, '{}_{}_{}'.format(
+                    path.splitext(path.basename(plyfile))[0], form, hMult))
+                submitted.append(((plyfile, form, hMult),
+                                  jobs.submit(plyfile, form, hMult, out_dir)))
+
+    runs = []
+    try:
+        for i, ((plyfile, form, hMult), job_id) in enumerate(submitted):
+            try:
+                run = jobs.result(job_id)
+            except Exception as e:
+                run = {'ply': path.basename(plyfile), 'form': form,
+                       'turns': hMult,
+                       'error': str(e).strip().splitlines()[-1]}
+            runs.append(run)
+            if 'error' in run:
+                summary = 'failed: ' + run['error']
+            else:
+                summary = '{:.2f}s {:.0f} MB {} nt'.format(
+                    run['total_time'], run['peak_mb'],
+                    run['sizes']['nucleotides'])
+            print('[{}/{}] {} {}'.format(i + 1, len(submitted), run_key(run),
+                                         summary))
+            sys.stdout.flush()
+    finally:
+        jobs.shutdown()
+        if keep_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {'date': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'runs': runs}
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Prints the time of each design and stage against the baseline, and
+    returns the keys of the designs more than `tolerance` slower in total.
+    """
+    base_runs = dict((run_key(run), run) for run in baseline['runs']
+                     if 'error' not in run)
+    stage_ratios = {}
+    slower = []
+    print('\n{:<50s} {:>9s} {:>9s} {:>8s}'.format('design', 'baseline',
+                                                  'time', 'speedup'))
+    for run in results['runs']:
+        key = run_key(run)
+        if 'error' in run or key not in base_runs:
+            continue
+        base = base_runs[key]
+        speedup = base['total_time'] / max(run['total_time'], 1e-9)
+        print('{:<50s} {:>8.2f}s {:>8.2f}s {:>7.2f}x'.format(
+            key, base['total_time'], run['total_time'], speedup))
+        if run['total_time'] > base['total_time'] * (1 + tolerance):
+            slower.append(key)
+        for stage, record in run['stages'].items():
+            if stage in base['stages']:
+                stage_ratios.setdefault(stage, []).append(
+                    base['stages'][stage]['time']
+                    / max(record['time'], 1e-9))
+
+    print('\n{:<25s} {:>8s}'.format('stage', 'speedup'))
+    for stage in sorted(stage_ratios, key=lambda s: int(s.split('_')[0])):
+        # Geometric mean over the designs
+        print('{:<25s} {:>7.2f}x'.format(
+            stage, np.exp(np.mean(np.log(stage_ratios[stage])))))
+    return slower
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark the design pipeline over a folder of PLY files')
+    parser.add_argument('--ply-dir', default=path.join(
+        path.dirname(path.dirname(path.abspath(__file__))), 'PLY_Files'),
+        help='folder of PLY files (default: the bundled PLY_Files)')
+    parser.add_argument('--shapes', default='*',
+                        help='only PLY files matching this pattern, e.g. '
+                             '"0[1-5]_*" (default: all)')
+    parser.add_argument('--forms', nargs='+', default=['Aform', 'Bform'],
+                        choices=['Aform', 'Bform', 'Hybrid', 'Twisted'],
+                        help='helical forms (default: Aform Bform)')
+    parser.add_argument('--turns', nargs='+', type=int, default=[4],
+                        help='helical turns of the shortest edge (default: 4)')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='designs run at a time; more than 1 skews the '
+                             'timings (default: 1)')
+    parser.add_argument('--output', default='bench_results.json',
+                        help='results file to write (default: '
+                             'bench_results.json)')
+    parser.add_argument('--baseline', default=None,
+                        help='results file of an earlier run to compare to')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='fraction a design may be slower than the '
+                             'baseline before it counts as a regression '
+                             '(default: 0.1)')
+    parser.add_argument('--keep-outputs', default=None,
+                        help='folder to keep the design outputs in (default: '
+                             'a temporary folder, removed afterwards)')
+    args = parser.parse_args()
+
+    plyfiles = [plyfile for plyfile in
+                sorted(glob.glob(path.join(args.ply_dir, '*.ply')))
+                if fnmatch.fnmatch(path.basename(plyfile), args.shapes)]
+    if not plyfiles:
+        raise Exception('No PLY files matching {} found in {}'.format(
+            args.shapes, args.ply_dir))
+
+    results = run_benchmarks(plyfiles, args.forms, args.turns, args.jobs,
+                             args.keep_outputs)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+    print('Results written to {}'.format(args.output))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        slower = compare_to_baseline(results, baseline, args.tolerance)
+        if slower:
+            print('\n{} designs slower than the baseline by more than '
+                  '{:.0%}:'.format(len(slower), args.tolerance))
+            for key in slower:
+                print('  ' + key)
+            sys.exit(1)
@@ -1,63 +1,88 @@
 from SimpleXMLRPCServer import SimpleXMLRPCServer
-import xmlrpclib
-import shutil
-import sys
-from math import floor
-from os import listdir, path, makedirs
-from Automated_Design.ply_to_input import ply_to_input
-from Automated_Design.DX_cage_design import DX_cage_design
-from Automated_Design.gen_PDB import pdbgen
+from SocketServer import ThreadingMixIn
+import argparse
+from Automated_Design.job_queue import JobQueue
+from Automated_Design.result_cache import ResultCache
+from Automated_Design.run_design import run_design
 
 # class daedalusRPC(object):
 
-def calc(pName, helicalForm, helicalTurns, plyfile, seqfile):
-    if not path.exists(pName):
-        makedirs(pName)
-    hMult=int(helicalTurns)
-    hF=str(helicalForm)
-    pFile=str(plyfile)
-    sFile=str(seqfile)
-    if hF=='Aform': 
-        # staple crossover asymmetry, 11 nt/helical turn
-        minEdgeLen=hMult*11
-        hForm=True
-        twist=1
-    elif hF=='Bform': 
-        # no asymmetry in staple or scaffold crossovers, 10.5 nt/helical turn
-        minEdgeLen=floor(hMult*10.5)
-        hForm=False
-        twist=1
-    elif hF=='Hybrid':
-        # no asymmetry in staple or scaffold crossovers, 10.5 nt/helical turn
-        minEdgeLen=hMult*11
-        hForm=True
-        twist=2
-    elif hF=="Twisted":
-        # scaffold crossover asymmetry in opposite direction, 11 nt/helical turn
-        minEdgeLen=hMult*11
-        hForm=True
-        twist=3
-    coordinates, edges, faces, edge_length_vec, file_name, \
-        staple_name, singleXOs = ply_to_input(
-            str(pFile), str(pName), minEdgeLen, hForm)
-    if (sFile=='M13.txt'):
-        scaf_seq = []
-        scaf_name = []
-    else:
-        scaf_name = str(pName)
-        fSeq=open(sFile,'r')
-        scaf_seq=''
-        for lines in fSeq:
-            scaf_seq=scaf_seq+lines.strip()
-        scaf_seq = scaf_seq.upper() # Force scaffold sequence to be uppercase
-    full_file_name = DX_cage_design(  # noqa: F841
-        coordinates, edges, faces, edge_length_vec, file_name,
-        staple_name, singleXOs, scaf_seq, scaf_name, hForm, str(pName),
-        twist, print_to_console=False)
-    pdbout = pdbgen(full_file_name, hForm, str(pName))
-    return "Finished!"
-#
-server = SimpleXMLRPCServer(("localhost", 4242))
-server.register_multicall_functions()
-server.register_function(calc, "calc")
-server.serve_forever()
+
+class ThreadingXMLRPCServer(ThreadingMixIn, SimpleXMLRPCServer):
+    # Serve each client in its own thread, so that one waiting on a job
+    # does not hold up the others
+    daemon_threads = True
+
+
+def serve(port=4242, processes=None, cache_dir=None, cache_mb=2048):
+    # Designs run as jobs in worker processes, at most `processes` at a time.
+    # If cache_dir is given, finished designs are kept there, up to cache_mb
+    # in all, and a design asked for again is copied from it.
+    #
+    # submit(projectName, helicalForm, helicalTurns, plyFile, sequenceFile)
+    #   queues a design and returns its job ID, to be passed to
+    #   status(jobID), result(jobID) and cancel(jobID).  A job is forgotten
+    #   once result(jobID) has returned it, or an hour after it ended.
+    # calc(...) takes the same arguments as submit, and waits for the design
+    #   to finish, as it always has.
+    # Both take three optional last arguments.  If timings is True, the design
+    # returns a struct with the time taken by each of its stages, rather than
+    # "Finished!", and saves it into the project folder as JSON too.
+    # artifacts is a list of the output files to save, out of
+    # run_design.artifact_names, e.g. ['cndo', 'staples_csv'], or ['cndo',
+    # 'cif'] for the atomic model as one mmCIF file; all but 'cif' if empty.
+    # spanning_tree is a struct picking the spanning tree, and so where the
+    # scaffold crossovers go, e.g. {'strategy': 'random', 'seed': 3}; see
+    # run_design.design_from_ply.  The usual tree if empty.
+    jobs = JobQueue(run_design, processes)
+    cache = None
+    if cache_dir:
+        cache = ResultCache(cache_dir, cache_mb * 2**20)
+
+    def calc(pName, helicalForm, helicalTurns, plyfile, seqfile,
+             timings=False, artifacts=None, spanning_tree=None):
+        return jobs.result(submit(pName, helicalForm, helicalTurns, plyfile,
+                                  seqfile, timings, artifacts, spanning_tree))
+
+    def submit(pName, helicalForm, helicalTurns, plyfile, seqfile,
+               timings=False, artifacts=None, spanning_tree=None):
+        return jobs.submit(pName, helicalForm, helicalTurns, plyfile,
+                           seqfile, timings, cache, artifacts or None,
+                           spanning_tree or None)
+
+    server = ThreadingXMLRPCServer(("localhost", port), logRequests=False)
+    server.register_multicall_functions()
+    server.register_function(calc, "calc")
+    server.register_function(submit, "submit")
+    server.register_function(jobs.status, "status")
+    server.register_function(jobs.result, "result")
+    server.register_function(jobs.cancel, "cancel")
+    try:
+        server.serve_forever()
+    finally:
+        jobs.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='pyDAEDALUS design server, answering XML-RPC calls on '
+                    'localhost')
+    parser.add_argument('--port', type=int, default=4242,
+                        help='port to listen on (default: 4242)')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='number of designs run at a time (default: '
+                             'number of CPUs)')
+    parser.add_argument('--cache-dir', default='pyDAEDALUS_cache',
+                        help='folder to keep finished designs in, so that '
+                             'repeat designs are copied rather than worked '
+                             'out again (default: pyDAEDALUS_cache)')
+    parser.add_argument('--cache-size', type=int, default=2048,
+                        help='MB of designs to keep in the cache before the '
+                             'least recently used are removed (default: '
+                             '2048)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='always work designs out from scratch')
+    args = parser.parse_args()
+    serve(args.port, args.processes,
+          None if args.no_cache else args.cache_dir, args.cache_size)